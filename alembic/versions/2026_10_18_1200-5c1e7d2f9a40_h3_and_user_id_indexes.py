@@ -0,0 +1,58 @@
+"""H3 and user_id indexes on locations
+
+Revision ID: 5c1e7d2f9a40
+Revises: 9040bda00263
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5c1e7d2f9a40"
+down_revision: Union[str, None] = "9040bda00263"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+H3_RESOLUTIONS = range(3, 10)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_locations_user_id",
+            "locations",
+            ["user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # (h3_index_N, user_id): the ring lookup, the `user_id !=` filter
+        # and the keyset ORDER BY of /list are answered by index-only scans.
+        for res in H3_RESOLUTIONS:
+            op.create_index(
+                f"idx_locations_h3_index_{res}",
+                "locations",
+                [f"h3_index_{res}", "user_id"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for res in H3_RESOLUTIONS:
+            op.drop_index(
+                f"idx_locations_h3_index_{res}",
+                table_name="locations",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+        op.drop_index(
+            "idx_locations_user_id",
+            table_name="locations",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,177 @@
+"""Overhead of the api/list cache decorator per backend.
+
+Wraps a handler returning a ready `UsersCollection` in
+`cache_list_location` and calls it directly, without HTTP, for each
+`CacheBackend`:
+
+* miss: a new key every call (lease, serialize, compress, store, tag);
+* hit: the same key, answered from the backend (local cache disabled);
+* L1 hit: the same key, answered from the L1 `local` of the backend.
+
+`none` is the handler plus serialization, without the decorator. The
+memory backend always runs; Redis runs when `--redis-url` is given.
+
+Run:
+    python -m benchmarks.cache_overhead --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from redis import asyncio as aioredis
+
+from benchmarks.user_assembly import batch, make_rows
+from src.core.controllers.depends.utils.cache_backend import (
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+)
+from src.core.controllers.depends.utils.redis_chash import (
+    cache_list_location,
+    json_bytes_response,
+)
+from src.core.controllers.depends.utils.serialize_and_deserilize import (
+    serialize_data,
+)
+from src.core.settings.constants import NearbyCache
+from src.core.validators.user import UsersCollection
+
+PREFIX = "bench/cache_overhead"
+
+
+def make_request(key: str) -> Request:
+    """Return a bare POST api/list request selecting cache entry `key`."""
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/list",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "query_string": f"key={key}".encode(),
+        }
+    )
+
+
+async def key_builder(prefix_key: str, request: Request, _: dict) -> str:
+    """Return the entry key given in the query."""
+    return f"{prefix_key}:{request.query_params['key']}"
+
+
+def make_handlers(
+    users: UsersCollection, backend: CacheBackend
+) -> tuple[Callable[..., Awaitable[Response]], ...]:
+    """Return the bare and the decorated handler of `users`."""
+
+    async def handler(request: Request, response: Response):
+        return users
+
+    async def bare(request: Request, response: Response) -> Response:
+        return json_bytes_response(
+            serialize_data(await handler(request, response))
+        )
+
+    cached = cache_list_location(
+        expire=3600,
+        prefix_key=PREFIX,
+        key_builder=key_builder,
+        tags_builder=lambda request: (
+            f"{PREFIX}:{request.query_params['key']}",
+        ),
+        backend=backend,
+    )(handler)
+    return bare, cached
+
+
+async def measure(
+    handler: Callable[..., Awaitable[Response]],
+    keys: Callable[[int], str],
+    requests: int,
+) -> float:
+    """Return the median time of one call in microseconds."""
+    timings: list[float] = []
+    for number in range(requests):
+        request = make_request(keys(number))
+        started = time.perf_counter()
+        await handler(request=request, response=Response())
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+
+async def run(
+    backend: CacheBackend, users: UsersCollection, requests: int
+) -> None:
+    """Print the per-call time of each path on `backend`."""
+    bare, cached = make_handlers(users, backend)
+    run_id = time.time_ns()
+    l1_size = backend.local.max_size
+
+    results = {
+        "none": await measure(bare, lambda n: "bare", requests),
+        "miss": await measure(
+            cached, lambda n: f"{run_id}:miss:{n}", requests
+        ),
+    }
+
+    backend.local.max_size = 0
+    await measure(cached, lambda n: f"{run_id}:hit", 1)
+    results["hit"] = await measure(cached, lambda n: f"{run_id}:hit", requests)
+
+    backend.local.max_size = l1_size
+    await measure(cached, lambda n: f"{run_id}:l1", 1)
+    results["L1 hit"] = await measure(
+        cached, lambda n: f"{run_id}:l1", requests
+    )
+    backend.local.clear()
+
+    for path, median_us in results.items():
+        print(f"{backend.name:>6} {path:>6}: {median_us:8.2f} us/request")
+
+
+async def main(requests: int, rows: int, redis_url: str | None) -> None:
+    """Run every available backend on the same payload."""
+    auth, users_rows = make_rows(
+        rows, center=(55.7558, 37.6173), rings=30, seed=42
+    )
+    users = UsersCollection(users=batch(auth, users_rows, exact=False))
+    print(f"{rows} users, {len(serialize_data(users))} bytes of JSON")
+
+    await run(MemoryCacheBackend(), users, requests)
+
+    if redis_url:
+        redis = aioredis.from_url(redis_url, decode_responses=True)
+        redis_bytes = aioredis.from_url(redis_url)
+        try:
+            await run(RedisCacheBackend(redis, redis_bytes), users, requests)
+        finally:
+            keys = [
+                key
+                for pattern in (
+                    f"{PREFIX}*",
+                    f"{NearbyCache.TAG_PREF}:{PREFIX}*",
+                )
+                async for key in redis.scan_iter(pattern)
+            ]
+            if keys:
+                await redis.delete(*keys)
+            await redis.aclose()
+            await redis_bytes.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            requests=args.requests,
+            rows=args.rows,
+            redis_url=args.redis_url,
+        )
+    )
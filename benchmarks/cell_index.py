@@ -0,0 +1,143 @@
+"""/list first page: SQL ring lookup vs the shared cell index.
+
+Seeds N synthetic users around a center point, builds the cell index
+file from them and, for each radius, times the first page three ways:
+the H3 engine statement, the in-memory index lookup alone, and the
+lookup plus the primary-key read of the picked rows (what /list does
+with the index enabled). Needs the database from `.env` with migrations
+applied.
+
+Run:
+    python -m benchmarks.cell_index --users 100000 --radius 100 2000 6000
+"""
+
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.dataset import (
+    dataset_parser,
+    drop_seeded,
+    reseed,
+    seeded_area,
+)
+from src.core.models.cell_index import CellIndex, build_cell_index
+from src.core.models.cruds.location import Locations, get_nearby_engine
+from src.core.models.engine import get_engine
+from src.core.settings.constants import NearbyEngine, Pagination
+from src.core.settings.env import settings
+from src.core.validators.dto import NearbyArea
+
+
+async def median_ms(
+    run: Callable[[], Awaitable[object]], repeat: int
+) -> float:
+    """Return median time of `run` in ms."""
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main(
+    users: int,
+    radii: list[int],
+    center: tuple[float, float],
+    spread_m: float,
+    repeat: int,
+    keep: bool,
+) -> None:
+    """Seed, build the index, compare both paths for each radius."""
+    manager = await get_engine(url=settings.db.get_url_database, echo=False)
+    path = os.path.join(tempfile.gettempdir(), "bench_cell_index.bin")
+    limit = Pagination.DEFAULT_LIMIT + 1
+
+    async with manager.session_factory() as session:
+        ids = await reseed(
+            session, count=users, center=center, spread_m=spread_m
+        )
+
+        try:
+            started = time.perf_counter()
+            async with session.begin():
+                count = await build_cell_index(session, path)
+            print(
+                f"index: {count} users, {os.path.getsize(path)} bytes, "
+                f"built in {time.perf_counter() - started:.2f} s"
+            )
+            index = CellIndex(path)
+            index.load()
+
+            for radius in radii:
+                area, h3_params, auth_cell = await seeded_area(
+                    session, user_id=ids[0], radius=radius, exact=False
+                )
+
+                async def lookup() -> NearbyArea:
+                    page = index.lookup(
+                        h3_ranges=area.h3_ranges,
+                        resolution=h3_params.resolution,
+                        exclude_user=ids[0],
+                        exclude_cell=auth_cell,
+                        limit=limit,
+                    )
+                    return area.model_copy(
+                        update={"user_ids": tuple(str(u) for _, u in page)}
+                    )
+
+                async def sql() -> None:
+                    async with session.begin():
+                        await Locations.near_users(
+                            area=area,
+                            session=session,
+                            exclude_h3_index=auth_cell,
+                            limit=limit,
+                        )
+
+                async def indexed() -> None:
+                    picked = await lookup()
+                    async with session.begin():
+                        await Locations.near_users(
+                            area=picked,
+                            session=session,
+                            exclude_h3_index=auth_cell,
+                            limit=limit,
+                            engine=get_nearby_engine(NearbyEngine.CELL_INDEX),
+                        )
+
+                print(f"\n=== radius {radius} m, {h3_params.field_name}")
+                for label, run in (
+                    ("sql", sql),
+                    ("lookup", lookup),
+                    ("index+pk", indexed),
+                ):
+                    print(
+                        f"--- {label:>8}: "
+                        f"{await median_ms(run, repeat):.2f} ms"
+                    )
+        finally:
+            os.remove(path)
+            if not keep:
+                await drop_seeded(session)
+
+    await manager.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    args = dataset_parser(__doc__, radii=[100, 2000, 6000]).parse_args()
+
+    asyncio.run(
+        main(
+            users=args.users,
+            radii=args.radius,
+            center=(args.lat, args.lon),
+            spread_m=args.spread,
+            repeat=args.repeat,
+            keep=args.keep,
+        )
+    )
@@ -0,0 +1,208 @@
+"""Synthetic users for nearby-search benchmarks.
+
+Seeded rows are marked by `avatar_path == SEED_MARK` so they can be
+removed without touching real data. `dataset_parser`, `reseed` and
+`seeded_area` are the steps every /list benchmark shares.
+"""
+
+import argparse
+import math
+import random
+import uuid
+from typing import NamedTuple, Sequence
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.controllers.depends.utils.geo import (
+    get_near_ranges,
+    select_h3_resolution_params,
+)
+from src.core.models.cruds.location import Locations
+from src.core.models.models.auth import AuthORM
+from src.core.models.models.location import LocationORM
+from src.core.models.models.user import UserORM
+from src.core.validators.dto import H3Parameters, NearbyArea
+
+SEED_MARK = "bench://seed"
+EARTH_RADIUS_M = 6_371_000
+
+
+def random_point(
+    rnd: random.Random,
+    center: tuple[float, float],
+    spread_m: float,
+) -> tuple[float, float]:
+    """Return a point within `spread_m` of `center`, denser in the middle."""
+    lat, lon = center
+    distance = spread_m * rnd.random() ** 2
+    bearing = rnd.uniform(0, 2 * math.pi)
+
+    d_lat = distance * math.cos(bearing) / EARTH_RADIUS_M
+    d_lon = (
+        distance
+        * math.sin(bearing)
+        / (EARTH_RADIUS_M * math.cos(math.radians(lat)))
+    )
+    return lat + math.degrees(d_lat), lon + math.degrees(d_lon)
+
+
+async def seed_users(
+    session: AsyncSession,
+    count: int,
+    center: tuple[float, float],
+    spread_m: float,
+    seed: int = 42,
+    batch: int = 5_000,
+) -> list[str]:
+    """Insert `count` users with auth rows and locations around `center`.
+
+    Returns:
+        list[str]: Ids of seeded users, the first one is at the center.
+    """
+    rnd = random.Random(seed)
+    ids: list[str] = []
+
+    for start in range(0, count, batch):
+        users, auths, locations = [], [], []
+
+        for number in range(start, min(start + batch, count)):
+            user_id = str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+            lat, lon = (
+                center
+                if number == 0
+                else random_point(rnd, center=center, spread_m=spread_m)
+            )
+
+            users.append(
+                UserORM(
+                    id=user_id,
+                    first_name=f"bench{number % 1000}",
+                    last_name="bench",
+                    sex=rnd.choice("MF"),
+                    avatar_path=SEED_MARK,
+                )
+            )
+            auths.append(
+                AuthORM(
+                    user_id=user_id,
+                    hashed_password="-",
+                    email=f"{user_id}@bench.local",
+                )
+            )
+            location = LocationORM(
+                user_id=user_id, location=f"POINT({lon} {lat})"
+            )
+            location.update_h3_indexes(latitude=lat, longitude=lon)
+            locations.append(location)
+            ids.append(user_id)
+
+        async with session.begin():
+            session.add_all(users)
+            await session.flush()
+            session.add_all(auths)
+            session.add_all(locations)
+
+    return ids
+
+
+async def seeded_ids(session: AsyncSession) -> Sequence[str]:
+    """Return ids of users seeded earlier."""
+    result = await session.scalars(
+        select(UserORM.id).where(UserORM.avatar_path == SEED_MARK)
+    )
+    return [str(user_id) for user_id in result.all()]
+
+
+async def drop_seeded(session: AsyncSession) -> None:
+    """Delete all seeded users, their auth rows and locations."""
+    seeded = select(UserORM.id).where(UserORM.avatar_path == SEED_MARK)
+
+    async with session.begin():
+        await session.execute(
+            delete(LocationORM).where(LocationORM.user_id.in_(seeded))
+        )
+        await session.execute(
+            delete(AuthORM).where(AuthORM.user_id.in_(seeded))
+        )
+        await session.execute(
+            delete(UserORM).where(UserORM.avatar_path == SEED_MARK)
+        )
+
+
+async def reseed(
+    session: AsyncSession,
+    count: int,
+    center: tuple[float, float],
+    spread_m: float,
+) -> list[str]:
+    """Replace seeded users by `count` new ones and refresh statistics.
+
+    Returns:
+        list[str]: Ids of seeded users, the first one is at the center.
+    """
+    await drop_seeded(session)
+    ids = await seed_users(
+        session, count=count, center=center, spread_m=spread_m
+    )
+    async with session.begin():
+        await session.execute(text("ANALYZE locations"))
+        await session.execute(text("ANALYZE users"))
+    return ids
+
+
+class SeededArea(NamedTuple):
+    """Search area of a seeded user, as /list plans it."""
+
+    area: NearbyArea
+    h3_params: H3Parameters
+    auth_cell: int
+
+
+async def seeded_area(
+    session: AsyncSession,
+    user_id: str,
+    radius: float,
+    exact: bool,
+) -> SeededArea:
+    """Return the H3 area within `radius` of a seeded user.
+
+    Raises:
+        RuntimeError: The user has no location.
+    """
+    h3_params = select_h3_resolution_params(radius, exact=exact)
+    async with session.begin():
+        auth_cell = await Locations.get_h3_index_by_resolution(
+            auth_id=user_id,
+            field_h3_index=h3_params.field_name,
+            session=session,
+        )
+    if auth_cell is None:
+        raise RuntimeError("Seeded user has no location.")
+
+    area = NearbyArea(
+        user_id=user_id,
+        field_name=h3_params.field_name,
+        radius=radius,
+        h3_ranges=get_near_ranges(
+            user_location=auth_cell,
+            radius=radius,
+            h3_params=h3_params,
+        ),
+    )
+    return SeededArea(area=area, h3_params=h3_params, auth_cell=auth_cell)
+
+
+def dataset_parser(
+    description: str | None, radii: list[int]
+) -> argparse.ArgumentParser:
+    """Return a parser of the dataset and run options of a benchmark."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--radius", type=int, nargs="+", default=radii)
+    parser.add_argument("--lat", type=float, default=55.7558)
+    parser.add_argument("--lon", type=float, default=37.6173)
+    parser.add_argument("--spread", type=float, default=30_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true")
+    return parser
@@ -0,0 +1,88 @@
+"""Per-request engine/session overhead: before and after.
+
+Compares the old dependency chain (global lock -> HelperDB ->
+new async_sessionmaker -> new async_scoped_session -> session) with the
+current one (ready sessionmaker -> session). No query is sent, so only
+the Python-side overhead is measured and no database has to be running.
+
+Run:
+    python -m benchmarks.engine_overhead --requests 20000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import time
+from asyncio import current_task
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session
+
+from src.core.models.engine import HelperDB, get_engine, get_session_factory
+from src.core.settings.env import settings
+
+legacy_lock = asyncio.Lock()
+
+
+async def legacy_session(manager: HelperDB) -> None:
+    """Reproduce the per-request path before the lifespan engine."""
+    async with legacy_lock:
+        await manager.initialize()
+
+    scoped = async_scoped_session(
+        session_factory=manager.create_session(manager.async_engine),
+        scopefunc=current_task,
+    )
+    async with scoped() as session:
+        await session.close()
+
+
+async def current_session(_: HelperDB) -> None:
+    """Open a session the current way: from the ready sessionmaker."""
+    session: AsyncSession
+    async with get_session_factory()() as session:
+        assert session is not None
+
+
+async def run(
+    name: str,
+    path: Callable[[HelperDB], Awaitable[None]],
+    manager: HelperDB,
+    requests: int,
+    concurrency: int,
+) -> None:
+    """Run `requests` calls of `path` in batches of `concurrency` tasks."""
+
+    async def one() -> None:
+        await path(manager)
+
+    started = time.perf_counter()
+    for _ in range(requests // concurrency):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{name:>8}: {elapsed * 1e6 / requests:8.2f} us/request "
+        f"({requests} requests, concurrency {concurrency})"
+    )
+
+
+async def main(requests: int, concurrency: int) -> None:
+    """Run both paths on the same engine."""
+    manager = HelperDB(url=settings.db.get_url_database, echo=False)
+    # Skip CREATE TABLE: the benchmark must not need a live database.
+    manager._initialize_tables = True
+    await get_engine(url=settings.db.get_url_database, echo=False)
+
+    await run("before", legacy_session, manager, requests, concurrency)
+    await run("after", current_session, manager, requests, concurrency)
+
+    await manager.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(requests=args.requests, concurrency=args.concurrency))
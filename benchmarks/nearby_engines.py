@@ -0,0 +1,150 @@
+"""H3 cover vs PostGIS nearby-search engines on the same dataset.
+
+Seeds N synthetic users around a center point, then for each radius runs
+`Locations.near_users` with both engines: the median time of the first
+page, and how the full H3 result differs from the users really within
+the radius (`ST_DWithin`, the PostGIS result). Needs the database from
+`.env` with migrations applied.
+
+Run:
+    python -m benchmarks.nearby_engines --users 100000 --radius 100 1000 5000
+"""
+
+import asyncio
+import statistics
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.dataset import (
+    dataset_parser,
+    drop_seeded,
+    reseed,
+    seeded_area,
+)
+from src.core.models.cruds.location import (
+    NEARBY_ENGINES,
+    Locations,
+    NearbySearchEngine,
+)
+from src.core.models.engine import get_engine
+from src.core.settings.constants import NearbyEngine, Pagination
+from src.core.settings.env import settings
+from src.core.validators.dto import NearbyArea
+
+
+async def page_time(
+    session: AsyncSession,
+    area: NearbyArea,
+    engine: NearbySearchEngine,
+    exclude_h3_index: int | None,
+    repeat: int,
+) -> float:
+    """Return median time of the first page in ms."""
+    timings: list[float] = []
+
+    for _ in range(repeat):
+        async with session.begin():
+            started = time.perf_counter()
+            await Locations.near_users(
+                area=area,
+                session=session,
+                exclude_h3_index=exclude_h3_index,
+                limit=Pagination.DEFAULT_LIMIT + 1,
+                engine=engine,
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(timings)
+
+
+async def found_ids(
+    session: AsyncSession,
+    area: NearbyArea,
+    engine: NearbySearchEngine,
+    exclude_h3_index: int | None,
+) -> set[str]:
+    """Return ids of all users the engine finds in the area."""
+    async with session.begin():
+        rows = await Locations.near_users(
+            area=area,
+            session=session,
+            exclude_h3_index=exclude_h3_index,
+            engine=engine,
+        )
+    return {str(row.id) for row in rows}
+
+
+async def main(
+    users: int,
+    radii: list[int],
+    center: tuple[float, float],
+    spread_m: float,
+    exact: bool,
+    repeat: int,
+    keep: bool,
+) -> None:
+    """Seed, compare engines for each radius, clean up."""
+    manager = await get_engine(url=settings.db.get_url_database, echo=False)
+
+    async with manager.session_factory() as session:
+        ids = await reseed(
+            session, count=users, center=center, spread_m=spread_m
+        )
+
+        try:
+            for radius in radii:
+                area, h3_params, auth_cell = await seeded_area(
+                    session, user_id=ids[0], radius=radius, exact=exact
+                )
+                exclude = None if exact else auth_cell
+
+                print(
+                    f"\n=== radius {radius} m, {h3_params.field_name}, "
+                    f"exact={exact}, {users} users"
+                )
+                found = {}
+                for name, engine in NEARBY_ENGINES.items():
+                    median_ms = await page_time(
+                        session, area, engine, exclude, repeat=repeat
+                    )
+                    found[name] = await found_ids(
+                        session, area, engine, exclude
+                    )
+                    print(
+                        f"--- {name:>8}: first page median {median_ms:.2f} ms"
+                        f", {len(found[name])} users in area"
+                    )
+
+                within = found[NearbyEngine.POSTGIS]
+                outside = found[NearbyEngine.H3] - within
+                missed = within - found[NearbyEngine.H3]
+                print(
+                    f"--- h3 vs radius: {len(outside)} users outside, "
+                    f"{len(missed)} users missed"
+                )
+        finally:
+            if not keep:
+                await drop_seeded(session)
+
+    await manager.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = dataset_parser(__doc__, radii=[100, 1000, 5000])
+    parser.add_argument(
+        "--approximate", action="store_true", help="non-exact mode"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            users=args.users,
+            radii=args.radius,
+            center=(args.lat, args.lon),
+            spread_m=args.spread,
+            exact=not args.approximate,
+            repeat=args.repeat,
+            keep=args.keep,
+        )
+    )
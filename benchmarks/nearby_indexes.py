@@ -0,0 +1,129 @@
+"""Query plans and timings of the /list ring lookup with and without indexes.
+
+Seeds N synthetic users around a center point, then for each radius runs
+the `Locations.near_users` statement twice: with the planner free to use
+`idx_locations_h3_index_9` for the cell ranges, and with index scans
+disabled (the plan the table had before the indexes existed). Prints the
+plan and the median execution time of both. Needs the database from
+`.env` with migrations applied.
+
+Run:
+    python -m benchmarks.nearby_indexes --users 100000 --radius 100 2000
+"""
+
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.dataset import (
+    dataset_parser,
+    drop_seeded,
+    reseed,
+    seeded_area,
+)
+from src.core.models.cruds.location import Locations
+from src.core.models.engine import get_engine
+from src.core.settings.env import settings
+
+NO_INDEX_SCANS = (
+    "SET LOCAL enable_indexscan = off",
+    "SET LOCAL enable_indexonlyscan = off",
+    "SET LOCAL enable_bitmapscan = off",
+)
+
+
+async def explain(
+    session: AsyncSession,
+    sql: str,
+    repeat: int,
+    use_indexes: bool,
+) -> tuple[list[str], float]:
+    """Return EXPLAIN ANALYZE plan and median execution time in ms."""
+    timings: list[float] = []
+    plan: list[str] = []
+
+    for _ in range(repeat):
+        async with session.begin():
+            if not use_indexes:
+                for statement in NO_INDEX_SCANS:
+                    await session.execute(text(statement))
+
+            started = time.perf_counter()
+            await session.execute(text(sql))
+            timings.append((time.perf_counter() - started) * 1000)
+
+            result = await session.execute(
+                text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+            )
+            plan = [row[0] for row in result.all()]
+
+    return plan, statistics.median(timings)
+
+
+async def main(
+    users: int,
+    radii: list[int],
+    center: tuple[float, float],
+    spread_m: float,
+    repeat: int,
+    keep: bool,
+) -> None:
+    """Seed, explain each radius, clean up."""
+    manager = await get_engine(url=settings.db.get_url_database, echo=False)
+
+    async with manager.session_factory() as session:
+        ids = await reseed(
+            session, count=users, center=center, spread_m=spread_m
+        )
+
+        try:
+            for radius in radii:
+                area, h3_params, auth_cell = await seeded_area(
+                    session, user_id=ids[0], radius=radius, exact=False
+                )
+                sql = str(
+                    Locations.near_users_query(
+                        area=area,
+                        exclude_h3_index=auth_cell,
+                        limit=101,
+                    ).compile(
+                        dialect=postgresql.dialect(),
+                        compile_kwargs={"literal_binds": True},
+                    )
+                )
+
+                print(
+                    f"\n=== radius {radius} m, {h3_params.field_name}, "
+                    f"{len(area.h3_ranges)} cell ranges, {users} users"
+                )
+                for use_indexes in (False, True):
+                    plan, median_ms = await explain(
+                        session, sql, repeat=repeat, use_indexes=use_indexes
+                    )
+                    label = "with indexes" if use_indexes else "seq scan"
+                    print(f"--- {label}: median {median_ms:.2f} ms")
+                    print("\n".join(plan))
+        finally:
+            if not keep:
+                await drop_seeded(session)
+
+    await manager.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    args = dataset_parser(__doc__, radii=[100, 2000]).parse_args()
+
+    asyncio.run(
+        main(
+            users=args.users,
+            radii=args.radius,
+            center=(args.lat, args.lon),
+            spread_m=args.spread,
+            repeat=args.repeat,
+            keep=args.keep,
+        )
+    )
@@ -0,0 +1,206 @@
+"""/list result assembly: per-row loop vs NumPy batch.
+
+Builds N neighbour rows in random cells of a disk around a center cell
+and assembles them into `User` models twice: the old way (one
+`get_location_params_by_auth_user` and one validated `User` per row) and
+through `get_location_params_batch` + `make_models`. Prints the median
+time of both and the largest coordinate and distance difference. No
+database is needed.
+
+Run:
+    python -m benchmarks.user_assembly --rows 2000 --exact
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+from collections import namedtuple
+from typing import Any, Callable
+
+import h3
+from geopy.distance import distance
+
+from src.core.controllers.depends.utils.geo import (
+    cell_center,
+    get_location_params_batch,
+)
+from src.core.controllers.depends.utils.serialize_and_deserilize import (
+    make_models,
+)
+from src.core.validators.dto import LocationData, LocationTemp
+from src.core.validators.user import User
+
+Row = namedtuple("Row", "id first_name last_name sex avatar_path h3_cell")
+
+
+def make_rows(
+    count: int, center: tuple[float, float], rings: int, seed: int
+) -> tuple[int, list[Row]]:
+    """Return the center cell and `count` rows in its disk."""
+    rnd = random.Random(seed)
+    center_cell = h3.latlng_to_cell(*center, 9)
+    cells = [h3.str_to_int(cell) for cell in h3.grid_disk(center_cell, rings)]
+    rows = [
+        Row(
+            id=uuid.UUID(int=rnd.getrandbits(128), version=4),
+            first_name=f"bench{number}",
+            last_name="bench",
+            sex=rnd.choice("MF"),
+            avatar_path="bench://seed",
+            h3_cell=rnd.choice(cells),
+        )
+        for number in range(count)
+    ]
+    return h3.str_to_int(center_cell), rows
+
+
+def get_location_params_by_auth_user(
+    auth_location: int | None,
+    user_location: int | None,
+    exact: bool | None,
+) -> LocationData:
+    """Return center and distance of one neighbour, the per-row baseline."""
+    if auth_location and user_location:
+        loc_temp = LocationTemp()
+        loc_temp.h3_str_auth = h3.int_to_str(auth_location)
+        loc_temp.h3_str_user = h3.int_to_str(user_location)
+
+        loc_temp.lat_auth, loc_temp.lon_auth = h3.cell_to_latlng(
+            loc_temp.h3_str_auth
+        )
+        loc_temp.lat_user, loc_temp.lon_user = h3.cell_to_latlng(
+            loc_temp.h3_str_user
+        )
+
+        return LocationData(
+            lat=loc_temp.lat_user,
+            lon=loc_temp.lon_user,
+            distance=(
+                exact_circle_distance(coordinates=loc_temp)
+                if exact
+                else greate_circle_distance(coordinates=loc_temp)
+            ),
+        )
+    raise ValueError("Data location is not valid.")
+
+
+def greate_circle_distance(coordinates: LocationTemp) -> float:
+    """Return greate-circle distance."""
+    return h3.great_circle_distance(
+        latlng1=(coordinates.lat_auth, coordinates.lon_auth),
+        latlng2=(coordinates.lat_user, coordinates.lon_user),
+        unit="km",
+    )
+
+
+def exact_circle_distance(coordinates: LocationTemp) -> float:
+    """Return exact circle distance."""
+    return (
+        distance(
+            (coordinates.lat_auth, coordinates.lon_auth),
+            (coordinates.lat_user, coordinates.lon_user),
+        ).m
+        / 1000
+    )
+
+
+def make_model(row: Row, geo: Any) -> User:
+    """Build one validated `User`, the baseline of `make_models`."""
+    return User(
+        id=str(row.id),
+        firstname=row.first_name,
+        lastname=row.last_name,
+        sex=row.sex,
+        lat=geo.lat,
+        lon=geo.lon,
+        distance=geo.distance,
+        avatar_path=row.avatar_path,
+    )
+
+
+def per_row(auth: int, rows: list[Row], exact: bool) -> list[User]:
+    """Assemble users one by one, as before."""
+    return [
+        make_model(
+            row,
+            get_location_params_by_auth_user(
+                auth_location=auth, user_location=row.h3_cell, exact=exact
+            ),
+        )
+        for row in rows
+    ]
+
+
+def batch(auth: int, rows: list[Row], exact: bool) -> list[User]:
+    """Assemble users through the NumPy batch path."""
+    lats, lons, distances = get_location_params_batch(
+        auth_location=auth,
+        user_locations=[row.h3_cell for row in rows],
+        exact=exact,
+    )
+    return make_models(rows, lats.tolist(), lons.tolist(), distances.tolist())
+
+
+def measure(
+    path: Callable[[int, list[Row], bool], list[User]],
+    auth: int,
+    rows: list[Row],
+    exact: bool,
+    repeat: int,
+) -> tuple[float, list[User]]:
+    """Return median time in ms and the users of the last run."""
+    timings: list[float] = []
+    users: list[User] = []
+
+    for _ in range(repeat):
+        cell_center.cache_clear()
+        started = time.perf_counter()
+        users = path(auth, rows, exact)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(timings), users
+
+
+def main(rows_count: int, rings: int, exact: bool, repeat: int) -> None:
+    """Run both paths on the same rows and compare results."""
+    auth, rows = make_rows(
+        rows_count, center=(55.7558, 37.6173), rings=rings, seed=42
+    )
+
+    before_ms, before = measure(per_row, auth, rows, exact, repeat)
+    after_ms, after = measure(batch, auth, rows, exact, repeat)
+
+    coordinate_error = max(
+        max(abs(old.lat - new.lat), abs(old.lon - new.lon))
+        for old, new in zip(before, after)
+    )
+    distance_error_m = max(
+        abs(old.distance - new.distance) * 1000
+        for old, new in zip(before, after)
+    )
+
+    print(f"{rows_count} rows, {rings} rings, exact={exact}")
+    print(f"per row: {before_ms:8.2f} ms")
+    print(f"  batch: {after_ms:8.2f} ms")
+    print(
+        f"max difference: {coordinate_error:.2e} deg, "
+        f"{distance_error_m:.2e} m"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--rings", type=int, default=30)
+    parser.add_argument("--exact", action="store_true")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    main(
+        rows_count=args.rows,
+        rings=args.rings,
+        exact=args.exact,
+        repeat=args.repeat,
+    )
@@ -3,6 +3,7 @@
 from celery import Celery
 from kombu import Connection
 
+from src.core.settings.constants import CellDensity, RedisGeo
 from src.core.settings.env import settings
 
 
@@ -26,6 +27,19 @@ def create_celery_app():
         task_soft_time_limit=3540,
     )
 
+    beat_schedule = {}
+    if settings.nearby.NEARBY_GEO_MIRROR:
+        beat_schedule[RedisGeo.RECONCILE_TASK] = {
+            "task": RedisGeo.RECONCILE_TASK,
+            "schedule": settings.nearby.NEARBY_GEO_RECONCILE,
+        }
+    if settings.nearby.NEARBY_DENSITY_ENABLED:
+        beat_schedule[CellDensity.REBUILD_TASK] = {
+            "task": CellDensity.REBUILD_TASK,
+            "schedule": settings.nearby.NEARBY_DENSITY_REBUILD,
+        }
+    celery.conf.beat_schedule = beat_schedule
+
     celery.autodiscover_tasks(["src.core.apps.tasks"], force=True)
 
     return celery
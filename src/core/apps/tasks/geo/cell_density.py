@@ -0,0 +1,54 @@
+"""Rebuild the per-cell user counters from `locations`."""
+
+import asyncio
+
+from celery import shared_task
+from celery.utils import log
+from redis import asyncio as aioredis
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.controllers.depends.utils.density import write_cell_counts
+from src.core.models.cruds.location import Locations
+from src.core.settings.constants import CellDensity, TypeEncoding
+from src.core.settings.env import settings
+
+log.get_task_logger(__name__)
+
+
+async def rebuild_cell_density() -> int:
+    """Count users per cell in SQL and replace the Redis counters.
+
+    Fixes counters missed while Redis was down. Like the GEO mirror
+    resync, it opens its own engine and Redis client.
+
+    Returns:
+        int: Number of counted cells.
+    """
+    engine = create_async_engine(
+        settings.db.get_url_database, poolclass=NullPool
+    )
+    redis = aioredis.from_url(
+        settings.redis.redis_url_broker,
+        encoding=TypeEncoding.UTF8,
+        decode_responses=True,
+    )
+    try:
+        async with engine.connect() as connection:
+            result = await connection.execute(
+                Locations.cell_counts_query(CellDensity.RESOLUTION)
+            )
+            return await write_cell_counts(
+                redis, result.tuples(), batch=CellDensity.REBUILD_BATCH
+            )
+    finally:
+        await redis.aclose()
+        await engine.dispose()
+
+
+@shared_task(name=CellDensity.REBUILD_TASK, max_retries=3)
+def rebuild_cell_density_background() -> int:
+    """Rebuild the per-cell user counters."""
+    cells = asyncio.run(rebuild_cell_density())
+    log.logger.info("Cell density rebuilt: %s cells", cells)
+    return cells
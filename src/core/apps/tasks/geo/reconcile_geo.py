@@ -0,0 +1,60 @@
+"""Resync the Redis GEO mirror from `locations`."""
+
+import asyncio
+
+from celery import shared_task
+from celery.utils import log
+from redis import asyncio as aioredis
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.core.controllers.depends.utils.redis_geo import sync_locations
+from src.core.models.cruds.location import Locations
+from src.core.settings.constants import RedisGeo, TypeEncoding
+from src.core.settings.env import settings
+
+log.get_task_logger(__name__)
+
+
+async def reconcile_geo_locations() -> int:
+    """GEOADD every stored location, batch by batch.
+
+    Adds users the mirror missed (Redis was down on registration) and
+    moves members to their stored point. Locations are never deleted,
+    so members are never removed. The task runs in its own event loop,
+    so it opens its own engine and Redis client instead of the shared
+    ones.
+
+    Returns:
+        int: Number of synced locations.
+    """
+    engine = create_async_engine(
+        settings.db.get_url_database, poolclass=NullPool
+    )
+    redis = aioredis.from_url(
+        settings.redis.redis_url_broker,
+        encoding=TypeEncoding.UTF8,
+        decode_responses=True,
+    )
+    synced = 0
+    try:
+        async with engine.connect() as connection:
+            result = await connection.stream(
+                Locations.points_query().execution_options(
+                    yield_per=RedisGeo.RECONCILE_BATCH
+                )
+            )
+            async for partition in result.partitions():
+                synced += await sync_locations(redis, partition)
+    finally:
+        await redis.aclose()
+        await engine.dispose()
+    return synced
+
+
+@shared_task(name=RedisGeo.RECONCILE_TASK, max_retries=3)
+def reconcile_geo_background() -> int:
+    """Resync the Redis GEO mirror from `locations`."""
+    synced = asyncio.run(reconcile_geo_locations())
+    log.logger.info("Redis GEO mirror resynced: %s locations", synced)
+    return synced
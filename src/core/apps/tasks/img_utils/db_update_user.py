@@ -5,6 +5,11 @@ from src.core.controllers.depends.utils.connect_db import (
     get_session,
     init_engine,
 )
+from src.core.controllers.depends.utils.nearby_plan import (
+    get_user_cells,
+    invalidate_location,
+)
+from src.core.settings.constants import LocationH3
 
 
 async def add_path_to_user(
@@ -22,3 +27,7 @@ async def add_path_to_user(
             )
 
         await session.close()
+
+    # The avatar is part of the cached api/list pages around the user.
+    if cells := await get_user_cells(user_id):
+        await invalidate_location(cell=cells[LocationH3.H3_RESOLUTION_MAX])
@@ -3,6 +3,12 @@
 import asyncio
 
 from src.core.apps.tasks.email.celery_postman import send_mail_background
+from src.core.apps.tasks.geo.cell_density import (  # noqa
+    rebuild_cell_density_background,
+)
+from src.core.apps.tasks.geo.reconcile_geo import (  # noqa
+    reconcile_geo_background,
+)
 from src.core.apps.tasks.img_utils.db_update_user import add_path_to_user
 from src.core.apps.tasks.img_utils.del_file import del_temp_file
 from src.core.apps.tasks.img_utils.download import download_file
@@ -6,7 +6,9 @@ from fastapi import Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from src.core.controllers.depends.utils.connect_db import get_crud, get_session
-from src.core.controllers.depends.utils.hash_password import validate_pwd
+from src.core.controllers.depends.utils.hash_password import (
+    validate_pwd_async,
+)
 from src.core.controllers.depends.utils.jsonresponse_new_jwt import (
     response_auth_tokens,
 )
@@ -39,7 +41,7 @@ async def login_user_form(
 
     user_hash_pwd, user_id = user_data
 
-    if user_hash_pwd and validate_pwd(
+    if user_hash_pwd and await validate_pwd_async(
         password=form_data.password,
         hash_password=user_hash_pwd.encode(),
     ):
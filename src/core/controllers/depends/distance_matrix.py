@@ -0,0 +1,69 @@
+"""This is the batch distances module."""
+
+import json
+from collections.abc import Iterator
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from src.core.controllers.depends.utils.geo import (
+    distance_matrix,
+    pair_distances,
+)
+from src.core.settings.constants import DistanceMatrix, MimeTypes
+from src.core.validators.distance import DistanceMatrixRequest
+
+
+def matrix_chunks(body: DistanceMatrixRequest) -> Iterator[bytes]:
+    """Yield the JSON response body in parts.
+
+    Origins (or pairs) are computed in blocks of about
+    `DistanceMatrix.STREAM_CHUNK_CELLS` distances, so a large matrix is
+    never held in memory as a whole.
+    """
+    exact = body.precision == DistanceMatrix.PRECISION_GEODESIC
+    yield f'{{"{DistanceMatrix.FIELD_KILOMETERS}":['.encode()
+
+    if body.pairs is not None:
+        step = DistanceMatrix.STREAM_CHUNK_CELLS
+        for start in range(0, len(body.pairs), step):
+            stop = start + step
+            block = body.pairs[start:stop]
+            distances = pair_distances(
+                [a for a, _ in block], [b for _, b in block], exact=exact
+            )
+            prefix = "," if start else ""
+            yield (prefix + json.dumps(distances.tolist())[1:-1]).encode()
+    elif body.origins and body.destinations:
+        step = max(
+            1, DistanceMatrix.STREAM_CHUNK_CELLS // len(body.destinations)
+        )
+        for start in range(0, len(body.origins), step):
+            stop = start + step
+            rows = distance_matrix(
+                body.origins[start:stop],
+                body.destinations,
+                exact=exact,
+            )
+            prefix = "," if start else ""
+            yield (prefix + json.dumps(rows.tolist())[1:-1]).encode()
+
+    yield b"]}"
+
+
+def compute_distance_matrix(body: DistanceMatrixRequest) -> Response:
+    """Return distances between many locations.
+
+    Results above `DistanceMatrix.STREAM_THRESHOLD` distances are streamed;
+    the generator is synchronous, so Starlette runs it in the threadpool
+    and the event loop is not blocked by the computation.
+    """
+    if body.size > DistanceMatrix.STREAM_THRESHOLD:
+        return StreamingResponse(
+            matrix_chunks(body), media_type=MimeTypes.APPLICATION_JSON
+        )
+
+    return Response(
+        content=b"".join(matrix_chunks(body)),
+        media_type=MimeTypes.APPLICATION_JSON,
+    )
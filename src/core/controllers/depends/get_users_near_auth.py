@@ -3,37 +3,66 @@
 
 from typing import Annotated
 
-from fastapi import Depends, Form, Header, Query, Request, Response
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Form, Header, Query, Request, Response, status
+from redis.exceptions import RedisError
 
 from src.core.controllers.depends.token import token_is_alive
-from src.core.controllers.depends.utils.connect_db import get_crud, get_session
-from src.core.controllers.depends.utils.geo import (
-    get_near_indexes,
-    select_h3_resolution_params,
+from src.core.controllers.depends.utils.cell_index_sync import index_area
+from src.core.controllers.depends.utils.connect_db import (
+    get_crud,
+    session_scope,
+)
+from src.core.controllers.depends.utils.geo import get_near_ranges
+from src.core.controllers.depends.utils.nearby_plan import (
+    list_cache_key,
+    list_cache_tags,
+    plan_nearby,
+    trim_nearby,
+)
+from src.core.controllers.depends.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    get_sort_mode,
+    page_keyset,
 )
 from src.core.controllers.depends.utils.redis_chash import cache_list_location
+from src.core.controllers.depends.utils.redis_geo import (
+    TooManyCandidates,
+    fallback_engine_name,
+    record_fallback,
+    search_nearby,
+)
 from src.core.controllers.depends.utils.response_errors import (
     raise_400_bad_req,
 )
 from src.core.controllers.depends.utils.serialize_and_deserilize import (
     deserialize_data_to_user_obj,
 )
-from src.core.models.crud import Crud
-from src.core.settings.constants import JWT, DescriptionForms, LiterKeys
+from src.core.models.cruds.location import get_nearby_engine
+from src.core.settings.constants import (
+    JWT,
+    DescriptionForms,
+    LiterKeys,
+    LocationH3,
+    NearbyCache,
+    NearbyEngine,
+    Pagination,
+)
 from src.core.settings.env import settings
-from src.core.validators.dto import UsersDataGeo
+from src.core.validators.dto import NearbyArea, UsersDataGeo
 from src.core.validators.user import UsersCollection
 
 
 @cache_list_location(
     expire=settings.redis.REDIS_EXP_LOCATION,
     prefix_key=LiterKeys.LOCATION_PREF,
+    status_code=status.HTTP_201_CREATED,
+    key_builder=list_cache_key,
+    tags_builder=list_cache_tags,
+    stale=settings.redis.REDIS_STALE_LOCATION,
 )
 async def location_near_auth_user(
     token: Annotated[dict, Depends(token_is_alive)],
-    crud: Annotated["Crud", Depends(get_crud)],
-    session: Annotated["AsyncSession", Depends(get_session)],
     request: Request,
     response: Response,
     radius: Annotated[
@@ -44,6 +73,25 @@ async def location_near_auth_user(
         bool,
         Query(description=DescriptionForms.EXACT),
     ] = False,
+    limit: Annotated[
+        int,
+        Query(
+            description=DescriptionForms.LIMIT,
+            ge=1,
+            le=Pagination.MAX_LIMIT,
+        ),
+    ] = Pagination.DEFAULT_LIMIT,
+    cursor: Annotated[
+        str | None,
+        Query(description=DescriptionForms.CURSOR),
+    ] = None,
+    engine: Annotated[
+        str | None,
+        Query(
+            description=DescriptionForms.ENGINE,
+            pattern=NearbyEngine.PATTERN,
+        ),
+    ] = None,
     sex: Annotated[
         str | None,
         Form(
@@ -75,45 +123,82 @@ async def location_near_auth_user(
     sort_by_created: bool | None = None,
     if_none_match: str | None = Header(default=None),
 ) -> UsersCollection:
-    """Get location by auth user."""
-    if radius:
+    """Get location by auth user.
 
-        users_geo_data = UsersDataGeo()
+    The DB session is opened inside the body instead of being injected:
+    `cache_list_location` answers HITs and 304s before the body runs, so
+    only a cache MISS pays for the engine, the session and the CRUD helper.
 
-        radius = 150_000 if exact and radius > 150_000 else radius
-        # TODO затычка  что  база не упала,
-        #  для 300 кm создается большой запрос с таким разрешением.
+    Results are paged by keyset: at most `limit` users, `next_cursor` points
+    to the next page. Each page has its own cache entry.
 
-        h3_params = select_h3_resolution_params(radius, exact)
-        users_geo_data.field_name = h3_params.field_name
-        users_geo_data.exact = exact
+    `engine` picks the nearby-search backend, by default the one set in
+    `settings.nearby` for the mode (`NEARBY_ENGINE`, `NEARBY_EXACT_ENGINE`).
+    `redis_geo` falls back to the Postgres engine when Redis cannot answer.
+    With `NEARBY_DENSITY_ENABLED` the H3 radius of dense areas is trimmed,
+    see `density.plan_radius`, and reported as `trimmed_radius`.
 
-        auth_location = await crud.locations.get_h3_index_by_resolution(
-            auth_id=token.get(JWT.PAYLOAD_SUB_KEY),
-            field_h3_index=h3_params.field_name,
-            session=session,
+    The search is planned by `nearby_plan.list_cache_key` before the cache
+    lookup: non-exact H3 pages are cached per cell and shared by its users.
+    Entries are dropped when a location inside their area is saved.
+    """
+    if radius:
+
+        user_id = token.get(JWT.PAYLOAD_SUB_KEY)
+        plan = getattr(
+            request.state, NearbyCache.PLAN_STATE, None
+        ) or await plan_nearby(
+            user_id=user_id, radius=radius, exact=exact, engine=engine
         )
 
-        if auth_location:
+        if plan:
+            plan = await trim_nearby(
+                plan=plan, user_id=user_id, exact=bool(exact)
+            )
 
-            users_geo_data.auth_location = auth_location
+            nearby_engine = get_nearby_engine(plan.engine)
 
-            h3_indexes = get_near_indexes(
-                user_location=auth_location,
-                radius=radius,
-                h3_params=h3_params,
-            )
+            geo_candidates: list[tuple[str, float]] = []
+            if nearby_engine.name == NearbyEngine.REDIS_GEO:
+                try:
+                    geo_candidates = await search_nearby(
+                        user_id=user_id, radius=plan.radius
+                    )
+                except (RedisError, TooManyCandidates) as e:
+                    record_fallback(e)
+                    nearby_engine = get_nearby_engine(fallback_engine_name())
 
-            users_geo_data.loc_data = await crud.locations.near_location(
-                user_id=token.get(JWT.PAYLOAD_SUB_KEY),
-                field_h3_index=h3_params.field_name,
-                h3_indexes=h3_indexes,
-                session=session,
+            sort_mode = get_sort_mode(sort_by_created, nearby_engine.sort_mode)
+            after = decode_cursor(cursor, sort_mode) if cursor else None
+
+            h3_params = plan.h3_params
+            users_geo_data = UsersDataGeo(
+                auth_location=plan.auth_location,
+                field_name=h3_params.field_name,
+                exact=exact,
+                distance_field=(
+                    LocationH3.FIELD_DISTANCE
+                    if nearby_engine.name == NearbyEngine.REDIS_GEO
+                    else None
+                ),
             )
 
-            extract_user_id = [
-                user_data.user_id for user_data in users_geo_data.loc_data
-            ]
+            area = NearbyArea(
+                user_id=user_id,
+                field_name=h3_params.field_name,
+                radius=plan.radius,
+                h3_ranges=(
+                    get_near_ranges(
+                        user_location=plan.auth_location,
+                        radius=plan.radius,
+                        h3_params=h3_params,
+                    )
+                    if nearby_engine.uses_h3_cover
+                    else ()
+                ),
+                user_ids=tuple(user_id for user_id, _ in geo_candidates),
+                distances=tuple(dist for _, dist in geo_candidates),
+            )
 
             filters = {}
             if sex:
@@ -123,17 +208,61 @@ async def location_near_auth_user(
             if last_name:
                 filters["last_name"] = last_name
 
-            users_geo_data.users_data = await crud.users.get_user_by_filers(
-                users_id=extract_user_id,
-                filters=filters,
-                sort_by_created=sort_by_created,
-                session=session,
-            )
+            exclude_h3_index = None if exact else plan.auth_location
+
+            indexed = None
+            if (
+                nearby_engine.uses_h3_cover
+                and not filters
+                and sort_by_created is None
+            ):
+                # Page picked in memory, SQL only reads its rows.
+                indexed = index_area(
+                    area=area,
+                    h3_params=h3_params,
+                    exclude_cell=exclude_h3_index,
+                    after=after,
+                    limit=limit,
+                )
+                if indexed is not None:
+                    area, _ = indexed
+                    nearby_engine = get_nearby_engine(NearbyEngine.CELL_INDEX)
+
+            crud = get_crud()
+
+            async with session_scope() as session:
+                rows = await crud.locations.near_users(
+                    area=area,
+                    filters=filters,
+                    sort_by_created=sort_by_created,
+                    exclude_h3_index=exclude_h3_index,
+                    limit=limit + 1,
+                    after=after,
+                    engine=nearby_engine,
+                    exact=exact,
+                    session=session,
+                )
+            users_geo_data.rows = rows[:limit]
 
             users_obj: UsersCollection = deserialize_data_to_user_obj(
                 users_data=users_geo_data
             )
 
+            # The index knows if it holds more, rows of the page may
+            # have been deleted since it was built.
+            next_key = None
+            if indexed is not None:
+                _, next_key = indexed
+            elif len(rows) > limit:
+                next_key = page_keyset(rows[limit - 1], sort_mode)
+            if next_key is not None:
+                users_obj.next_cursor = encode_cursor(
+                    sort_mode=sort_mode, key=next_key
+                )
+
+            if plan.trimmed:
+                users_obj.trimmed_radius = plan.radius
+
             return users_obj
 
     return raise_400_bad_req()
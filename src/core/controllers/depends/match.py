@@ -4,15 +4,13 @@
 from typing import TYPE_CHECKING, Annotated
 
 from fastapi import Depends, Path, Request, Response
-from jwt.exceptions import InvalidTokenError
 from sqlalchemy.exc import IntegrityError
 
 from src.core.apps.tasks.tasks import background_task_send_email
 from src.core.controllers.depends.token import token_is_alive
 from src.core.controllers.depends.utils.connect_db import get_crud, get_session
-from src.core.controllers.depends.utils.redis_chash import (
-    cache_count_limit_http_request_for_positive_response,
-)
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.rate_limit import RateLimiter
 from src.core.controllers.depends.utils.response_errors import (
     raise_http_401,
     valid_id_or_error_422,
@@ -25,12 +23,17 @@ if TYPE_CHECKING:
 
     from src.core.models.crud import Crud
 
+match_limiter = RateLimiter(
+    name="match_post",
+    limit=settings.redis.REDIS_LIMIT_REQUESTS,
+    window=settings.redis.exp_in_days,
+)
 
-@cache_count_limit_http_request_for_positive_response(
-    expire_in_day=settings.redis.exp_in_days,
-    prefix_key="match_post",
-    match_limits=settings.redis.REDIS_LIMIT_REQUESTS,
+target_missing = FailureLog(
+    name="match_target", message="Match target does not exist"
 )
+
+
 async def match_post(
     request: Request,
     response: Response,
@@ -41,16 +44,23 @@ async def match_post(
         ..., description="The ID of the target user to match", alias="id"
     ),
 ) -> bool:
-    """Match post dependency."""
+    """Match post dependency.
+
+    `match_limiter` takes a token only after the id, the token type and
+    the target are checked: only positive responses count toward the
+    limit.
+    """
     valid_id_or_error_422(id_data=target_user_id)
 
-    try:
+    if token.get(JWT.TOKEN_TYPE_FIELD) != JWT.TOKEN_TYPE_ACCESS:
+        raise_http_401()
 
-        if token.get(JWT.TOKEN_TYPE_FIELD) != JWT.TOKEN_TYPE_ACCESS:
-            raise InvalidTokenError()
+    if token.get(JWT.PAYLOAD_SUB_KEY) == target_user_id:
+        return False
+
+    await match_limiter(request)
 
-        if token.get(JWT.PAYLOAD_SUB_KEY) == target_user_id:
-            return False
+    try:
 
         async with session.begin():
             await crud.likes.insert_new_match(
@@ -89,12 +99,6 @@ async def match_post(
 
             return True
 
-    except InvalidTokenError as e:
-        print(e)
-        raise_http_401()
-        return False
-
     except IntegrityError as e:
-        print(e, response, request)
-        # TODO logger  target_user_id is not exist
+        target_missing(e)
         return True
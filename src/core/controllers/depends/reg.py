@@ -8,7 +8,11 @@ from fastapi import BackgroundTasks, Depends, File, Form, UploadFile
 
 from src.core.apps.tasks.tasks import watermark_proc
 from src.core.controllers.depends.utils.connect_db import get_crud, get_session
-from src.core.controllers.depends.utils.hash_password import hash_pwd
+from src.core.controllers.depends.utils.hash_password import hash_pwd_async
+from src.core.controllers.depends.utils.location_events import (
+    location_saved,
+    propagation_failed,
+)
 from src.core.controllers.depends.utils.response_errors import (
     raise_400_bad_req,
     valid_password_or_error_422,
@@ -102,7 +106,7 @@ async def new_user(
     """
     valid_password_or_error_422(pwd=password, pwd2=password_control)
 
-    password_hash: bytes = hash_pwd(password)
+    password_hash: bytes = await hash_pwd_async(password)
 
     new_uuid = uuid.uuid4().hex
 
@@ -140,7 +144,7 @@ async def new_user(
                 auth_user=new_auth,
             )
 
-            await crud.locations.insert_location(
+            location_row = await crud.locations.insert_location(
                 session=session, location=new_location
             )
 
@@ -158,8 +162,6 @@ async def new_user(
                 else:
                     ValueError("Incorrect format file")
 
-        return True
-
     except Exception as e:
         print(f"Registration failed: {e}")
 
@@ -167,3 +169,16 @@ async def new_user(
         await session.close()
 
         return None
+
+    # The user is committed: derived copies must not fail the request.
+    try:
+        await location_saved(
+            user_id=new_uuid,
+            location=location_row,
+            latitude=latitude,
+            longitude=longitude,
+        )
+    except Exception as e:
+        propagation_failed(e)
+
+    return True
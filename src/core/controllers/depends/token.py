@@ -2,7 +2,7 @@
 
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import APIKeyCookie, OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 
@@ -11,7 +11,7 @@ from src.core.controllers.depends.utils.jsonresponse_new_jwt import (
 )
 from src.core.controllers.depends.utils.jwt_token import decode_jwt
 from src.core.controllers.depends.utils.response_errors import raise_http_401
-from src.core.settings.constants import JWT, AuthRoutes
+from src.core.settings.constants import JWT, AuthRoutes, LiterKeys
 from src.core.settings.env import settings
 
 oauth_bearer = OAuth2PasswordBearer(
@@ -23,9 +23,13 @@ cookie_refresh = APIKeyCookie(name=JWT.TOKEN_TYPE_REFRESH)
 
 async def token_is_alive(
     token: Annotated[str, Depends(oauth_bearer)],
+    request: Request,
 ) -> dict:
     """Validate token.
 
+    The decoded payload is kept in `request.state` so that later steps of
+    the same request (e.g. cache keys) do not decode the token again.
+
     Args:
         - token (str): HTTPBearer API key for authentication.
     Raises:
@@ -34,10 +38,13 @@ async def token_is_alive(
             - headers={"WWW-Authenticate": "Bearer"}
     """
     try:
-        return decode_jwt(jwt_token=token)
+        payload = decode_jwt(jwt_token=token)
     except InvalidTokenError:
         raise raise_http_401()
 
+    setattr(request.state, LiterKeys.TOKEN_PAYLOAD_STATE, payload.copy())
+    return payload
+
 
 async def refresh_token_is_alive(
     old_refresh_token: Annotated[str, Depends(cookie_refresh)],
@@ -0,0 +1,501 @@
+"""Stores behind the response cache and the rate limiter.
+
+`CacheBackend` is everything `redis_chash` and `rate_limit` need from a
+store: entry hashes with a TTL, tag sets, recompute leases and rate
+windows. `RedisCacheBackend` is the production one, shared by all
+workers. `MemoryCacheBackend` keeps the same data in process, for one
+worker only: benchmarks, tests and local runs without Redis.
+
+`CACHE_BACKEND` selects the backend of `redis_chash.get_cache_backend`;
+the cache decorator and `RateLimiter` also accept one explicitly. Each
+backend carries the L1 `local` cache in front of its entries: the
+backends of `get_cache_backend` share the worker's `local_cache`, a
+`MemoryCacheBackend` built directly has its own.
+"""
+
+import hashlib
+import math
+import secrets
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable
+
+from redis.asyncio.client import Pipeline, Redis
+from redis.exceptions import NoScriptError
+
+from src.core.controllers.depends.utils.local_cache import (
+    LocalCache,
+    local_cache,
+    publish_invalidation,
+)
+from src.core.settings.constants import (
+    CacheBackendConf,
+    CacheStampede,
+    NearbyCache,
+    RateLimit,
+    TypeEncoding,
+)
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+# KEYS[1]: bucket, ARGV: limit, window ms, wanted tokens (< 0 refunds).
+# Returns granted tokens, remaining, ms to reset, ms to retry if denied.
+TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local want = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local rate = limit / window
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or limit
+local ts = tonumber(state[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+
+local granted = 0
+if want < 0 then
+    tokens = math.min(limit, tokens - want)
+elseif tokens >= 1 then
+    granted = math.min(want, math.floor(tokens))
+    tokens = tokens - granted
+end
+
+local reset = math.ceil((limit - tokens) / rate)
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("PEXPIRE", KEYS[1], reset + 1)
+
+local retry = 0
+if granted == 0 and want > 0 then
+    retry = math.ceil((1 - tokens) / rate)
+end
+return {granted, math.floor(tokens), reset, retry}
+"""
+
+# Same arguments and result as TOKEN_BUCKET_SCRIPT.
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local want = tonumber(ARGV[3])
+local clock = redis.call("TIME")
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local index = math.floor(now / window)
+local elapsed = now - index * window
+
+local state = redis.call("HMGET", KEYS[1], "window", "current", "previous")
+local stored = tonumber(state[1]) or index
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if stored ~= index then
+    if stored == index - 1 then
+        previous = current
+    else
+        previous = 0
+    end
+    current = 0
+end
+
+local weight = (window - elapsed) / window
+local granted = 0
+if want < 0 then
+    current = math.max(0, current + want)
+else
+    local free = math.floor(limit - previous * weight - current)
+    granted = math.max(0, math.min(want, free))
+    current = current + granted
+end
+
+redis.call(
+    "HSET", KEYS[1], "window", index, "current", current,
+    "previous", previous
+)
+redis.call("PEXPIRE", KEYS[1], 2 * window - elapsed)
+
+local used = previous * weight + current
+local reset = window - elapsed
+local retry = 0
+if granted == 0 and want > 0 then
+    if current + 1 > limit then
+        retry = reset + math.ceil(window * (1 - (limit - 1) / current))
+    else
+        retry = math.min(
+            reset, math.ceil((used + 1 - limit) * window / previous)
+        )
+    end
+end
+return {granted, math.max(0, math.floor(limit - used)), reset, retry}
+"""
+
+RATE_SCRIPTS = {
+    RateLimit.TOKEN_BUCKET: TOKEN_BUCKET_SCRIPT,
+    RateLimit.SLIDING_WINDOW: SLIDING_WINDOW_SCRIPT,
+}
+
+
+def gen_tag_key(tag: Any) -> str:
+    """Return the key of the set holding the cache keys tagged with `tag`."""
+    return f"{NearbyCache.TAG_PREF}:{tag}"
+
+
+async def run_script(redis: Redis, script: str, keys: int, *args: Any) -> Any:
+    """Run a Lua script by its SHA1, loading it on the first miss."""
+    sha = hashlib.sha1(script.encode()).hexdigest()
+    try:
+        return await redis.evalsha(sha, keys, *args)
+    except NoScriptError:
+        return await redis.eval(script, keys, *args)
+
+
+class CachePipeline(ABC):
+    """Writes of a `CacheBackend`, sent together on exit."""
+
+    @abstractmethod
+    def set(self, key: str, fields: dict[str, Any], ex: int) -> None:
+        """Store an entry hash for `ex` seconds."""
+
+    @abstractmethod
+    def tag(self, key: str, tags: Iterable[Any], ex: int) -> None:
+        """Add `key` to the sets of `tags`, kept at least `ex` seconds."""
+
+
+class CacheBackend(ABC):
+    """Store of cache entries, tags, leases and rate windows."""
+
+    name: str
+    local: LocalCache
+
+    @abstractmethod
+    async def get_with_ttl(
+        self, key: str
+    ) -> tuple[dict[str, Any], int] | None:
+        """Return (entry fields, seconds left), the body as bytes."""
+
+    @abstractmethod
+    def pipeline(self) -> Any:
+        """Return an async context manager yielding a `CachePipeline`."""
+
+    @abstractmethod
+    async def delete_tags(self, tags: Iterable[Any]) -> set[str]:
+        """Delete the entries tagged with one of `tags`, and the tags.
+
+        Returns:
+            set[str]: Keys of the tagged entries.
+        """
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, lease_ms: int) -> str | None:
+        """Take the lease `key` for `lease_ms`, None if it is taken."""
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        """Release the lease `key` if `token` still holds it."""
+
+    @abstractmethod
+    async def incr_window(
+        self, key: str, mode: str, limit: int, window_ms: int, want: int
+    ) -> tuple[int, int, int, int]:
+        """Take up to `want` of `limit` tokens per window (< 0 refunds).
+
+        Returns:
+            tuple[int, int, int, int]: Granted tokens, remaining tokens,
+            ms until the quota resets, ms until a retry may pass.
+        """
+
+    # Last: the name shadows the builtin in the annotations of the class.
+    async def set(self, key: str, fields: dict[str, Any], ex: int) -> None:
+        """Store an entry hash for `ex` seconds."""
+        async with self.pipeline() as pipe:
+            pipe.set(key, fields, ex)
+
+
+class RedisCachePipeline(CachePipeline):
+    """Queue writes on a Redis MULTI pipeline."""
+
+    def __init__(self, pipe: Pipeline) -> None:
+        """Wrap a pipeline of the bytes client."""
+        self.pipe = pipe
+
+    def set(self, key: str, fields: dict[str, Any], ex: int) -> None:
+        """Queue HSET and EXPIRE of an entry."""
+        self.pipe.hset(key, mapping=fields).expire(key, ex)
+
+    def tag(self, key: str, tags: Iterable[Any], ex: int) -> None:
+        """Queue SADD and EXPIRE of every tag set.
+
+        A tag set lives as long as its newest entry, so sets of idle tags
+        expire with the entries they point to.
+        """
+        for tag in tags:
+            tag_key = gen_tag_key(tag)
+            self.pipe.sadd(tag_key, key).expire(tag_key, ex)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend shared by all workers through Redis.
+
+    Entries go through `redis_bytes` (compressed bodies), everything else
+    through the decoding client `redis`.
+    """
+
+    name = CacheBackendConf.REDIS
+
+    def __init__(
+        self, redis: Redis, redis_bytes: Redis, local: LocalCache = local_cache
+    ) -> None:
+        """Init on ready clients.
+
+        Other workers drop deleted keys from their `local_cache` only,
+        the one `local_cache.listen_invalidations` updates.
+        """
+        self.redis = redis
+        self.redis_bytes = redis_bytes
+        self.local = local
+
+    async def get_with_ttl(
+        self, key: str
+    ) -> tuple[dict[str, Any], int] | None:
+        """Read the entry hash and its TTL in one round trip."""
+        async with self.redis_bytes.pipeline(transaction=False) as pipe:
+            raw, ttl = await pipe.hgetall(key).ttl(key).execute()
+        if not raw:
+            return None
+        return decode_entry(raw), ttl
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[RedisCachePipeline]:
+        """Yield a MULTI pipeline, executed on exit."""
+        async with self.redis_bytes.pipeline(transaction=True) as pipe:
+            yield RedisCachePipeline(pipe)
+            await pipe.execute()
+
+    async def delete_tags(self, tags: Iterable[Any]) -> set[str]:
+        """Read the tag sets, then delete them and their entries.
+
+        Deleted keys are broadcast to the local cache of every worker.
+        """
+        tag_keys = [gen_tag_key(tag) for tag in tags]
+        if not tag_keys:
+            return set()
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members = await pipe.execute()
+
+        keys = set().union(*members)
+        await self.redis.delete(*keys, *tag_keys)
+        await publish_invalidation(self.redis, keys, self.local)
+        return keys
+
+    async def acquire_lock(self, key: str, lease_ms: int) -> str | None:
+        """SET NX PX a random token."""
+        token = secrets.token_hex(8)
+        acquired = await self.redis.set(key, token, nx=True, px=lease_ms)
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """Compare-and-delete the lease in Lua."""
+        await run_script(self.redis, RELEASE_LOCK_SCRIPT, 1, key, token)
+
+    async def incr_window(
+        self, key: str, mode: str, limit: int, window_ms: int, want: int
+    ) -> tuple[int, int, int, int]:
+        """Run the Lua script of `mode`: atomic across workers."""
+        result = await run_script(
+            self.redis, RATE_SCRIPTS[mode], 1, key, limit, window_ms, want
+        )
+        granted, remaining, reset_ms, retry_ms = (int(x) for x in result)
+        return granted, remaining, reset_ms, retry_ms
+
+
+class MemoryCachePipeline(CachePipeline):
+    """Apply writes to a `MemoryCacheBackend` at once."""
+
+    def __init__(self, backend: "MemoryCacheBackend") -> None:
+        """Bind to a backend."""
+        self.backend = backend
+
+    def set(self, key: str, fields: dict[str, Any], ex: int) -> None:
+        """Store an entry."""
+        self.backend.entries.set(key, fields, ex)
+
+    def tag(self, key: str, tags: Iterable[Any], ex: int) -> None:
+        """Add `key` to the tag sets, extending their expiry."""
+        for tag in tags:
+            tag_key = gen_tag_key(tag)
+            cached = self.backend.tags.get(tag_key)
+            keys = cached[0] if cached else set()
+            keys.add(key)
+            self.backend.tags.set(
+                tag_key, keys, max(ex, cached[1] if cached else 0)
+            )
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend of one process, bounded LRU stores with expiry.
+
+    Nothing is shared between workers: use it for benchmarks, tests and
+    single-worker runs only.
+    """
+
+    name = CacheBackendConf.MEMORY
+
+    def __init__(
+        self,
+        max_size: int = CacheBackendConf.MEMORY_SIZE,
+        local: LocalCache | None = None,
+    ) -> None:
+        """Init empty stores of at most `max_size` keys each.
+
+        `local` is a new L1 if None, not the worker's `local_cache`.
+        """
+        self.local = LocalCache() if local is None else local
+        self.entries = LocalCache(max_size=max_size, max_ttl=math.inf)
+        self.tags = LocalCache(max_size=max_size, max_ttl=math.inf)
+        self.windows = LocalCache(max_size=max_size, max_ttl=math.inf)
+        self.locks: dict[str, tuple[str, float]] = {}
+
+    async def get_with_ttl(
+        self, key: str
+    ) -> tuple[dict[str, Any], int] | None:
+        """Return the entry if it has not expired."""
+        return self.entries.get(key)
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[MemoryCachePipeline]:
+        """Yield a pipeline applying writes at once."""
+        yield MemoryCachePipeline(self)
+
+    async def delete_tags(self, tags: Iterable[Any]) -> set[str]:
+        """Drop the tag sets and their entries."""
+        keys: set[str] = set()
+        tag_keys = [gen_tag_key(tag) for tag in tags]
+        for tag_key in tag_keys:
+            if cached := self.tags.get(tag_key):
+                keys |= cached[0]
+        self.entries.discard(keys)
+        self.tags.discard(tag_keys)
+        return keys
+
+    async def acquire_lock(self, key: str, lease_ms: int) -> str | None:
+        """Take the lease unless a live one exists."""
+        now = time.monotonic()
+        held = self.locks.get(key)
+        if held is not None and held[1] > now:
+            return None
+        token = secrets.token_hex(8)
+        self.locks[key] = (token, now + lease_ms / 1000)
+        return token
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """Drop the lease if `token` still holds it."""
+        held = self.locks.get(key)
+        if held is not None and held[0] == token:
+            del self.locks[key]
+
+    async def incr_window(
+        self, key: str, mode: str, limit: int, window_ms: int, want: int
+    ) -> tuple[int, int, int, int]:
+        """Run the algorithm of the Lua script on the local clock."""
+        now = time.time() * 1000
+        cached = self.windows.get(key)
+        state = cached[0] if cached else None
+        if mode == RateLimit.TOKEN_BUCKET:
+            result, state, ttl_ms = token_bucket(
+                state, now, limit, window_ms, want
+            )
+        else:
+            result, state, ttl_ms = sliding_window(
+                state, now, limit, window_ms, want
+            )
+        # Like PEXPIRE reset + 1: a full bucket must overwrite the state.
+        self.windows.set(key, state, math.ceil((ttl_ms + 1) / 1000))
+        return result
+
+
+def token_bucket(
+    state: tuple[float, float] | None,
+    now: float,
+    limit: int,
+    window: int,
+    want: int,
+) -> tuple[tuple[int, int, int, int], tuple[float, float], int]:
+    """Run TOKEN_BUCKET_SCRIPT in Python: (result, new state, TTL ms)."""
+    rate = limit / window
+    tokens, ts = state or (limit, now)
+    tokens = min(limit, tokens + max(0, now - ts) * rate)
+
+    granted = 0
+    if want < 0:
+        tokens = min(limit, tokens - want)
+    elif tokens >= 1:
+        granted = min(want, math.floor(tokens))
+        tokens -= granted
+
+    reset = math.ceil((limit - tokens) / rate)
+    retry = 0
+    if granted == 0 and want > 0:
+        retry = math.ceil((1 - tokens) / rate)
+    return (granted, math.floor(tokens), reset, retry), (tokens, now), reset
+
+
+def sliding_window(
+    state: tuple[int, int, int] | None,
+    now: float,
+    limit: int,
+    window: int,
+    want: int,
+) -> tuple[tuple[int, int, int, int], tuple[int, int, int], int]:
+    """Run SLIDING_WINDOW_SCRIPT in Python: (result, new state, TTL ms)."""
+    index = int(now // window)
+    elapsed = now - index * window
+    stored, current, previous = state or (index, 0, 0)
+    if stored != index:
+        previous = current if stored == index - 1 else 0
+        current = 0
+
+    weight = (window - elapsed) / window
+    granted = 0
+    if want < 0:
+        current = max(0, current + want)
+    else:
+        free = math.floor(limit - previous * weight - current)
+        granted = max(0, min(want, free))
+        current += granted
+
+    used = previous * weight + current
+    reset = math.ceil(window - elapsed)
+    retry = 0
+    if granted == 0 and want > 0:
+        if current + 1 > limit:
+            retry = reset + math.ceil(window * (1 - (limit - 1) / current))
+        else:
+            retry = min(
+                reset, math.ceil((used + 1 - limit) * window / previous)
+            )
+    return (
+        (granted, max(0, math.floor(limit - used)), reset, retry),
+        (index, current, previous),
+        math.ceil(2 * window - elapsed),
+    )
+
+
+def decode_entry(raw: dict[bytes, bytes]) -> dict[str, Any]:
+    """Decode the metadata of an entry hash, the body stays bytes."""
+    fields: dict[str, Any] = {}
+    for name, value in raw.items():
+        field = (
+            name.decode(TypeEncoding.UTF8) if isinstance(name, bytes) else name
+        )
+        fields[field] = (
+            value
+            if field == CacheStampede.FIELD_BODY
+            else value.decode(TypeEncoding.UTF8)
+        )
+    return fields
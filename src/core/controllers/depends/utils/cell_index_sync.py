@@ -0,0 +1,180 @@
+"""Build, share and refresh the H3 cell index in every worker.
+
+The first worker to take the file lock builds the index file, the others
+wait for it and map the same file. Each worker listens to the deltas of
+new locations and, every `CELL_INDEX_REFRESH` seconds, remaps the file
+when another worker rebuilt it (or rebuilds it when it is too old).
+"""
+
+import asyncio
+import fcntl
+import json
+import os
+import time
+import uuid
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from src.core.controllers.depends.utils.connect_db import session_scope
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.redis_chash import setup_redis
+from src.core.models.cell_index import (
+    CellIndex,
+    build_cell_index,
+    read_built_at,
+)
+from src.core.settings.constants import CellIndexConf
+from src.core.settings.env import settings
+from src.core.validators.dto import H3Parameters, NearbyArea
+
+cell_index = CellIndex(settings.cell_index.CELL_INDEX_PATH)
+
+publish_failed = FailureLog(
+    name="cell_index_delta", message="Cell index delta is not published"
+)
+
+
+async def ensure_built(blocking: bool = True) -> bool:
+    """Build the index file if it is missing or older than the max age.
+
+    Args:
+        blocking (bool): Wait for the worker holding the lock, otherwise
+            give up at once.
+
+    Returns:
+        bool: True if this worker rebuilt the file.
+    """
+    path = settings.cell_index.CELL_INDEX_PATH
+    lock = os.open(path + CellIndexConf.LOCK_SUFFIX, os.O_RDWR | os.O_CREAT)
+    try:
+        if blocking:
+            await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+        else:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+
+        built_at = read_built_at(path)
+        if (
+            built_at is not None
+            and time.time() - built_at < settings.cell_index.CELL_INDEX_MAX_AGE
+        ):
+            return False
+
+        async with session_scope() as session:
+            await build_cell_index(session, path)
+        return True
+    finally:
+        os.close(lock)
+
+
+async def listen_deltas(redis: Redis) -> None:
+    """Apply published locations to the overlay of this worker."""
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(CellIndexConf.CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            delta = json.loads(message["data"])
+            cell_index.apply_delta(
+                user_id=delta[CellIndexConf.DELTA_USER],
+                cell=int(delta[CellIndexConf.DELTA_CELL]),
+                published_at=float(delta[CellIndexConf.DELTA_TIME]),
+            )
+    finally:
+        await pubsub.aclose()
+
+
+async def refresh_loop() -> None:
+    """Rebuild the file when it is too old, remap it when it changed."""
+    while True:
+        await asyncio.sleep(settings.cell_index.CELL_INDEX_REFRESH)
+        try:
+            await ensure_built(blocking=False)
+            built_at = read_built_at(settings.cell_index.CELL_INDEX_PATH)
+            if built_at is not None and built_at > cell_index.built_at:
+                cell_index.load()
+        except Exception as e:
+            print(f"Cell index refresh failed: {e}")
+
+
+async def start_cell_index(redis: Redis) -> list[asyncio.Task]:
+    """Build or map the index, start the delta listener and refresher.
+
+    Returns:
+        list[asyncio.Task]: Background tasks, see `stop_cell_index`.
+    """
+    if not settings.cell_index.CELL_INDEX_ENABLED:
+        return []
+
+    tasks = [asyncio.create_task(listen_deltas(redis))]
+    await ensure_built()
+    cell_index.load()
+    tasks.append(asyncio.create_task(refresh_loop()))
+    return tasks
+
+
+async def stop_cell_index(tasks: list[asyncio.Task]) -> None:
+    """Cancel background tasks of the index."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def publish_location(user_id: str, cell: int) -> None:
+    """Publish a new location to the index of every worker.
+
+    Failures are only logged: the location is already committed and the
+    next rebuild picks it up.
+    """
+    if not settings.cell_index.CELL_INDEX_ENABLED:
+        return
+
+    redis = await setup_redis()
+    try:
+        await redis.publish(
+            CellIndexConf.CHANNEL,
+            json.dumps(
+                {
+                    CellIndexConf.DELTA_USER: str(uuid.UUID(str(user_id))),
+                    CellIndexConf.DELTA_CELL: cell,
+                    CellIndexConf.DELTA_TIME: time.time(),
+                }
+            ),
+        )
+    except RedisError as e:
+        publish_failed(e)
+
+
+def index_area(
+    area: NearbyArea,
+    h3_params: H3Parameters,
+    exclude_cell: int | None,
+    after: tuple | None,
+    limit: int,
+) -> tuple[NearbyArea, tuple[int, uuid.UUID] | None] | None:
+    """Pick the page of users from the index.
+
+    Returns:
+        tuple | None: The area with `user_ids` of the page, for
+        `NearbyEngine.CELL_INDEX`, and the keyset of its last user if
+        the index holds more, or None if the index is not loaded.
+    """
+    if not settings.cell_index.CELL_INDEX_ENABLED or not cell_index.ready:
+        return None
+
+    page = cell_index.lookup(
+        h3_ranges=area.h3_ranges,
+        resolution=h3_params.resolution,
+        exclude_user=area.user_id,
+        exclude_cell=exclude_cell,
+        after=after,
+        limit=limit + 1,
+    )
+    picked = area.model_copy(
+        update={"user_ids": tuple(str(user_id) for _, user_id in page[:limit])}
+    )
+    return picked, page[limit - 1] if len(page) > limit else None
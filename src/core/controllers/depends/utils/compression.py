@@ -0,0 +1,90 @@
+"""Compressed bodies of cached responses.
+
+Cached api/list bodies are compressed once, when the entry is written,
+and stored compressed in Redis and in the local cache. A client that
+accepts the encoding gets the stored bytes as they are, with
+`Content-Encoding`; the others get them decompressed.
+
+gzip is always available; zstd needs the optional `zstandard` package
+and falls back to gzip without it.
+"""
+
+import gzip
+
+from fastapi import Request
+
+from src.core.settings.constants import CacheCompression, Headers
+from src.core.settings.env import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def cache_encoding() -> str:
+    """Return the configured encoding of cached bodies."""
+    encoding = settings.redis.REDIS_CACHE_ENCODING
+    if encoding == CacheCompression.ZSTD and zstandard is None:
+        return CacheCompression.GZIP
+    return encoding
+
+
+def compress(body: bytes, encoding: str) -> tuple[bytes, str]:
+    """Compress `body`, small bodies are kept as they are.
+
+    Returns:
+        tuple[bytes, str]: Stored bytes and their encoding.
+    """
+    if (
+        encoding == CacheCompression.IDENTITY
+        or len(body) < CacheCompression.MIN_LENGTH
+    ):
+        return body, CacheCompression.IDENTITY
+    if encoding == CacheCompression.ZSTD:
+        return (
+            zstandard.ZstdCompressor(
+                level=CacheCompression.ZSTD_LEVEL
+            ).compress(body),
+            encoding,
+        )
+    return (
+        gzip.compress(body, compresslevel=CacheCompression.GZIP_LEVEL),
+        CacheCompression.GZIP,
+    )
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """Return the original bytes of a compressed body."""
+    if encoding == CacheCompression.GZIP:
+        return gzip.decompress(body)
+    if encoding == CacheCompression.ZSTD:
+        return zstandard.ZstdDecompressor().decompress(body)
+    return body
+
+
+def accepts_encoding(request: Request, encoding: str) -> bool:
+    """Return True if `Accept-Encoding` of `request` allows `encoding`.
+
+    A named coding wins over `*`; `q=0` refuses it.
+    """
+    if encoding == CacheCompression.IDENTITY:
+        return True
+
+    weights: dict[str, float] = {}
+    for part in request.headers.get(Headers.ACCEPT_ENCODING, "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    return weights.get(encoding, weights.get("*", 0.0)) > 0
@@ -1,53 +1,99 @@
 """Setter Http headers."""
 
+import hashlib
+
 from fastapi import Request, Response
 
-from src.core.settings.constants import Headers
+from src.core.settings.constants import Headers, TypeEncoding
+from src.core.validators.dto import RateLimitState
 
 
 def set_response_headers(
     response: Response,
     exp: int | float,
-    cached_value: str,
+    cached_value: str | bytes,
     update: bool = False,
+    etag: str | None = None,
 ):
     """Set cache headers in the response.
 
     Args:
         response (Response): HTTP response object.
         exp (int): Expiration time in seconds.
-        cached_value (str): Cached data string for ETag.
+        cached_value (str | bytes): Cached data for ETag.
         update (bool): Whether cache is a hit or miss.
+        etag (str | None): ETag stored with the entry, computed from
+            `cached_value` if None.
     """
     response.headers[Headers.CACHE_CONTROL] = f"{Headers.CACHE_MAX_AGE}{exp}"
-    response.headers[Headers.ETAG] = gen_etag(cached_value)
+    response.headers[Headers.ETAG] = etag or gen_etag(cached_value)
+    response.headers[Headers.VARY] = Headers.VARY_ACCEPT_ENCODING
     response.headers[Headers.X_CACHE] = (
         Headers.X_CACHE_MISS if update is False else Headers.X_CACHE_HIT
     )
 
 
-def gen_etag(cached_value: str) -> str:
+def gen_etag(cached_value: str | bytes) -> str:
     """Generate ETag from cached value.
 
+    A BLAKE2b digest of the payload: the same in every worker and after
+    restarts, unlike the salted built-in `hash()`.
+
     Args:
-        cached_value (str): Cached data string.
+        cached_value (str | bytes): Cached data string.
 
     Returns:
         str: Weak ETag generated from cached value.
     """
-    return f"W/{hash(cached_value)}"
+    if isinstance(cached_value, str):
+        cached_value = cached_value.encode(TypeEncoding.UTF8)
+    digest = hashlib.blake2b(
+        cached_value, digest_size=Headers.ETAG_DIGEST_SIZE
+    ).hexdigest()
+    return f'W/"{digest}"'
 
 
-def check_etag(request: Request, response: Response) -> bool:
+def check_etag(request: Request, etag: str) -> bool:
     """Validate ETag to check cache validity.
 
+    `If-None-Match` may list several tags or be `*`; tags are compared
+    weakly, i.e. without the `W/` prefix.
+
     Args:
         request (Request): Incoming request with ETag.
-        response (Response): Response containing ETag.
+        etag (str): ETag of the cached entry.
 
     Returns:
         bool: True if ETag matches, False otherwise.
     """
-    return request.headers.get(Headers.IF_NONE_MATCH) == response.headers.get(
-        Headers.ETAG
+    if_none_match = request.headers.get(Headers.IF_NONE_MATCH)
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == Headers.ETAG_ANY:
+        return True
+
+    opaque = etag.removeprefix(Headers.ETAG_WEAK)
+    return any(
+        tag.strip().removeprefix(Headers.ETAG_WEAK) == opaque
+        for tag in if_none_match.split(",")
     )
+
+
+def rate_limit_headers(state: RateLimitState) -> dict[str, str]:
+    """Return `RateLimit-*` headers of a rate limiter decision.
+
+    Args:
+        state (RateLimitState): Decision of the rate limiter.
+
+    Returns:
+        dict[str, str]: Headers, with `Retry-After` if denied.
+    """
+    headers = {
+        Headers.RATE_LIMIT_LIMIT: str(state.limit),
+        Headers.RATE_LIMIT_REMAINING: str(state.remaining),
+        Headers.RATE_LIMIT_RESET: str(state.reset),
+        Headers.RATE_LIMIT_POLICY: f"{state.limit};w={state.window}",
+    }
+    if not state.allowed:
+        headers[Headers.RETRY_AFTER] = str(state.retry_after)
+    return headers
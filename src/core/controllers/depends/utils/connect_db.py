@@ -1,16 +1,16 @@
 """Get db session and CRUDs."""
 
-from typing import TYPE_CHECKING, Annotated
-
-from fastapi import Depends
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator
 
 from src.core.models.crud import create_crud_helper
-from src.core.models.engine import get_engine
+from src.core.models.engine import get_engine, get_session_factory
 from src.core.settings.env import settings
 
 if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
     from src.core.models.crud import Crud
-    from src.core.models.engine import HelperDB
 
 
 def get_crud() -> "Crud":
@@ -33,8 +33,21 @@ async def disconnect_db():
     await connect.async_engine.dispose()
 
 
-async def get_session(engine: Annotated["HelperDB", Depends(init_engine)]):
-    """Return db session."""
-    async with engine.get_scoped_session() as session:
+async def get_session() -> AsyncIterator["AsyncSession"]:
+    """Return db session.
+
+    The engine and its sessionmaker are built once in the app lifespan,
+    a request only opens a session from the ready factory.
+    """
+    async with get_session_factory()() as session:
+        yield session
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator["AsyncSession"]:
+    """Open db session on demand, outside the dependency graph.
+
+    Used by cached dependencies that only need the database on a cache miss.
+    """
+    async with get_session_factory()() as session:
         yield session
-        await session.close()
@@ -0,0 +1,138 @@
+"""Density-adaptive search radius of api/list.
+
+Users are counted per H3 cell of `CellDensity.RESOLUTION` in a Redis
+hash, incremented on registration and rebuilt from `locations` by a
+Celery task. Before a search the counters of the disk around the user
+give the expected number of candidates in the radius; when it exceeds
+`NEARBY_DENSITY_TARGET` the radius is trimmed to about that many users,
+which also picks a finer resolution and a smaller ring. Sparse areas
+keep the requested radius.
+"""
+
+import math
+from collections.abc import Iterable
+
+import h3
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.geo import ring_cells
+from src.core.controllers.depends.utils.redis_chash import setup_redis
+from src.core.settings.constants import CellDensity
+from src.core.settings.env import settings
+from src.core.validators.dto import DensityPlan
+
+CELL_AREA_M2 = h3.average_hexagon_area(CellDensity.RESOLUTION, unit="m^2")
+CELL_SPACING_M = math.sqrt(3) * h3.average_hexagon_edge_length(
+    CellDensity.RESOLUTION, unit="m"
+)
+
+count_failed = FailureLog(
+    name="density_count", message="Cell density is not counted"
+)
+plan_failed = FailureLog(
+    name="density_plan", message="Cell density is not available"
+)
+
+
+async def count_location(cell: int) -> None:
+    """Count a new user in its cell.
+
+    Failures are only logged: the next rebuild recounts the cell.
+    """
+    if not settings.nearby.NEARBY_DENSITY_ENABLED:
+        return
+
+    redis = await setup_redis()
+    try:
+        await redis.hincrby(CellDensity.KEY, str(cell), 1)
+    except RedisError as e:
+        count_failed(e)
+
+
+def estimate_users(
+    counts: Iterable[str | None], cells: int, radius: float
+) -> int:
+    """Return the expected number of users within `radius` meters.
+
+    The density of the sampled disk (`cells` cells, `counts` users in
+    them) is assumed uniform over the circle.
+    """
+    users = sum(int(count) for count in counts if count)
+    density = users / (cells * CELL_AREA_M2)
+    return round(density * math.pi * radius**2)
+
+
+def trim_radius(radius: float, estimate: int, target: int) -> float:
+    """Return the radius expected to hold about `target` users."""
+    if estimate <= target:
+        return radius
+    trimmed = radius * math.sqrt(target / estimate)
+    return min(radius, max(trimmed, CellDensity.MIN_RADIUS))
+
+
+async def plan_radius(
+    center_cell: int,
+    radius: float,
+    redis: Redis | None = None,
+) -> DensityPlan:
+    """Return the search radius around `center_cell`.
+
+    Args:
+        center_cell (int): Cell of the user at `CellDensity.RESOLUTION`.
+        radius (float): Requested radius in meters.
+        redis (Redis | None): Client, the shared one by default.
+
+    Returns:
+        DensityPlan: The requested radius when the planner is disabled,
+        the counters are unavailable or the area is sparse.
+    """
+    if not settings.nearby.NEARBY_DENSITY_ENABLED:
+        return DensityPlan(radius=radius, estimate=0)
+
+    cells = ring_cells(
+        center_cell=center_cell,
+        resolution=CellDensity.RESOLUTION,
+        ring_size=min(
+            math.ceil(radius / CELL_SPACING_M), CellDensity.MAX_RING
+        ),
+    )
+    try:
+        redis = redis or await setup_redis()
+        counts = await redis.hmget(CellDensity.KEY, [str(c) for c in cells])
+    except RedisError as e:
+        plan_failed(e)
+        return DensityPlan(radius=radius, estimate=0)
+
+    estimate = estimate_users(counts, cells=len(cells), radius=radius)
+    planned = trim_radius(
+        radius, estimate, settings.nearby.NEARBY_DENSITY_TARGET
+    )
+    return DensityPlan(
+        radius=planned, estimate=estimate, trimmed=planned < radius
+    )
+
+
+async def write_cell_counts(
+    redis: Redis, counts: Iterable[tuple[int, int]], batch: int
+) -> int:
+    """Replace all counters with `counts` in one transaction.
+
+    Returns:
+        int: Number of counted cells.
+    """
+    cells = 0
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(CellDensity.KEY)
+        mapping: dict[str, int] = {}
+        for cell, users in counts:
+            mapping[str(cell)] = users
+            cells += 1
+            if len(mapping) >= batch:
+                pipe.hset(CellDensity.KEY, mapping=mapping)
+                mapping = {}
+        if mapping:
+            pipe.hset(CellDensity.KEY, mapping=mapping)
+        await pipe.execute()
+    return cells
@@ -0,0 +1,61 @@
+"""Throttled warnings of failures on request paths.
+
+Redis being down fails every request that touches it, and a message
+per request floods the output. A `FailureLog` counts every failure but
+logs at most once per `FailureLogConf.INTERVAL_SECONDS`, with the number
+of failures since its previous line. Counters of all logs are reported
+by `failure_metrics`.
+"""
+
+import logging
+import time
+
+from src.core.settings.constants import FailureLogConf
+
+logger = logging.getLogger(FailureLogConf.LOGGER)
+
+FAILURE_LOGS: dict[str, "FailureLog"] = {}
+
+
+class FailureLog:
+    """Counter of one kind of failure with a throttled warning."""
+
+    def __init__(
+        self,
+        name: str,
+        message: str,
+        interval: float = FailureLogConf.INTERVAL_SECONDS,
+    ) -> None:
+        """Init and register a log under `name`.
+
+        Args:
+            name (str): Key of the counter in `failure_metrics`.
+            message (str): What failed, the error is appended.
+            interval (float): Min seconds between two warnings.
+        """
+        self.name = name
+        self.message = message
+        self.interval = interval
+        self.count = 0
+        self._unlogged = 0
+        self._logged_at = float("-inf")
+        FAILURE_LOGS[name] = self
+
+    def __call__(self, error: BaseException) -> None:
+        """Count a failure, warn if the last warning is old enough."""
+        self.count += 1
+        self._unlogged += 1
+
+        now = time.monotonic()
+        if now - self._logged_at < self.interval:
+            return
+
+        logger.warning(
+            "%s (%d times): %s", self.message, self._unlogged, error
+        )
+        self._logged_at, self._unlogged = now, 0
+
+
+def failure_metrics() -> dict[str, int]:
+    """Return the failure counter of every log."""
+    return {name: log.count for name, log in FAILURE_LOGS.items()}
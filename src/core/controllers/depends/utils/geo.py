@@ -1,148 +1,421 @@
 """Geo utilities."""
 
 import math
+from collections.abc import Sequence
+from functools import lru_cache
 
 import h3
+import numpy as np
 from geopy.distance import distance
+from numpy.typing import ArrayLike
 
 from src.core.settings.constants import LocationH3
-from src.core.validators.dto import H3Parameters, LocationData, LocationTemp
+from src.core.validators.dto import H3Parameters
+
+H3_RESOLUTION_TABLE: tuple[H3Parameters, ...] = tuple(
+    H3Parameters(
+        resolution=resolution,
+        diameter=diameter,
+        field_name=LocationH3.FIELD_H3_INDEX.format(resolution),
+    )
+    for resolution, diameter in (
+        (LocationH3.H3_RESOLUTION_9, LocationH3.H3_MAX_DIAMETER_9),
+        (LocationH3.H3_RESOLUTION_8, LocationH3.H3_MAX_DIAMETER_8),
+        (LocationH3.H3_RESOLUTION_7, LocationH3.H3_MAX_DIAMETER_7),
+        (LocationH3.H3_RESOLUTION_6, LocationH3.H3_MAX_DIAMETER_6),
+        (LocationH3.H3_RESOLUTION_5, LocationH3.H3_MAX_DIAMETER_5),
+        (LocationH3.H3_RESOLUTION_4, LocationH3.H3_MAX_DIAMETER_4),
+        (LocationH3.H3_RESOLUTION_3, LocationH3.H3_MAX_DIAMETER_3),
+    )
+)
+"""Resolutions from the finest to the coarsest, built once at import."""
 
 
 def select_h3_resolution_params(radius: float, exact: bool) -> H3Parameters:
-    """Choice params H3 by radius."""
+    """Choice params H3 by radius.
+
+    Returns the finest resolution whose diameter covers the radius,
+    the coarsest one for larger radii and always the finest in exact mode.
+    """
     if exact:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_9,
-            diameter=LocationH3.H3_MAX_DIAMETER_9,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_9
-            ),
-        )
-    if radius <= LocationH3.H3_MAX_DIAMETER_9:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_9,
-            diameter=LocationH3.H3_MAX_DIAMETER_9,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_9
-            ),
-        )
+        return H3_RESOLUTION_TABLE[0]
 
-    if radius <= LocationH3.H3_MAX_DIAMETER_8:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_8,
-            diameter=LocationH3.H3_MAX_DIAMETER_8,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_8
-            ),
-        )
+    for h3_params in H3_RESOLUTION_TABLE:
+        if radius <= h3_params.diameter:
+            return h3_params
+
+    return H3_RESOLUTION_TABLE[-1]
+
+
+@lru_cache(maxsize=LocationH3.RING_CACHE_SIZE)
+def ring_cells(
+    center_cell: int,
+    resolution: int,
+    ring_size: int,
+) -> tuple[int, ...]:
+    """Return cells of the disk around `center_cell`, center included.
 
-    elif radius <= LocationH3.H3_MAX_DIAMETER_7:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_7,
-            diameter=LocationH3.H3_MAX_DIAMETER_7,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_7
-            ),
+    Depends only on its arguments, so it is memoized process-wide:
+    users of one cell share the expansion.
+    """
+    return tuple(
+        h3.str_to_int(cell)
+        for cell in h3.grid_disk(h3.int_to_str(center_cell), ring_size)
+    )
+
+
+def child_range(
+    cell: int,
+    resolution: int,
+    child_resolution: int = LocationH3.H3_RESOLUTION_MAX,
+) -> tuple[int, int]:
+    """Return the integer bounds of all `child_resolution` descendants.
+
+    A child index keeps the parent's digits and only the digits below
+    `resolution` vary (0..6), so the descendants of a cell form one
+    contiguous range: the center child (all 0) to the last child (all 6).
+    """
+    first = h3.str_to_int(
+        h3.cell_to_center_child(h3.int_to_str(cell), child_resolution)
+    )
+    last = first
+    for digit in range(resolution + 1, child_resolution + 1):
+        last |= LocationH3.H3_LAST_CHILD_DIGIT << (
+            LocationH3.H3_DIGIT_BITS * (LocationH3.H3_MAX_DIGITS - digit)
         )
+    return first, last
+
+
+@lru_cache(maxsize=LocationH3.RING_CACHE_SIZE)
+def cell_spacing(cell: int) -> float:
+    """Return the distance in meters to the nearest neighbour center.
+
+    Cells of one resolution differ in size by up to ~2x over the globe,
+    so the spacing is measured around the cell, not averaged.
+    """
+    cell_str = h3.int_to_str(cell)
+    center = h3.cell_to_latlng(cell_str)
+    return min(
+        h3.great_circle_distance(center, h3.cell_to_latlng(neighbour), "m")
+        for neighbour in h3.grid_disk(cell_str, 1)
+        if neighbour != cell_str
+    )
 
-    elif radius <= LocationH3.H3_MAX_DIAMETER_6:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_6,
-            diameter=LocationH3.H3_MAX_DIAMETER_6,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_6
-            ),
+
+def cover_ring(
+    center_cell: int,
+    resolution: int,
+    radius: int | float,
+    ring_size: int,
+) -> tuple[int, int, int]:
+    """Return (center, resolution, ring size) of the disk to query.
+
+    The disk of the search resolution is kept while its ring size is at
+    most `LocationH3.MAX_COVER_RING`. Larger disks are replaced with the
+    finest coarser disk that still covers the radius within that ring size.
+
+    A disk of ring size k reaches at least its inradius, k * spacing *
+    sqrt(3) / 2, from the parent center, and the parent center is up to
+    one edge away from the user: the ring covers radius + that offset.
+    """
+    if ring_size <= LocationH3.MAX_COVER_RING:
+        return center_cell, resolution, ring_size
+
+    center = h3.int_to_str(center_cell)
+    latlng = h3.cell_to_latlng(center)
+    for cover_resolution in range(resolution - 1, -1, -1):
+        parent = h3.cell_to_parent(center, cover_resolution)
+        offset = h3.great_circle_distance(
+            latlng, h3.cell_to_latlng(parent), "m"
         )
-    elif radius <= LocationH3.H3_MAX_DIAMETER_5:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_5,
-            diameter=LocationH3.H3_MAX_DIAMETER_5,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_5
-            ),
+        spacing = cell_spacing(h3.str_to_int(parent))
+        cover_size = math.ceil(
+            (radius + offset) / (spacing * math.sqrt(3) / 2)
         )
 
-    elif radius <= LocationH3.H3_MAX_DIAMETER_4:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_4,
-            diameter=LocationH3.H3_MAX_DIAMETER_4,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_4
-            ),
+        if cover_size <= LocationH3.MAX_COVER_RING or cover_resolution == 0:
+            break
+
+    return h3.str_to_int(parent), cover_resolution, cover_size
+
+
+@lru_cache(maxsize=LocationH3.RING_CACHE_SIZE)
+def compact_cover(
+    center_cell: int,
+    resolution: int,
+    ring_size: int,
+) -> tuple[int, ...]:
+    """Return the disk compacted into mixed-resolution cells."""
+    return tuple(
+        h3.str_to_int(cell)
+        for cell in h3.compact_cells(
+            [
+                h3.int_to_str(cell)
+                for cell in ring_cells(center_cell, resolution, ring_size)
+            ]
         )
+    )
+
 
-    else:
-        return H3Parameters(
-            resolution=LocationH3.H3_RESOLUTION_3,
-            diameter=LocationH3.H3_MAX_DIAMETER_3,
-            field_name=LocationH3.FIELD_H3_INDEX.format(
-                LocationH3.H3_RESOLUTION_3
-            ),
+@lru_cache(maxsize=LocationH3.RING_CACHE_SIZE)
+def ring_cover(
+    center_cell: int,
+    resolution: int,
+    ring_size: int,
+) -> tuple[tuple[int, int], ...]:
+    """Return the disk as sorted `h3_index_9` ranges.
+
+    The disk is compacted into mixed-resolution cells first, so the
+    number of ranges grows with the disk's perimeter, not its area.
+    """
+    return tuple(
+        sorted(
+            child_range(cell, h3.get_resolution(h3.int_to_str(cell)))
+            for cell in compact_cover(center_cell, resolution, ring_size)
         )
+    )
+
+
+def cell_parents(cell: int) -> tuple[int, ...]:
+    """Return the cell and its parents at every coarser resolution.
+
+    These are exactly the cells whose `child_range` holds the cell, so
+    the compacted covers it belongs to are tagged with one of them.
+    """
+    cell_str = h3.int_to_str(cell)
+    return tuple(
+        h3.str_to_int(h3.cell_to_parent(cell_str, resolution))
+        for resolution in range(h3.get_resolution(cell_str) + 1)
+    )
+
+
+def ring_cache_stats() -> dict[str, dict[str, int]]:
+    """Return hit/miss counters of the ring expansion caches."""
+    stats = {}
+    for name, cached in (
+        ("ring", ring_cells),
+        ("compact", compact_cover),
+        ("cover", ring_cover),
+    ):
+        info = cached.cache_info()
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize or 0,
+        }
+    return stats
+
+
+def near_cover(
+    user_location: int,
+    radius: int | float,
+    h3_params: H3Parameters,
+) -> tuple[int, int, int]:
+    """Return (center, resolution, ring size) of the disk near location."""
+    return cover_ring(
+        center_cell=user_location,
+        resolution=h3_params.resolution,
+        radius=radius,
+        ring_size=math.ceil(radius / h3_params.diameter),
+    )
 
 
-def get_near_indexes(
+def get_near_ranges(
     user_location: int,
     radius: int | float,
     h3_params: H3Parameters,
-) -> list[int]:
-    """Return H3 indexes near location."""
-    center_cell = h3.int_to_str(user_location)
-    ring_size = math.ceil(radius / h3_params.diameter)
-    neighbor_cells = h3.grid_disk(center_cell, ring_size)
+) -> tuple[tuple[int, int], ...]:
+    """Return `h3_index_9` ranges covering the disk near location."""
+    return ring_cover(*near_cover(user_location, radius, h3_params))
 
-    h3_indexes = [int(cell, 16) for cell in neighbor_cells]
-    h3_indexes.append(user_location)
 
-    return h3_indexes
+@lru_cache(maxsize=LocationH3.RING_CACHE_SIZE)
+def cell_center(cell: int) -> tuple[float, float]:
+    """Return (lat, lon) of the cell center."""
+    return h3.cell_to_latlng(h3.int_to_str(cell))
 
 
-def get_location_params_by_auth_user(
-    auth_location: int | None,
-    user_location: int | None,
-    exact: bool | None,
-) -> LocationData:
-    """Get location params to auth user."""
-    if auth_location and user_location:
-        loc_temp = LocationTemp()
-        loc_temp.h3_str_auth = h3.int_to_str(auth_location)
-        loc_temp.h3_str_user = h3.int_to_str(user_location)
-
-        loc_temp.lat_auth, loc_temp.lon_auth = h3.cell_to_latlng(
-            loc_temp.h3_str_auth
-        )
-        loc_temp.lat_user, loc_temp.lon_user = h3.cell_to_latlng(
-            loc_temp.h3_str_user
+def cells_to_latlng(cells: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+    """Return latitudes and longitudes of cell centers.
+
+    Neighbours share cells, so each distinct cell is resolved once.
+    """
+    unique, inverse = np.unique(
+        np.asarray(cells, dtype=np.int64), return_inverse=True
+    )
+    centers = np.array(
+        [cell_center(int(cell)) for cell in unique], dtype=np.float64
+    ).reshape(-1, 2)
+    return centers[inverse, 0], centers[inverse, 1]
+
+
+def haversine_km(
+    lat: ArrayLike,
+    lon: ArrayLike,
+    lats: ArrayLike,
+    lons: ArrayLike,
+) -> np.ndarray:
+    """Return great-circle distances in km between broadcast points.
+
+    Same sphere as `h3.great_circle_distance`.
+    """
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return (
+        2
+        * LocationH3.EARTH_RADIUS_KM
+        * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    )
+
+
+def vincenty_km(
+    lat: ArrayLike,
+    lon: ArrayLike,
+    lats: ArrayLike,
+    lons: ArrayLike,
+) -> np.ndarray:
+    """Return WGS-84 geodesic distances in km between broadcast points.
+
+    Vectorized Vincenty inverse formula. It agrees with geopy's geodesic
+    to well under a millimetre; the rare pairs it does not converge for
+    (nearly antipodal points) are computed by geopy.
+    """
+    a = LocationH3.WGS84_A
+    f = LocationH3.WGS84_F
+    b = a * (1 - f)
+
+    lat, lon, lats, lons = np.broadcast_arrays(
+        *(
+            np.asarray(value, dtype=np.float64)
+            for value in (lat, lon, lats, lons)
         )
+    )
+    lon_delta = np.radians(lons - lon)
+    u1 = np.arctan((1 - f) * np.tan(np.radians(lat)))
+    u2 = np.arctan((1 - f) * np.tan(np.radians(lats)))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = lon_delta
+    converged = np.zeros(lon_delta.shape, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for _ in range(LocationH3.VINCENTY_MAX_ITER):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(
+                cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam
+            )
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+
+            sin_alpha = np.where(
+                sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma
+            )
+            cos2_alpha = 1 - sin_alpha**2
+            cos_2sigma_m = np.where(
+                cos2_alpha == 0,
+                0.0,
+                cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha,
+            )
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
 
-        return LocationData(
-            lat=loc_temp.lat_user,
-            lon=loc_temp.lon_user,
-            distance=(
-                exact_circle_distance(coordinates=loc_temp)
-                if exact
-                else greate_circle_distance(coordinates=loc_temp)
-            ),
+            lam_prev = lam
+            lam = lon_delta + (1 - c) * f * sin_alpha * (
+                sigma
+                + c
+                * sin_sigma
+                * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+            )
+            converged = np.abs(lam - lam_prev) < LocationH3.VINCENTY_TOLERANCE
+            if converged.all():
+                break
+
+        u_sq = cos2_alpha * (a**2 - b**2) / b**2
+        big_a = 1 + u_sq / 16384 * (
+            4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq))
+        )
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = (
+            big_b
+            * sin_sigma
+            * (
+                cos_2sigma_m
+                + big_b
+                / 4
+                * (
+                    cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                    - big_b
+                    / 6
+                    * cos_2sigma_m
+                    * (-3 + 4 * sin_sigma**2)
+                    * (-3 + 4 * cos_2sigma_m**2)
+                )
+            )
         )
-    raise ValueError("Data location is not valid.")
+        distances = b * big_a * (sigma - delta_sigma) / 1000
+
+    for index in zip(*np.nonzero(~converged)):
+        distances[index] = distance(
+            (lat[index], lon[index]), (lats[index], lons[index])
+        ).km
 
+    return distances
 
-def greate_circle_distance(coordinates: LocationTemp) -> float:
-    """Return greate-circle distance."""
-    return h3.great_circle_distance(
-        latlng1=(coordinates.lat_auth, coordinates.lon_auth),
-        latlng2=(coordinates.lat_user, coordinates.lon_user),
-        unit="km",
+
+def get_location_params_batch(
+    auth_location: int | None,
+    user_locations: Sequence[int],
+    exact: bool | None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return cell centers and distances of all neighbours at once.
+
+    Returns:
+        tuple: Latitudes, longitudes and distances in km of the
+        neighbour cells, in the order of `user_locations`.
+    """
+    if not auth_location or not all(user_locations):
+        raise ValueError("Data location is not valid.")
+
+    lat_auth, lon_auth = cell_center(auth_location)
+    lats, lons = cells_to_latlng(user_locations)
+    measure = vincenty_km if exact else haversine_km
+
+    return lats, lons, measure(lat_auth, lon_auth, lats, lons)
+
+
+def distance_matrix(
+    origins: ArrayLike,
+    destinations: ArrayLike,
+    exact: bool,
+) -> np.ndarray:
+    """Return (N, M) distances in km between (lat, lon) points."""
+    origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+    destinations = np.asarray(destinations, dtype=np.float64).reshape(-1, 2)
+    measure = vincenty_km if exact else haversine_km
+
+    return measure(
+        origins[:, :1],
+        origins[:, 1:],
+        destinations[:, 0],
+        destinations[:, 1],
     )
 
 
-def exact_circle_distance(coordinates: LocationTemp) -> float:
-    """Return exact circle distance."""
-    return (
-        distance(
-            (coordinates.lat_auth, coordinates.lon_auth),
-            (coordinates.lat_user, coordinates.lon_user),
-        ).m
-        / 1000
+def pair_distances(
+    points_a: ArrayLike,
+    points_b: ArrayLike,
+    exact: bool,
+) -> np.ndarray:
+    """Return distances in km between (lat, lon) points, pair by pair."""
+    points_a = np.asarray(points_a, dtype=np.float64).reshape(-1, 2)
+    points_b = np.asarray(points_b, dtype=np.float64).reshape(-1, 2)
+    measure = vincenty_km if exact else haversine_km
+
+    return measure(
+        points_a[:, 0], points_a[:, 1], points_b[:, 0], points_b[:, 1]
     )
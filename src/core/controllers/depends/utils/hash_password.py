@@ -2,6 +2,8 @@
 
 import bcrypt
 
+from src.core.controllers.depends.utils.pwd_pool import pwd_executor
+
 
 def hash_pwd(
     password: str,
@@ -17,3 +19,13 @@ def validate_pwd(password: str, hash_password: bytes) -> bool:
         password=password.encode(),
         hashed_password=hash_password,
     )
+
+
+async def hash_pwd_async(password: str) -> bytes:
+    """Create crypt hash password in the password pool."""
+    return await pwd_executor.run(hash_pwd, password)
+
+
+async def validate_pwd_async(password: str, hash_password: bytes) -> bool:
+    """Validate crypt hash password in the password pool."""
+    return await pwd_executor.run(validate_pwd, password, hash_password)
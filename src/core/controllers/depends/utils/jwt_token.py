@@ -1,10 +1,13 @@
-"""TODO DOCS."""
+"""Encode, decode and cache JWT tokens."""
 
 import datetime
+import hashlib
+import time
+from collections import OrderedDict
 
 import jwt
 
-from src.core.settings.constants import JWT
+from src.core.settings.constants import JWT, JWTconf
 from src.core.settings.env import settings
 
 
@@ -34,17 +37,85 @@ def encode_jwt(
     return encode
 
 
+class VerifiedTokenCache:
+    """Process-local LRU of tokens whose signature was already verified.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw tokens are
+    never kept in memory, and dropped once the token's `exp` has passed.
+    """
+
+    def __init__(self, max_size: int = JWTconf.VERIFIED_CACHE_SIZE) -> None:
+        """Init empty cache."""
+        self.max_size = max_size
+        self._tokens: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def digest(jwt_token: str | bytes) -> bytes:
+        """Return cache key of the token."""
+        if isinstance(jwt_token, str):
+            jwt_token = jwt_token.encode()
+        return hashlib.sha256(jwt_token).digest()
+
+    def get(self, jwt_token: str | bytes) -> dict | None:
+        """Return a copy of the verified payload or None."""
+        key = self.digest(jwt_token)
+        cached = self._tokens.get(key)
+
+        if cached is None:
+            return None
+
+        expire, payload = cached
+        if expire <= time.time():
+            del self._tokens[key]
+            return None
+
+        self._tokens.move_to_end(key)
+        return payload.copy()
+
+    def put(self, jwt_token: str | bytes, payload: dict) -> None:
+        """Store a verified payload until its expiration."""
+        expire = payload.get(JWT.PAYLOAD_EXPIRE_KEY)
+        if expire is None:
+            return
+
+        key = self.digest(jwt_token)
+        self._tokens[key] = (float(expire), payload.copy())
+        self._tokens.move_to_end(key)
+
+        while len(self._tokens) > self.max_size:
+            self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached tokens."""
+        self._tokens.clear()
+
+
+verified_tokens = VerifiedTokenCache()
+
+
 def decode_jwt(
     jwt_token: str | bytes,
     public_key: str = settings.jwt.jwt_public,
     algorithm: str = settings.jwt.algorithm,
+    cache: VerifiedTokenCache | None = verified_tokens,
 ) -> dict:
-    """Return decoded token."""
+    """Return decoded token.
+
+    A token verified once is served from `cache` until it expires,
+    so the RSA signature check runs once per token, not per request.
+    """
+    if cache is not None and (payload := cache.get(jwt_token)) is not None:
+        return payload
+
     decoded = jwt.decode(
         jwt=jwt_token,
         key=public_key,
         algorithms=[algorithm],
     )
+
+    if cache is not None:
+        cache.put(jwt_token, decoded)
+
     return decoded
 
 
@@ -0,0 +1,154 @@
+"""Per-worker L1 cache in front of the Redis response cache.
+
+Hot api/list entries are answered from process memory, without a
+network round trip. Entries keep the expiry of their Redis copy but
+live at most `LOCAL_CACHE_TTL` seconds here. Keys deleted in Redis
+(`redis_chash.invalidate_tags`) are broadcast on a pub/sub channel, so
+every worker drops its copy.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from src.core.settings.constants import LocalCacheConf
+from src.core.settings.env import settings
+
+
+class LocalCache:
+    """Bounded LRU of (value, expiry), evicting expired entries first."""
+
+    def __init__(
+        self,
+        max_size: int = LocalCacheConf.SIZE,
+        max_ttl: float = LocalCacheConf.TTL,
+    ) -> None:
+        """Init an empty cache, `max_size` 0 disables it."""
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: OrderedDict[str, tuple[Any, float, float]] = (
+            OrderedDict()
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> tuple[Any, int] | None:
+        """Return (value, seconds left in Redis) or None."""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or entry[2] <= now:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        value, expires_at, _ = entry
+        return value, max(int(expires_at - now), 0)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a value that expires in Redis in `ttl` seconds."""
+        if self.max_size <= 0 or ttl <= 0:
+            return
+
+        now = time.monotonic()
+        self._entries[key] = (
+            value,
+            now + ttl,
+            now + min(ttl, self.max_ttl),
+        )
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then the least recently used ones."""
+        for key in [k for k, e in self._entries.items() if e[2] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, keys: Iterable[str]) -> None:
+        """Drop `keys` if present."""
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+
+    def metrics(self) -> dict[str, int]:
+        """Return cache counters."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+local_cache = LocalCache(
+    max_size=settings.local_cache.LOCAL_CACHE_SIZE,
+    max_ttl=settings.local_cache.LOCAL_CACHE_TTL,
+)
+
+
+async def publish_invalidation(
+    redis: Redis, keys: Iterable[str], cache: LocalCache = local_cache
+) -> None:
+    """Drop `keys` from `cache` and broadcast them to the other workers."""
+    keys = list(keys)
+    cache.discard(keys)
+    if keys and cache.max_size > 0:
+        await redis.publish(LocalCacheConf.CHANNEL, json.dumps(keys))
+
+
+async def listen_invalidations(redis: Redis) -> None:
+    """Drop broadcast keys from this worker's cache, forever.
+
+    Messages sent while disconnected are lost, so the cache is cleared
+    on every reconnect.
+    """
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(LocalCacheConf.CHANNEL)
+            local_cache.clear()
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    local_cache.discard(json.loads(message["data"]))
+        except RedisError as e:
+            print(f"Local cache invalidation listener failed: {e}")
+        finally:
+            await pubsub.aclose()
+        await asyncio.sleep(LocalCacheConf.RECONNECT_SECONDS)
+
+
+def start_local_cache(redis: Redis) -> list[asyncio.Task]:
+    """Start the invalidation listener, if the cache is enabled.
+
+    Returns:
+        list[asyncio.Task]: Background tasks, see `stop_local_cache`.
+    """
+    if local_cache.max_size <= 0:
+        return []
+    return [asyncio.create_task(listen_invalidations(redis))]
+
+
+async def stop_local_cache(tasks: list[asyncio.Task]) -> None:
+    """Cancel background tasks of the cache."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,51 @@
+"""Propagate a saved location to the indexes and caches built on it.
+
+Called once the location is committed, by registration today and by
+any future location-update path. Every step only logs its failures:
+the database is the source of truth and each derived copy has its own
+resync (index rebuild, GEO reconciliation, counter rebuild, cache TTL).
+"""
+
+from src.core.controllers.depends.utils.cell_index_sync import (
+    publish_location,
+)
+from src.core.controllers.depends.utils.density import count_location
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.nearby_plan import (
+    invalidate_location,
+)
+from src.core.controllers.depends.utils.redis_geo import mirror_location
+from src.core.models.models.location import LocationORM
+from src.core.settings.constants import CellDensity, LocationH3
+
+propagation_failed = FailureLog(
+    name="location_events", message="Saved location is not propagated"
+)
+"""For callers of `location_saved`, which must not fail their request."""
+
+
+async def location_saved(
+    user_id: str,
+    location: LocationORM,
+    latitude: float,
+    longitude: float,
+) -> None:
+    """Update the cell index, density counters, GEO mirror and caches.
+
+    Args:
+        user_id (str): Owner of the location.
+        location (LocationORM): The committed row, with its H3 indexes.
+        latitude (float): Latitude of the point.
+        longitude (float): Longitude of the point.
+    """
+    await publish_location(user_id=user_id, cell=location.h3_index_9)
+    await count_location(
+        cell=getattr(
+            location,
+            LocationH3.FIELD_H3_INDEX.format(CellDensity.RESOLUTION),
+        )
+    )
+    await mirror_location(
+        user_id=user_id, latitude=latitude, longitude=longitude
+    )
+    await invalidate_location(cell=location.h3_index_9)
@@ -0,0 +1,22 @@
+"""Counters of the worker, served by GET /metrics.
+
+Every counter lives in the memory of one worker process: a scrape sees
+the worker that answered it.
+"""
+
+from typing import Any
+
+from src.core.controllers.depends.utils.failure_log import failure_metrics
+from src.core.controllers.depends.utils.geo import ring_cache_stats
+from src.core.controllers.depends.utils.pwd_pool import pwd_executor
+from src.core.controllers.depends.utils.redis_chash import cache_metrics
+
+
+def collect_metrics() -> dict[str, Any]:
+    """Return the counters of every component, by component."""
+    return {
+        "password_pool": pwd_executor.metrics(),
+        "h3_rings": ring_cache_stats(),
+        "response_cache": cache_metrics(),
+        "failures": failure_metrics(),
+    }
@@ -0,0 +1,285 @@
+"""Resolve the api/list search before the cache lookup.
+
+The cache key of a non-exact H3 search is its area, not its caller:
+the caller's own cell is excluded and distances are measured from the
+cell center, so every user of a cell gets the same page for the same
+radius, filters and cursor. Those entries live under::
+
+    api/location_list:cell:<resolution>:<cell>:<cover>:<params hash>
+
+and cache memory grows with active cells, not active users. Searches
+that depend on the caller's point (exact mode, PostGIS, Redis GEO) keep
+a per-user key. The key is built from the trimmed search: a trim picks
+a finer cell, which must not be shared with users of other cells. The
+user's cells are cached in Redis and in the worker, and density plans
+in the worker for `CellDensity.PLAN_CACHE_SECONDS`, so a hit usually
+needs neither the database nor Redis.
+
+Every entry is tagged with the compacted cells of its H3 cover. A saved
+location drops the entries tagged with its cell at any resolution, so
+neighbours see a new user at once instead of after the TTL.
+"""
+
+import hashlib
+import json
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import Request
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from src.core.controllers.depends.utils.connect_db import (
+    get_crud,
+    session_scope,
+)
+from src.core.controllers.depends.utils.density import plan_radius
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.geo import (
+    cell_parents,
+    compact_cover,
+    near_cover,
+    select_h3_resolution_params,
+)
+from src.core.controllers.depends.utils.local_cache import LocalCache
+from src.core.controllers.depends.utils.redis_chash import (
+    invalidate_tags,
+    setup_redis,
+)
+from src.core.controllers.depends.utils.token_from import (
+    get_user_id_from_token,
+)
+from src.core.models.cruds.location import get_nearby_engine
+from src.core.settings.constants import (
+    CellDensity,
+    LocationH3,
+    NearbyCache,
+)
+from src.core.settings.env import settings
+from src.core.validators.dto import NearbyPlan
+
+CELL_KEY_PARAMS = (
+    "sex",
+    "first_name",
+    "last_name",
+    "sort_by_created",
+    "cursor",
+    "limit",
+)
+USER_KEY_PARAMS = CELL_KEY_PARAMS + ("radius", "exact", "engine")
+
+user_cells_cache = LocalCache(
+    max_size=NearbyCache.USER_CELLS_LOCAL_SIZE,
+    max_ttl=settings.redis.REDIS_EXP_USER_CELLS,
+)
+"""Per-worker copy of the Redis user cells."""
+
+density_plans = LocalCache(
+    max_size=CellDensity.PLAN_CACHE_SIZE,
+    max_ttl=CellDensity.PLAN_CACHE_SECONDS,
+)
+"""Per-worker density plans by (density cell, requested radius)."""
+
+invalidation_failed = FailureLog(
+    name="list_invalidation", message="Location caches are not invalidated"
+)
+
+
+async def get_user_cells(
+    user_id: str, redis: Redis | None = None
+) -> dict[int, int] | None:
+    """Return the user's cell of every resolution.
+
+    Cached in the worker, then in Redis. Locations do not move, so the
+    entries only expire to free memory.
+    """
+    key = f"{NearbyCache.USER_CELLS_PREF}:{user_id}"
+    if local := user_cells_cache.get(key):
+        return local[0]
+
+    redis = redis or await setup_redis()
+    cells: dict[int, int] | None
+    if cached := await redis.get(key):
+        cells = {int(res): cell for res, cell in json.loads(cached).items()}
+    else:
+        async with session_scope() as session:
+            cells = await get_crud().locations.get_h3_indexes(
+                auth_id=user_id, session=session
+            )
+        if cells:
+            await redis.set(
+                key,
+                json.dumps(cells),
+                ex=settings.redis.REDIS_EXP_USER_CELLS,
+            )
+
+    if cells:
+        user_cells_cache.set(
+            key, cells, ttl=settings.redis.REDIS_EXP_USER_CELLS
+        )
+    return cells
+
+
+async def plan_nearby(
+    user_id: str,
+    radius: float,
+    exact: bool,
+    engine: str | None,
+) -> NearbyPlan | None:
+    """Pick the engine, radius and H3 cells of the search.
+
+    The density trim is only recorded in `density_cell`, apply it with
+    `trim_nearby`.
+
+    Returns:
+        NearbyPlan | None: None if the user has no location.
+    """
+    if exact:
+        radius = min(radius, LocationH3.MAX_EXACT_RADIUS)
+
+    nearby_engine = get_nearby_engine(
+        engine
+        or (
+            settings.nearby.NEARBY_EXACT_ENGINE
+            if exact
+            else settings.nearby.NEARBY_ENGINE
+        )
+    )
+
+    cells = await get_user_cells(user_id)
+    if not cells:
+        return None
+
+    h3_params = select_h3_resolution_params(radius, exact)
+    return NearbyPlan(
+        engine=nearby_engine.name,
+        radius=radius,
+        h3_params=h3_params,
+        auth_location=cells[h3_params.resolution],
+        density_cell=(
+            cells[CellDensity.RESOLUTION]
+            if nearby_engine.uses_h3_cover
+            and settings.nearby.NEARBY_DENSITY_ENABLED
+            else None
+        ),
+    )
+
+
+async def trim_nearby(
+    plan: NearbyPlan, user_id: str, exact: bool
+) -> NearbyPlan:
+    """Trim the radius of a dense area, then pick its resolution.
+
+    The counters are read once per density cell and radius per
+    `CellDensity.PLAN_CACHE_SECONDS` in a worker.
+    """
+    if plan.density_cell is None:
+        return plan
+
+    cells = await get_user_cells(user_id)
+    if not cells:
+        return plan
+
+    key = f"{plan.density_cell}:{plan.radius}"
+    if cached := density_plans.get(key):
+        density_plan = cached[0]
+    else:
+        density_plan = await plan_radius(
+            center_cell=plan.density_cell, radius=plan.radius
+        )
+        density_plans.set(
+            key, density_plan, ttl=CellDensity.PLAN_CACHE_SECONDS
+        )
+    h3_params = select_h3_resolution_params(density_plan.radius, exact)
+    return NearbyPlan(
+        engine=plan.engine,
+        radius=density_plan.radius,
+        h3_params=h3_params,
+        auth_location=cells[h3_params.resolution],
+        trimmed=density_plan.trimmed,
+    )
+
+
+def params_hash(
+    params: dict[str, Any], names: tuple[str, ...], *extra: Any
+) -> str:
+    """Hash the request params that select the page, and `extra`."""
+    values = [params.get(name) for name in names]
+    return hashlib.md5(
+        json.dumps([*values, *extra], default=str).encode()
+    ).hexdigest()
+
+
+async def list_cache_key(
+    prefix_key: str, request: Request, params: dict[str, Any]
+) -> str | None:
+    """Return the cache key of api/list, plan the search on the way.
+
+    The trimmed plan is kept in `request.state` for the dependency body.
+
+    Returns:
+        str | None: None if the user has no location (not cached).
+    """
+    radius = params.get("radius")
+    user_id = get_user_id_from_token(request=request)
+    if not radius or not user_id:
+        return None
+
+    exact = bool(params.get("exact"))
+    engine = params.get("engine")
+    plan = await plan_nearby(
+        user_id=user_id,
+        radius=float(radius),
+        exact=exact,
+        engine=str(engine) if engine else None,
+    )
+    if plan is None:
+        return None
+    plan = await trim_nearby(plan=plan, user_id=user_id, exact=exact)
+    setattr(request.state, NearbyCache.PLAN_STATE, plan)
+
+    if exact or not get_nearby_engine(plan.engine).uses_h3_cover:
+        return ":".join(
+            (
+                prefix_key,
+                NearbyCache.USER_SCOPE,
+                str(user_id),
+                params_hash(params, USER_KEY_PARAMS),
+            )
+        )
+
+    cover = near_cover(plan.auth_location, plan.radius, plan.h3_params)
+    return ":".join(
+        (
+            prefix_key,
+            NearbyCache.CELL_SCOPE,
+            str(plan.h3_params.resolution),
+            str(plan.auth_location),
+            ",".join(str(part) for part in cover),
+            # A trimmed radius is part of the response body.
+            params_hash(params, CELL_KEY_PARAMS, plan.trimmed and plan.radius),
+        )
+    )
+
+
+def list_cache_tags(request: Request) -> Iterable[int]:
+    """Return the cells tagging the api/list entry of `request`.
+
+    The compacted cover of the planned area: a location is inside the
+    area's cover only if one of its `cell_parents` is among them.
+    """
+    plan: NearbyPlan = getattr(request.state, NearbyCache.PLAN_STATE)
+    return compact_cover(
+        *near_cover(plan.auth_location, plan.radius, plan.h3_params)
+    )
+
+
+async def invalidate_location(cell: int) -> None:
+    """Drop api/list entries whose area covers the `h3_index_9` cell.
+
+    Failures are only logged: the entries expire with their TTL.
+    """
+    try:
+        await invalidate_tags(cell_parents(cell))
+    except RedisError as e:
+        invalidation_failed(e)
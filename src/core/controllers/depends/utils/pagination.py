@@ -0,0 +1,100 @@
+"""Keyset pagination cursors for api/list."""
+
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from typing import Any, Sequence
+
+from fastapi import status
+
+from src.core.controllers.depends.utils.response_errors import (
+    raise_400_bad_req,
+)
+from src.core.settings.constants import LocationH3, MessageError, Pagination
+
+SORT_FIELDS = {
+    Pagination.SORT_CELL: LocationH3.FIELD_H3_CELL,
+    Pagination.SORT_DISTANCE: LocationH3.FIELD_DISTANCE,
+    Pagination.SORT_GEO_DISTANCE: LocationH3.FIELD_DISTANCE,
+    Pagination.SORT_CREATED_ASC: LocationH3.FIELD_CREATED_AT,
+    Pagination.SORT_CREATED_DESC: LocationH3.FIELD_CREATED_AT,
+}
+
+
+def get_sort_mode(
+    sort_by_created: bool | None,
+    default: str = Pagination.SORT_CELL,
+) -> str:
+    """Return keyset order used for the given sort flag.
+
+    `default` is the order of the nearby-search engine.
+    """
+    if sort_by_created is None:
+        return default
+    if sort_by_created:
+        return Pagination.SORT_CREATED_DESC
+    return Pagination.SORT_CREATED_ASC
+
+
+def page_keyset(row: Any, sort_mode: str) -> tuple[Any, Any]:
+    """Return keyset (sort value, user id) of a `near_users` row."""
+    return getattr(row, SORT_FIELDS[sort_mode]), row.id
+
+
+def encode_cursor(sort_mode: str, key: Sequence[Any]) -> str:
+    """Pack the keyset of the last row into an opaque cursor.
+
+    Args:
+        sort_mode (str): One of `Pagination.SORT_*`.
+        key (Sequence[Any]): Sort value and user id of the last row.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    sort_value, user_id = key
+    if isinstance(sort_value, datetime.datetime):
+        sort_value = sort_value.isoformat()
+
+    raw = json.dumps(
+        {
+            Pagination.CURSOR_SORT_KEY: sort_mode,
+            Pagination.CURSOR_VALUES_KEY: [sort_value, str(user_id)],
+        },
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_mode: str) -> tuple[Any, uuid.UUID]:
+    """Unpack cursor into the keyset of the last row of the previous page.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or was issued
+        for another sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+        if data[Pagination.CURSOR_SORT_KEY] != sort_mode:
+            raise ValueError(sort_mode)
+
+        sort_value, user_id = data[Pagination.CURSOR_VALUES_KEY]
+
+        if sort_mode == Pagination.SORT_CELL:
+            return int(sort_value), uuid.UUID(user_id)
+        if sort_mode in (
+            Pagination.SORT_DISTANCE,
+            Pagination.SORT_GEO_DISTANCE,
+        ):
+            return float(sort_value), uuid.UUID(user_id)
+        return datetime.datetime.fromisoformat(sort_value), uuid.UUID(user_id)
+
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return raise_400_bad_req(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            error_type=MessageError.TYPE_ERROR_INVALID_CURSOR,
+            error_message=MessageError.MESSAGE_INVALID_CURSOR,
+        )
@@ -0,0 +1,102 @@
+"""Bounded worker pool for password hashing."""
+
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import Any, Callable
+
+from src.core.controllers.depends.utils.response_errors import raise_http_503
+from src.core.settings.constants import PasswordPool
+from src.core.settings.env import settings
+
+
+class PasswordExecutor:
+    """Run bcrypt calls off the event loop with a bounded queue.
+
+    At most `workers` calls run at once, at most `max_queue` more wait
+    for a worker; anything beyond that is rejected with HTTP 503 at once
+    instead of piling up behind a login burst.
+    """
+
+    def __init__(
+        self,
+        kind: str = PasswordPool.KIND_THREAD,
+        workers: int = PasswordPool.WORKERS,
+        max_queue: int = PasswordPool.MAX_QUEUE,
+    ) -> None:
+        """Init pool conf, the executor itself is created lazily."""
+        self.kind = kind
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self) -> Executor:
+        """Return executor, create it on first use."""
+        if self._executor is None:
+            self._executor = (
+                ProcessPoolExecutor(max_workers=self.workers)
+                if self.kind == PasswordPool.KIND_PROCESS
+                else ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="pwd",
+                )
+            )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of calls waiting for a free worker."""
+        return max(self.in_flight - self.workers, 0)
+
+    def metrics(self) -> dict[str, int]:
+        """Return pool counters."""
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run `func(*args)` in the pool.
+
+        Raises:
+            HTTPException: 503 if the queue is full.
+        """
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise_http_503()
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(func, *args)
+            )
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+
+    def shutdown(self) -> None:
+        """Stop workers."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+pwd_executor = PasswordExecutor(
+    kind=settings.pwd_pool.PWD_POOL_KIND,
+    workers=settings.pwd_pool.PWD_POOL_WORKERS,
+    max_queue=settings.pwd_pool.PWD_POOL_MAX_QUEUE,
+)
@@ -0,0 +1,225 @@
+"""Rate limiter of API routes.
+
+A `RateLimiter` is a FastAPI dependency admitting `limit` requests of a
+client per `window` seconds. Each decision is one `incr_window` call of
+the `CacheBackend`, a single Lua script run with Redis, so the check and
+the increment are atomic and concurrent requests cannot race past the
+limit. Two modes:
+
+* `sliding_window`: a counter per fixed window, the previous window
+  weighted by its overlap with the last `window` seconds;
+* `token_bucket`: `limit` tokens refilled evenly over `window`.
+
+Both use the store's clock and keep the key alive only while it matters,
+so an active client is not locked out forever by a refreshed TTL.
+
+A worker admitting a client far under the limit leases a few extra
+tokens in the same call and spends them locally, without a round trip;
+leases live at most `RateLimit.LEASE_SECONDS`. Leased tokens are already
+counted in the store, so the limit still holds across workers.
+
+The decision is kept in `request.state`; `RateLimitHeadersMiddleware`
+adds the `RateLimit-*` headers to the response of any route.
+"""
+
+import math
+import time
+from typing import Callable
+
+from fastapi import Request
+from redis.exceptions import RedisError
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.controllers.depends.utils.cache_backend import CacheBackend
+from src.core.controllers.depends.utils.conf_headers import (
+    rate_limit_headers,
+)
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.local_cache import LocalCache
+from src.core.controllers.depends.utils.redis_chash import (
+    get_cache_backend,
+)
+from src.core.controllers.depends.utils.response_errors import raise_http_429
+from src.core.controllers.depends.utils.token_from import get_token_payload
+from src.core.settings.constants import JWT, RateLimit
+from src.core.settings.env import settings
+from src.core.validators.dto import RateLimitState
+
+check_failed = FailureLog(
+    name="rate_limit", message="Rate limit is not checked"
+)
+refund_failed = FailureLog(
+    name="rate_limit_refund", message="Rate limit is not refunded"
+)
+
+
+def client_identity(request: Request) -> str:
+    """Return the user id of a checked token, else the client address.
+
+    Declare the limiter after `token_is_alive` to limit per user.
+    """
+    payload = get_token_payload(request=request)
+    if payload and (user_id := payload.get(JWT.PAYLOAD_SUB_KEY)):
+        return str(user_id)
+    return request.client.host if request.client else RateLimit.ANONYMOUS
+
+
+class RateLimiter:
+    """FastAPI dependency admitting `limit` requests per `window` seconds.
+
+    Denied requests get HTTP 429 with `Retry-After`. Redis errors admit
+    the request: the limiter must not take the route down with it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        window: int,
+        mode: str | None = None,
+        lease: int | None = None,
+        identity: Callable[[Request], str] = client_identity,
+        backend: CacheBackend | None = None,
+    ) -> None:
+        """Init a limiter, `name` separates the counters of routes.
+
+        Args:
+            name (str): Prefix of the store keys.
+            limit (int): Requests admitted per window.
+            window (int): Window in seconds.
+            mode (str | None): `RATE_LIMIT_MODE` by default.
+            lease (int | None): Max tokens leased locally at once,
+                `RATE_LIMIT_LEASE` by default.
+            identity (Callable): Client of a request.
+            backend (CacheBackend | None): Store of the windows,
+                `get_cache_backend` if None.
+        """
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.mode = mode or settings.rate_limit.RATE_LIMIT_MODE
+        self.lease = (
+            settings.rate_limit.RATE_LIMIT_LEASE if lease is None else lease
+        )
+        self.identity = identity
+        self.backend = backend
+        self._leases = LocalCache(
+            max_size=RateLimit.LEASE_KEYS if self.lease else 0,
+            max_ttl=RateLimit.LEASE_SECONDS,
+        )
+
+    def gen_key(self, request: Request) -> str:
+        """Return the store key of the client of `request`."""
+        return f"{RateLimit.PREF}:{self.name}:{self.identity(request)}"
+
+    async def __call__(self, request: Request) -> RateLimitState:
+        """Admit the request or raise HTTP 429."""
+        key = self.gen_key(request)
+        state = self._spend_lease(key) or await self._take(key)
+        setattr(request.state, RateLimit.STATE, state)
+
+        if not state.allowed:
+            raise_http_429(headers=rate_limit_headers(state))
+        return state
+
+    async def refund(self, request: Request) -> None:
+        """Give back the token of an admitted request, e.g. a no-op."""
+        key = self.gen_key(request)
+        if cached := self._leases.get(key):
+            cached[0][0] += 1
+            return
+
+        try:
+            backend = self.backend or await get_cache_backend()
+            await backend.incr_window(
+                key, self.mode, self.limit, self.window * 1000, -1
+            )
+        except RedisError as e:
+            refund_failed(e)
+
+    def _spend_lease(self, key: str) -> RateLimitState | None:
+        """Admit from the local lease of `key`, if it has tokens left."""
+        cached = self._leases.get(key)
+        if cached is None or cached[0][0] <= 0:
+            return None
+
+        lease = cached[0]
+        lease[0] -= 1
+        return RateLimitState(
+            limit=self.limit,
+            window=self.window,
+            remaining=lease[1] + lease[0],
+            reset=max(math.ceil(lease[2] - time.monotonic()), 0),
+        )
+
+    def _wanted(self, key: str) -> int:
+        """Return the tokens to take: one, plus a lease if far under."""
+        cached = self._leases.get(key)
+        if not self.lease or cached is None:
+            return 1
+        remaining = cached[0][1]
+        return 1 + min(self.lease, remaining // RateLimit.LEASE_SHARE)
+
+    async def _take(self, key: str) -> RateLimitState:
+        """Take tokens in the store, keep the extra ones as a lease."""
+        wanted = self._wanted(key)
+        try:
+            backend = self.backend or await get_cache_backend()
+            granted, remaining, reset_ms, retry_ms = await backend.incr_window(
+                key, self.mode, self.limit, self.window * 1000, wanted
+            )
+        except RedisError as e:
+            check_failed(e)
+            return RateLimitState(
+                limit=self.limit,
+                window=self.window,
+                remaining=self.limit,
+                reset=self.window,
+            )
+
+        reset = math.ceil(reset_ms / 1000)
+        if self.lease and reset > 0:
+            # Kept even when empty: the last `remaining` sizes the lease.
+            self._leases.set(
+                key,
+                [max(granted - 1, 0), remaining, time.monotonic() + reset],
+                ttl=reset,
+            )
+
+        return RateLimitState(
+            limit=self.limit,
+            window=self.window,
+            remaining=remaining + max(granted - 1, 0),
+            reset=reset,
+            retry_after=math.ceil(retry_ms / 1000),
+            allowed=granted > 0,
+        )
+
+
+class RateLimitHeadersMiddleware:
+    """Add `RateLimit-*` headers of a `RateLimiter` decision.
+
+    Routes return their own `Response` objects, so the limiter cannot
+    set headers on them; it leaves its decision in `request.state`.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        """Wrap an ASGI app."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Add headers on the response start, if the route was limited."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            state = scope.get("state", {}).get(RateLimit.STATE)
+            if message["type"] == "http.response.start" and state:
+                headers = MutableHeaders(scope=message)
+                for name, value in rate_limit_headers(state).items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -1,29 +1,51 @@
 # type: ignore
-"""Cache module for caching API responses with Redis."""
+"""Cache module for caching API responses with a `CacheBackend`."""
 
+import asyncio
 import hashlib
+import math
+import random
+import time
 from functools import update_wrapper, wraps
-from typing import Any, Callable
+from typing import Any, Awaitable, Callable, Iterable
 
-from fastapi import Request, Response
-from fastapi.dependencies.utils import get_typed_return_annotation
+from fastapi import Request, Response, status
 from redis import asyncio as aioredis
 from redis.asyncio.client import Redis
 from starlette.status import HTTP_304_NOT_MODIFIED
 
+from src.core.controllers.depends.utils.cache_backend import (
+    CacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+)
+from src.core.controllers.depends.utils.compression import (
+    accepts_encoding,
+    cache_encoding,
+    compress,
+    decompress,
+)
 from src.core.controllers.depends.utils.conf_headers import (
     check_etag,
+    gen_etag,
     set_response_headers,
 )
-from src.core.controllers.depends.utils.response_errors import raise_http_429
+from src.core.controllers.depends.utils.local_cache import local_cache
 from src.core.controllers.depends.utils.serialize_and_deserilize import (
-    deserialize_data,
     serialize_data,
 )
 from src.core.controllers.depends.utils.token_from import (
     get_user_id_from_token,
 )
-from src.core.settings.constants import IntKeys, LiterKeys, TypeEncoding
+from src.core.settings.constants import (
+    CacheBackendConf,
+    CacheCompression,
+    CacheStampede,
+    Headers,
+    LiterKeys,
+    MimeTypes,
+    TypeEncoding,
+)
 from src.core.settings.env import settings
 
 
@@ -75,6 +97,21 @@ async def setup_redis(
         raise e
 
 
+@singleton
+async def setup_redis_bytes(
+    url: str = settings.redis.redis_url_broker,
+) -> Redis:
+    """Initialize Redis client returning bytes, for compressed entries.
+
+    Args:
+        url (str): Redis connection URL.
+
+    Returns:
+        Redis: Redis client instance.
+    """
+    return await aioredis.from_url(url=url, decode_responses=False)
+
+
 async def close_redis(client: Redis) -> None:
     """Close the Redis connection.
 
@@ -127,62 +164,166 @@ def gen_key(prefix_key: str, req: Request | None = None) -> str:
     return ":".join(keys)
 
 
-async def get_cache(cache_key: str) -> str | None:
-    """Retrieve cached data from Redis by key.
+@singleton
+async def get_cache_backend() -> CacheBackend:
+    """Return the `CACHE_BACKEND` store of the cache and rate limiter.
+
+    Returns:
+        CacheBackend: Redis backend on the shared clients, or a
+        per-process memory backend.
+    """
+    if settings.cache.CACHE_BACKEND == CacheBackendConf.MEMORY:
+        return MemoryCacheBackend(
+            max_size=settings.cache.CACHE_MEMORY_SIZE, local=local_cache
+        )
+    return RedisCacheBackend(
+        redis=await setup_redis(), redis_bytes=await setup_redis_bytes()
+    )
+
+
+L2_METRICS = {"hits": 0, "misses": 0}
+COMPRESSION_METRICS = {"raw_bytes": 0, "stored_bytes": 0}
+FLIGHT_METRICS = {
+    "recomputes": 0,
+    "early_refreshes": 0,
+    "stale_served": 0,
+    "coalesced": 0,
+    "wait_timeouts": 0,
+}
+
+
+async def get_cache_entry(
+    cache_key: str,
+    backend: CacheBackend | None = None,
+) -> tuple[dict[str, Any], int] | None:
+    """Return (fields, TTL) of an entry from the backend's L1, else backend.
+
+    A backend hit fills the L1 `backend.local`.
 
     Args:
-        cache_key (str): Key to retrieve data from Redis.
+        cache_key (str): Key to retrieve data from.
+        backend (CacheBackend | None): Store, `get_cache_backend` if None.
 
     Returns:
-        str | None: Cached data if available, else None.
+        tuple[dict[str, Any], int] | None: Entry fields, the body as
+        stored bytes, and remaining seconds.
     """
-    redis_client: Redis = await setup_redis()
-    try:
-        return await redis_client.get(cache_key)
-    except aioredis.RedisError as e:
-        raise e
+    backend = backend or await get_cache_backend()
+    if (entry := backend.local.get(cache_key)) is not None:
+        return entry
+
+    if (entry := await backend.get_with_ttl(cache_key)) is None:
+        L2_METRICS["misses"] += 1
+        return None
 
+    L2_METRICS["hits"] += 1
+    backend.local.set(cache_key, *entry)
+    return entry
 
-async def set_cache(cache_key, value, ex) -> None:
-    """Store data in Redis with expiration time.
+
+async def set_cache_entry(
+    cache_key: str,
+    fields: dict[str, Any],
+    ex: int,
+    tags: Iterable[Any] = (),
+    backend: CacheBackend | None = None,
+) -> None:
+    """Store an entry and its tags in one pipeline, and in the L1.
 
     Args:
         cache_key (str): Key to store data under.
-        value (Any): Data to store in Redis.
+        fields (dict[str, Any]): Entry fields, the body and its metadata.
         ex (int): Expiration time in seconds.
+        tags (Iterable[Any]): Tags of the entry, see `invalidate_tags`.
+        backend (CacheBackend | None): Store, `get_cache_backend` if None.
+    """
+    backend = backend or await get_cache_backend()
+    async with backend.pipeline() as pipe:
+        pipe.set(cache_key, fields, ex)
+        pipe.tag(cache_key, tags, ex)
+    backend.local.set(cache_key, fields, ex)
 
-    Raises:
-        RedisError: If storage fails.
+
+async def acquire_lock(
+    cache_key: str, backend: CacheBackend | None = None
+) -> str | None:
+    """Take the recompute lease of an entry.
+
+    Returns:
+        str | None: Lock token, None if another request holds it.
     """
-    redis_client: Redis = await setup_redis()
-    try:
+    backend = backend or await get_cache_backend()
+    return await backend.acquire_lock(
+        cache_key + CacheStampede.LOCK_SUFFIX,
+        settings.redis.REDIS_LOCK_LEASE_MS,
+    )
 
-        await redis_client.set(
-            name=cache_key,
-            value=value,
-            ex=ex,
-        )
 
-    except aioredis.RedisError as e:
-        raise e
+async def release_lock(
+    cache_key: str, token: str, backend: CacheBackend | None = None
+) -> None:
+    """Release the lease if it is still ours."""
+    backend = backend or await get_cache_backend()
+    await backend.release_lock(cache_key + CacheStampede.LOCK_SUFFIX, token)
 
 
-async def get_cache_ttl(cache_key: str) -> int:
-    """Retrieve TTL (time-to-live) for a cache key.
+async def wait_for_entry(
+    cache_key: str, backend: CacheBackend | None = None
+) -> tuple[dict[str, Any], int] | None:
+    """Poll the backend for the entry another request is computing.
 
-    Args:
-        cache_key (str): The key for which TTL is requested.
+    Gives up when the lease expires, i.e. the holder died or is slow.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.redis.REDIS_LOCK_LEASE_MS / 1000
+    while loop.time() < deadline:
+        await asyncio.sleep(CacheStampede.WAIT_STEP_SECONDS)
+        if (entry := await get_cache_entry(cache_key, backend)) is not None:
+            return entry
+    return None
+
+
+def refresh_early(fields: dict[str, Any], fresh_ttl: int) -> bool:
+    """Return True if the entry should be recomputed before it expires.
+
+    XFetch: the closer the expiry and the slower the recompute, the
+    likelier one request refreshes the entry ahead of the others.
+    """
+    delta = float(fields.get(CacheStampede.FIELD_DELTA, 0))
+    return (
+        -delta * CacheStampede.XFETCH_BETA * math.log(1 - random.random())
+        >= fresh_ttl
+    )
+
+
+def cache_metrics() -> dict[str, dict[str, int]]:
+    """Return hit/miss counters of both cache tiers and of recomputes.
+
+    `l1` is the worker's `local_cache`, the L1 of `get_cache_backend`.
+    """
+    return {
+        "l1": local_cache.metrics(),
+        "l2": dict(L2_METRICS),
+        "single_flight": dict(FLIGHT_METRICS),
+        "compression": dict(COMPRESSION_METRICS),
+    }
+
+
+async def invalidate_tags(
+    tags: Iterable[Any], backend: CacheBackend | None = None
+) -> int:
+    """Delete every cache entry tagged with one of `tags`.
+
+    Deleted entries are dropped from the local cache (of every worker,
+    with the Redis backend).
 
     Returns:
-    int: Remaining time in seconds. Returns -1 if the key has no expiration,
-             and -2 if the key does not exist.
+        int: Number of deleted entries.
     """
-    redis_client: Redis = await setup_redis()
-    try:
-        ttl = await redis_client.ttl(cache_key)
-        return ttl
-    except aioredis.RedisError as e:
-        raise e
+    backend = backend or await get_cache_backend()
+    keys = await backend.delete_tags(tags)
+    backend.local.discard(keys)
+    return len(keys)
 
 
 async def select_request_and_response(**kwargs) -> tuple[Request, Response]:
@@ -199,93 +340,210 @@ async def select_request_and_response(**kwargs) -> tuple[Request, Response]:
     return request, response
 
 
-def cache_count_limit_http_request_for_positive_response(
-    expire_in_day: int,
-    prefix_key: str,
-    match_limits: int,
-) -> Callable:
-    """Cache decorator for match POST.
+def json_bytes_response(
+    body: str | bytes,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """Wrap an already serialized JSON body into a Response.
 
-    If func return True  count limit += 1 else limit == limit.
-    """
-
-    def _decorator(function: Callable) -> Callable:
-
-        @wraps(function)
-        async def _wrapper(*args: Any, **kwargs: Any):
-            request, response = await select_request_and_response(**kwargs)
-
-            cache_key = gen_key(prefix_key=prefix_key, req=request)
-            cached_value = await get_cache(cache_key=cache_key)
+    Args:
+        body (str | bytes): Serialized JSON payload.
+        status_code (int): HTTP status of the response.
 
-            if cached_value and int(cached_value) >= match_limits:
-                raise_http_429()
+    Returns:
+        Response: Response sending the body as is, without re-encoding.
+    """
+    return Response(
+        content=body,
+        status_code=status_code,
+        media_type=MimeTypes.APPLICATION_JSON,
+    )
 
-            func_volume = await function(*args, **kwargs)
 
-            if func_volume:
-                limit_volume = (
-                    IntKeys.FIRST_MATCH + int(cached_value)
-                    if cached_value
-                    else IntKeys.FIRST_MATCH
-                )
-                await set_cache(
-                    cache_key=cache_key, value=limit_volume, ex=expire_in_day
-                )
+def encoded_response(
+    request: Request,
+    body: bytes,
+    encoding: str,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """Send a stored body, as is if the client accepts its encoding.
 
-            return func_volume
-
-        update_wrapper(_wrapper, function)
+    Args:
+        request (Request): Request with `Accept-Encoding`.
+        body (bytes): Stored body.
+        encoding (str): Encoding of `body`.
+        status_code (int): HTTP status of the response.
 
-        return _wrapper
+    Returns:
+        Response: Compressed response, or the decompressed body.
+    """
+    if not accepts_encoding(request, encoding):
+        return json_bytes_response(decompress(body, encoding), status_code)
 
-    return _decorator
+    response = json_bytes_response(body, status_code)
+    if encoding != CacheCompression.IDENTITY:
+        response.headers[Headers.CONTENT_ENCODING] = encoding
+    return response
 
 
-def cache_list_location(expire: int, prefix_key: str) -> Callable:
-    """Cache decorator for POST api/location."""
+def cache_list_location(
+    expire: int,
+    prefix_key: str,
+    status_code: int = status.HTTP_200_OK,
+    key_builder: (
+        Callable[[str, Request, dict[str, Any]], Awaitable[str | None]] | None
+    ) = None,
+    tags_builder: Callable[[Request], Iterable[Any]] | None = None,
+    stale: int = 0,
+    backend: CacheBackend | None = None,
+) -> Callable:
+    """Cache decorator for POST api/location.
+
+    The wrapped dependency must not declare DB dependencies (`get_session`,
+    `get_crud`): FastAPI resolves them before the wrapper runs, so a HIT or
+    a 304 would still build a session. Open the session in the body instead.
+
+    The decorated dependency returns a ready `Response`: a MISS serializes
+    and compresses the model once and stores exactly those bytes, a HIT
+    sends the stored bytes without validating, re-encoding or
+    recompressing them. Entries are read from the L1 of `backend`
+    (`get_cache_backend` if None) first, then from the backend.
+
+    `key_builder(prefix_key, request, kwargs)` replaces the per-user
+    `gen_key`, e.g. to share entries between users; a None key skips the
+    cache for that call. `tags_builder(request)` tags a stored entry, see
+    `invalidate_tags`.
+
+    Recomputes are single-flight: only the holder of the entry's lease
+    runs the body. Entries are kept `stale` seconds past `expire`;
+    meanwhile the others get the stale entry, or wait for the new one if
+    there is none. Entries are also refreshed a little early (XFetch),
+    so a hot key is usually recomputed before it goes stale.
+    """
 
     def _decorator(function: Callable) -> Callable:
-        return_type = get_typed_return_annotation(function)
-
-        @wraps(function)
-        async def _wrapper(*args: Any, **kwargs: Any):
-            request, response = await select_request_and_response(**kwargs)
 
-            cache_key = gen_key(prefix_key=prefix_key, req=request)
-
-            cached_value = await get_cache(cache_key=cache_key)
-
-            if cached_value is None:
-                data_response = await function(*args, **kwargs)
-
-                cached_value = serialize_data(data_response)
-
-                await set_cache(
-                    cache_key=cache_key, value=cached_value, ex=expire
+        def _cached(
+            request: Request, fields: dict[str, Any], exp: int
+        ) -> Response:
+            cached_value = fields[CacheStampede.FIELD_BODY]
+            encoding = fields.get(
+                CacheStampede.FIELD_ENCODING, CacheCompression.IDENTITY
+            )
+            # Entries written before the tag was stored hash the body.
+            etag = fields.get(CacheStampede.FIELD_ETAG) or gen_etag(
+                decompress(cached_value, encoding)
+            )
+
+            if check_etag(request=request, etag=etag):
+                response = Response(status_code=HTTP_304_NOT_MODIFIED)
+            else:
+                response = encoded_response(
+                    request, cached_value, encoding, status_code
                 )
-                set_response_headers(response, expire, cached_value)
-
-                return data_response
-
+            set_response_headers(
+                response=response,
+                exp=exp,
+                cached_value=cached_value,
+                update=True,
+                etag=etag,
+            )
+            return response
+
+        async def _recompute(
+            store: CacheBackend,
+            cache_key: str,
+            args: tuple[Any, ...],
+            kwargs: dict[str, Any],
+        ) -> Response:
+            request, _ = await select_request_and_response(**kwargs)
+            started = time.perf_counter()
+            data_response = await function(*args, **kwargs)
+
+            cached_value = serialize_data(data_response).encode(
+                TypeEncoding.UTF8
+            )
+            etag = gen_etag(cached_value)
+            body, encoding = compress(cached_value, cache_encoding())
+            COMPRESSION_METRICS["raw_bytes"] += len(cached_value)
+            COMPRESSION_METRICS["stored_bytes"] += len(body)
+
+            await set_cache_entry(
+                cache_key=cache_key,
+                fields={
+                    CacheStampede.FIELD_BODY: body,
+                    CacheStampede.FIELD_ENCODING: encoding,
+                    CacheStampede.FIELD_LENGTH: str(len(cached_value)),
+                    CacheStampede.FIELD_ETAG: etag,
+                    CacheStampede.FIELD_DELTA: (
+                        f"{time.perf_counter() - started:.4f}"
+                    ),
+                },
+                ex=expire + stale,
+                tags=tags_builder(request) if tags_builder else (),
+                backend=store,
+            )
+            FLIGHT_METRICS["recomputes"] += 1
+
+            # A recomputed body equal to the client's copy has its tag.
+            if check_etag(request=request, etag=etag):
+                response = Response(status_code=HTTP_304_NOT_MODIFIED)
             else:
-                exp = await get_cache_ttl(cache_key=cache_key)
-
-                set_response_headers(
-                    response=response,
-                    exp=exp,
-                    cached_value=cached_value,
-                    update=True,
+                response = encoded_response(
+                    request, body, encoding, status_code
                 )
+            set_response_headers(response, expire, cached_value, etag=etag)
 
-                if check_etag(request=request, response=response):
-                    return Response(status_code=HTTP_304_NOT_MODIFIED)
+            return response
 
-                data_response = deserialize_data(
-                    data=cached_value, return_type=return_type
-                )
+        @wraps(function)
+        async def _wrapper(*args: Any, **kwargs: Any) -> Response:
+            request, _ = await select_request_and_response(**kwargs)
 
-                return data_response
+            if key_builder is None:
+                cache_key = gen_key(prefix_key=prefix_key, req=request)
+            else:
+                cache_key = await key_builder(prefix_key, request, kwargs)
+                if cache_key is None:
+                    data_response = await function(*args, **kwargs)
+                    return json_bytes_response(
+                        serialize_data(data_response), status_code
+                    )
+
+            store = backend or await get_cache_backend()
+            entry = await get_cache_entry(cache_key, store)
+
+            if entry is not None:
+                fields, ttl = entry
+                fresh_ttl = ttl - stale
+                if fresh_ttl > 0 and not refresh_early(fields, fresh_ttl):
+                    return _cached(request, fields, fresh_ttl)
+
+            token = await acquire_lock(cache_key, store)
+
+            if token is None:
+                if entry is not None:
+                    fields, ttl = entry
+                    if ttl <= stale:
+                        FLIGHT_METRICS["stale_served"] += 1
+                    return _cached(request, fields, max(ttl - stale, 0))
+
+                entry = await wait_for_entry(cache_key, store)
+                if entry is not None:
+                    FLIGHT_METRICS["coalesced"] += 1
+                    fields, ttl = entry
+                    return _cached(request, fields, max(ttl - stale, 0))
+
+                FLIGHT_METRICS["wait_timeouts"] += 1
+
+            elif entry is not None and entry[1] > stale:
+                FLIGHT_METRICS["early_refreshes"] += 1
+
+            try:
+                return await _recompute(store, cache_key, args, kwargs)
+            finally:
+                if token is not None:
+                    await release_lock(cache_key, token, store)
 
         return _wrapper
 
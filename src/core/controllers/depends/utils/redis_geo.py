@@ -0,0 +1,119 @@
+"""Redis GEO mirror of user locations.
+
+Every location is mirrored as a member of the `RedisGeo.KEY` GEO set
+(`GEOADD` on registration). `NearbyEngine.REDIS_GEO` answers radius
+queries with `GEOSEARCH ... BYRADIUS ASC COUNT` and Postgres only reads
+the profiles of the ids Redis returned. When Redis is unavailable (or
+the user is not mirrored yet) /list falls back to the Postgres engines,
+and so it does when the area holds more than `RedisGeo.MAX_CANDIDATES`
+users: the candidate list would cut off the last pages. Fallbacks are
+counted under `geo_fallbacks` in `failure_metrics`.
+"""
+
+import uuid
+from collections.abc import Iterable
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from src.core.controllers.depends.utils.failure_log import FailureLog
+from src.core.controllers.depends.utils.redis_chash import setup_redis
+from src.core.settings.constants import NearbyEngine, RedisGeo
+from src.core.settings.env import settings
+
+mirror_failed = FailureLog(
+    name="geo_mirror", message="Location is not mirrored to Redis GEO"
+)
+search_failed = FailureLog(
+    name="geo_fallbacks", message="Redis GEO cannot answer, fallback to SQL"
+)
+
+
+class TooManyCandidates(Exception):
+    """The area holds more users than a GEO search may return."""
+
+
+def geo_member(user_id: uuid.UUID | str) -> str:
+    """Return the GEO set member of a user: the canonical UUID string."""
+    return str(uuid.UUID(str(user_id)))
+
+
+async def mirror_location(
+    user_id: str, latitude: float, longitude: float
+) -> None:
+    """Add or move a user in the GEO set.
+
+    Failures are only logged: the location is already committed and the
+    reconciliation task resyncs the set from `locations`.
+    """
+    if not settings.nearby.NEARBY_GEO_MIRROR:
+        return
+
+    redis = await setup_redis()
+    try:
+        await redis.geoadd(
+            RedisGeo.KEY, (longitude, latitude, geo_member(user_id))
+        )
+    except RedisError as e:
+        mirror_failed(e)
+
+
+async def search_nearby(
+    user_id: str,
+    radius: float,
+    count: int = RedisGeo.MAX_CANDIDATES,
+    redis: Redis | None = None,
+) -> list[tuple[str, float]]:
+    """Return all users within `radius` meters, nearest first.
+
+    One more than `count` users is asked for, to tell a full area from
+    a cut one.
+
+    Raises:
+        RedisError: Redis is unavailable or the user is not in the set.
+        TooManyCandidates: More than `count` users are within `radius`.
+    """
+    redis = redis or await setup_redis()
+    found = await redis.geosearch(
+        RedisGeo.KEY,
+        member=geo_member(user_id),
+        radius=radius,
+        unit=RedisGeo.UNIT,
+        sort="ASC",
+        count=count + 1,
+        withdist=True,
+    )
+    if len(found) > count:
+        raise TooManyCandidates(
+            f"more than {count} users within {radius} {RedisGeo.UNIT}"
+        )
+    return [(str(member), float(distance)) for member, distance in found]
+
+
+def fallback_engine_name() -> str:
+    """Return the Postgres engine used when Redis GEO cannot answer."""
+    name = settings.nearby.NEARBY_ENGINE
+    return NearbyEngine.H3 if name == NearbyEngine.REDIS_GEO else name
+
+
+def record_fallback(error: RedisError | TooManyCandidates) -> None:
+    """Count a search Redis GEO could not answer, warn now and then."""
+    search_failed(error)
+
+
+async def sync_locations(
+    redis: Redis, rows: Iterable[tuple[str, float, float]]
+) -> int:
+    """GEOADD a batch of (user id, latitude, longitude) in one command.
+
+    Returns:
+        int: Number of members sent.
+    """
+    values: list[float | str] = []
+    count = 0
+    for user_id, latitude, longitude in rows:
+        values.extend((longitude, latitude, geo_member(user_id)))
+        count += 1
+    if values:
+        await redis.geoadd(RedisGeo.KEY, values)
+    return count
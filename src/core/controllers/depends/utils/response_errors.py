@@ -4,7 +4,7 @@ import uuid
 
 from fastapi import HTTPException, status
 
-from src.core.settings.constants import Headers, MessageError
+from src.core.settings.constants import Headers, MessageError, PasswordPool
 from src.core.validators.error import ErrorMessage
 
 
@@ -104,12 +104,13 @@ def valid_id_or_error_422(id_data: str):
         )
 
 
-def raise_http_429():
-    """Raise HTTP 429."""
+def raise_http_429(headers: dict[str, str] | None = None):
+    """Raise HTTP 429, `headers` e.g. `Retry-After`."""
     raise http_exception(
         status_code=status.HTTP_429_TOO_MANY_REQUESTS,
         error_type=MessageError.TYPE_ERROR_429,
         error_message=MessageError.MESSAGE_429_LIMIT,
+        headers=headers,
     )
 
 
@@ -124,3 +125,17 @@ def raise_http_404(
         error_type=error_type,
         error_message=error_message,
     )
+
+
+def raise_http_503(
+    error_type: str = MessageError.TYPE_ERROR_503,
+    error_message: str = MessageError.MESSAGE_503_BUSY,
+    retry_after: int = PasswordPool.RETRY_AFTER_SECONDS,
+):
+    """Raise HTTP 503 when a bounded worker pool is saturated."""
+    raise http_exception(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        error_type=error_type,
+        error_message=error_message,
+        headers={Headers.RETRY_AFTER: str(retry_after)},
+    )
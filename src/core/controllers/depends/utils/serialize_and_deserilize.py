@@ -1,71 +1,88 @@
 # type: ignore
 """Serialize and deserialize module."""
+
 import json
-from typing import Any, Type, cast
+from typing import Any, Sequence, cast
 
 import pydantic
 from fastapi.responses import JSONResponse
 
 from src.core.controllers.depends.utils.geo import (
-    get_location_params_by_auth_user,
+    get_location_params_batch,
 )
-from src.core.validators.dto import LocationData, UsersDataGeo
+from src.core.settings.constants import LocationH3
+from src.core.validators.dto import UsersDataGeo
 from src.core.validators.user import User, UsersCollection
 
+USERS_ADAPTER = pydantic.TypeAdapter(list[User])
+
 
 def deserialize_data_to_user_obj(
     users_data: "UsersDataGeo",
 ) -> "UsersCollection":
-    """Deserialize data to UsersCollection object."""
-    users: list[User] = []
+    """Deserialize data to UsersCollection object.
 
-    for user, loc in zip(users_data.users_data, users_data.loc_data):
-        geo: LocationData = get_location_params_by_auth_user(
+    Exact mode takes the stored points and PostGIS distances of the rows,
+    otherwise cell centers and distances are computed in one batch. The
+    distances an engine measured itself (`distance_field`, Redis GEO)
+    replace the distances between cell centers.
+    """
+    rows = list(users_data.rows or ())
+    if not rows:
+        return UsersCollection(users=[])
+
+    if users_data.exact:
+        lats = [getattr(row, LocationH3.FIELD_LATITUDE) for row in rows]
+        lons = [getattr(row, LocationH3.FIELD_LONGITUDE) for row in rows]
+        distances = [
+            getattr(row, LocationH3.FIELD_GEODESIC_DISTANCE) / 1000
+            for row in rows
+        ]
+    else:
+        cell_lats, cell_lons, cell_distances = get_location_params_batch(
             auth_location=users_data.auth_location,
-            user_location=getattr(loc, users_data.field_name),
-            exact=users_data.exact,
+            user_locations=[
+                getattr(row, LocationH3.FIELD_H3_CELL) for row in rows
+            ],
+            exact=False,
+        )
+        lats = cell_lats.tolist()
+        lons = cell_lons.tolist()
+        distances = (
+            [getattr(row, users_data.distance_field) / 1000 for row in rows]
+            if users_data.distance_field
+            else cell_distances.tolist()
         )
-        if geo.distance > 0 or users_data.exact:
-            user_model = make_model(user, geo)
-            users.append(user_model)
-
-    return UsersCollection(users=users)
-
-
-def make_model(user, geo) -> "User":
-    """Maker User."""
-    return User(
-        id=str(user.id),
-        firstname=user.first_name,
-        lastname=user.last_name,
-        sex=user.sex,
-        lat=geo.lat,
-        lon=geo.lon,
-        distance=geo.distance,
-        avatar_path=user.avatar_path,
-    )
 
+    return UsersCollection(users=make_models(rows, lats, lons, distances))
 
-def deserialize_data(data: Any, return_type: Type[pydantic.BaseModel]) -> Any:
-    """Convert JSON string to Pydantic model.
 
-    Args:
-        data (str): JSON string to deserialize.
-        return_type (Type[pydantic.BaseModel]): Target model type.
+def make_models(
+    rows: Sequence[Any],
+    lats: Sequence[float],
+    lons: Sequence[float],
+    distances: Sequence[float],
+) -> list["User"]:
+    """Bulk maker User.
 
-    Returns:
-        pydantic.BaseModel: Deserialized data model.
+    All rows are validated in one `TypeAdapter` call, which runs inside
+    pydantic-core instead of building models one by one.
     """
-    try:
-        if isinstance(data, str):
-            return return_type(**json.loads(data))
-        if isinstance(data, pydantic.BaseModel):
-            return return_type(**data.model_dump())
-
-        raise pydantic.ValidationError
-
-    except pydantic.ValidationError as e:
-        raise e
+    return USERS_ADAPTER.validate_python(
+        [
+            {
+                "id": str(row.id),
+                "firstname": row.first_name,
+                "lastname": row.last_name,
+                "sex": row.sex,
+                "lat": lat,
+                "lon": lon,
+                "distance": distance,
+                "avatar_path": row.avatar_path,
+            }
+            for row, lat, lon, distance in zip(rows, lats, lons, distances)
+        ]
+    )
 
 
 def serialize_data(data: Any) -> str:
@@ -6,14 +6,24 @@ from src.core.controllers.depends.utils.jwt_token import decode_jwt
 from src.core.settings.constants import JWT, LiterKeys
 
 
+def get_token_payload(request: Request) -> dict | None:
+    """Return payload decoded earlier in this request by `token_is_alive`."""
+    payload = getattr(request.state, LiterKeys.TOKEN_PAYLOAD_STATE, None)
+    return payload.copy() if payload is not None else None
+
+
 def get_user_id_from_token(request: Request) -> str | None:
     """Get user id from token."""
-    token = request.headers.get(LiterKeys.AUTH_HEADER)[
-        LiterKeys.AUTH_HEADER_PREF_BEARER :  # noqa E203
-    ]
-    if not token:
-        return None
-    data_token = decode_jwt(jwt_token=token)
+    data_token = get_token_payload(request=request)
+
+    if data_token is None:
+        token = request.headers.get(LiterKeys.AUTH_HEADER)[
+            LiterKeys.AUTH_HEADER_PREF_BEARER :  # noqa E203
+        ]
+        if not token:
+            return None
+        data_token = decode_jwt(jwt_token=token)
+
     type_token = data_token.pop(JWT.TOKEN_TYPE_FIELD)
     if type_token == JWT.TOKEN_TYPE_ACCESS:
         return data_token.get(JWT.PAYLOAD_SUB_KEY)
@@ -3,20 +3,26 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Response, status
 from geopy.distance import distance
 
+from src.core.controllers.depends.distance_matrix import (
+    compute_distance_matrix,
+)
 from src.core.controllers.depends.get_users_near_auth import (
     location_near_auth_user,
 )
 from src.core.settings.constants import (
     LocationRoutes,
-    MimeTypes,
     Response500,
+    ResponsesDistanceMatrix,
     ResponsesLocationUser,
 )
-from src.core.validators.distance import DistanceRequest, DistanceResponse
+from src.core.validators.distance import (
+    DistanceMatrixResponse,
+    DistanceRequest,
+    DistanceResponse,
+)
 from src.core.validators.user import UsersCollection
 
 
@@ -41,14 +47,13 @@ location: APIRouter = create_location_route()
     responses=ResponsesLocationUser.responses,
 )
 async def get_locations_near_auth_user(
-    users: Annotated[UsersCollection, Depends(location_near_auth_user)],
-) -> "JSONResponse":
-    """**Get locations of users_data near authenticated user**."""
-    return JSONResponse(
-        content=users.model_dump(),
-        status_code=status.HTTP_201_CREATED,
-        media_type=MimeTypes.APPLICATION_JSON,
-    )
+    users: Annotated[Response, Depends(location_near_auth_user)],
+) -> "Response":
+    """**Get locations of users_data near authenticated user**.
+
+    The dependency returns the cached JSON bytes (or a 304) as is.
+    """
+    return users
 
 
 @location.post(
@@ -62,3 +67,20 @@ async def get_distance(locations: DistanceRequest) -> "DistanceResponse":
     return DistanceResponse(
         kilometers=distance(locations.location_a, locations.location_b).km
     )
+
+
+@location.post(
+    path=LocationRoutes.GET_DISTANCE_MATRIX_PATH,
+    status_code=status.HTTP_200_OK,
+    response_model=DistanceMatrixResponse,
+    responses=ResponsesDistanceMatrix.responses,
+)
+async def get_distance_matrix(
+    distances: Annotated[Response, Depends(compute_distance_matrix)],
+) -> "Response":
+    """**Get distances between many locations in one request**.
+
+    Either every origin to every destination (a row per origin), or a
+    list of pairs. Large results are streamed.
+    """
+    return distances
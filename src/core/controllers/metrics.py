@@ -0,0 +1,29 @@
+"""Metrics routes."""
+
+from typing import Any
+
+from fastapi import APIRouter, status
+
+from src.core.controllers.depends.utils.metrics import collect_metrics
+from src.core.settings.constants import MetricsRoutes
+
+
+def create_metrics_route() -> APIRouter:
+    """Create metrics router.
+
+    Returns:
+        APIRouter: Router with the metrics route.
+    """
+    return APIRouter(tags=[MetricsRoutes.TAG])
+
+
+metrics: APIRouter = create_metrics_route()
+
+
+@metrics.get(
+    path=MetricsRoutes.METRICS_PATH,
+    status_code=status.HTTP_200_OK,
+)
+async def get_metrics() -> dict[str, Any]:
+    """**Get counters of the worker that answers**."""
+    return collect_metrics()
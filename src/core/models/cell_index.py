@@ -0,0 +1,242 @@
+"""Memory-mapped H3 cell -> user ids index shared by workers.
+
+The file holds every `(h3_index_9, user_id)` of `locations`, sorted by
+cell then id, in two contiguous sections::
+
+    header | cells: int64[count] | user ids: 16 bytes[count]
+
+Workers map it read-only, so the OS page cache keeps a single copy for
+all of them. Any resolution 3..9 is served from the res-9 column: the
+cell ranges of `geo.get_near_ranges` are two binary searches each, and
+the parent cell at the search resolution is pure bit arithmetic.
+
+Users added after the file was built are held in a small per-worker
+overlay, filled from the deltas published on insert.
+"""
+
+import os
+import struct
+import time
+import uuid
+from collections.abc import Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.models.models.location import LocationORM
+from src.core.settings.constants import CellIndexConf, LocationH3
+
+HEADER = struct.Struct("<8sqd")
+UID_DTYPE = np.dtype(f"S{CellIndexConf.UID_SIZE}")
+
+
+def parent_cells(cells: np.ndarray, resolution: int) -> np.ndarray:
+    """Return parents of res-9 cells at `resolution` (vectorized).
+
+    Same as `h3.cell_to_parent`: set the resolution field and mark the
+    digits below it as unused (7).
+    """
+    unused = 0
+    for digit in range(resolution + 1, LocationH3.H3_MAX_DIGITS + 1):
+        unused |= CellIndexConf.H3_UNUSED_DIGIT << (
+            LocationH3.H3_DIGIT_BITS * (LocationH3.H3_MAX_DIGITS - digit)
+        )
+    return (
+        (cells & ~np.int64(CellIndexConf.H3_RESOLUTION_MASK))
+        | np.int64(resolution << CellIndexConf.H3_RESOLUTION_OFFSET)
+        | np.int64(unused)
+    )
+
+
+def uid_bytes(user_id: uuid.UUID | str) -> bytes:
+    """Return 16 bytes of user id, ordered as Postgres orders UUIDs."""
+    if not isinstance(user_id, uuid.UUID):
+        user_id = uuid.UUID(str(user_id))
+    return user_id.bytes
+
+
+async def build_cell_index(session: AsyncSession, path: str) -> int:
+    """Write the index file of all locations, atomically replacing `path`.
+
+    Returns:
+        int: Number of indexed users.
+    """
+    built_at = time.time()
+    cells: list[np.ndarray] = []
+    uids: list[np.ndarray] = []
+
+    result = await session.stream(
+        select(LocationORM.h3_index_9, LocationORM.user_id)
+        .order_by(LocationORM.h3_index_9, LocationORM.user_id)
+        .execution_options(yield_per=CellIndexConf.BUILD_BATCH)
+    )
+    async for partition in result.partitions():
+        cells.append(np.fromiter((row[0] for row in partition), np.int64))
+        uids.append(
+            np.array([uid_bytes(row[1]) for row in partition], UID_DTYPE)
+        )
+
+    all_cells = np.concatenate(cells) if cells else np.empty(0, np.int64)
+    all_uids = np.concatenate(uids) if uids else np.empty(0, UID_DTYPE)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(CellIndexConf.MAGIC, len(all_cells), built_at))
+        file.write(all_cells.tobytes())
+        file.write(all_uids.tobytes())
+    os.replace(tmp_path, path)
+
+    return len(all_cells)
+
+
+def read_built_at(path: str) -> float | None:
+    """Return build time of the index file, None if there is none."""
+    try:
+        with open(path, "rb") as file:
+            magic, _, built_at = HEADER.unpack(file.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return built_at if magic == CellIndexConf.MAGIC else None
+
+
+class CellIndex:
+    """Read side of the index file plus the overlay of recent inserts."""
+
+    def __init__(self, path: str) -> None:
+        """Initialize an empty index, `load` maps the file."""
+        self.path = path
+        self.built_at = 0.0
+        self._cells: np.ndarray | None = None
+        self._uids: np.ndarray | None = None
+        self._overlay: dict[bytes, tuple[int, float]] = {}
+
+    @property
+    def ready(self) -> bool:
+        """Return True when the file is mapped."""
+        return self._cells is not None
+
+    @property
+    def size(self) -> int:
+        """Return number of users in the file and the overlay."""
+        base = 0 if self._cells is None else len(self._cells)
+        return base + len(self._overlay)
+
+    def load(self) -> bool:
+        """Map the index file, drop overlay entries it already contains.
+
+        Returns:
+            bool: True if the file was (re)mapped.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                magic, count, built_at = HEADER.unpack(file.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+
+        if magic != CellIndexConf.MAGIC:
+            return False
+
+        cells: np.ndarray
+        uids: np.ndarray
+        if count:
+            cells = np.memmap(
+                self.path, np.int64, "r", offset=HEADER.size, shape=(count,)
+            )
+            uids = np.memmap(
+                self.path,
+                UID_DTYPE,
+                "r",
+                offset=HEADER.size + cells.nbytes,
+                shape=(count,),
+            )
+        else:
+            cells = np.empty(0, np.int64)
+            uids = np.empty(0, UID_DTYPE)
+
+        self._cells, self._uids, self.built_at = cells, uids, built_at
+        self._overlay = {
+            key: value
+            for key, value in self._overlay.items()
+            if value[1] >= built_at
+        }
+        return True
+
+    def apply_delta(
+        self, user_id: uuid.UUID | str, cell: int, published_at: float
+    ) -> None:
+        """Add or move a user in the overlay."""
+        if published_at >= self.built_at:
+            self._overlay[uid_bytes(user_id)] = (cell, published_at)
+
+    def lookup(
+        self,
+        h3_ranges: Sequence[tuple[int, int]],
+        resolution: int,
+        exclude_user: uuid.UUID | str,
+        exclude_cell: int | None = None,
+        after: tuple[int, uuid.UUID] | None = None,
+        limit: int | None = None,
+    ) -> list[tuple[int, uuid.UUID]]:
+        """Return a page of (cell at `resolution`, user id) in the ranges.
+
+        Ordered and paged like the H3 engine: by (cell, user id), after
+        the keyset `after`, at most `limit` entries.
+        """
+        if self._cells is None or self._uids is None:
+            raise RuntimeError("Cell index is not loaded.")
+
+        cells_parts: list[np.ndarray] = []
+        uids_parts: list[np.ndarray] = []
+        for low, high in h3_ranges:
+            start = np.searchsorted(self._cells, low, side="left")
+            stop = np.searchsorted(self._cells, high, side="right")
+            if start < stop:
+                cells_parts.append(self._cells[start:stop])
+                uids_parts.append(self._uids[start:stop])
+
+        if self._overlay:
+            overlay_uids = np.array(list(self._overlay), UID_DTYPE)
+            overlay_cells = np.fromiter(
+                (cell for cell, _ in self._overlay.values()), np.int64
+            )
+            if cells_parts:
+                keep = [~np.isin(part, overlay_uids) for part in uids_parts]
+                cells_parts = [c[k] for c, k in zip(cells_parts, keep)]
+                uids_parts = [u[k] for u, k in zip(uids_parts, keep)]
+
+            inside: np.ndarray = np.zeros(len(overlay_cells), dtype=bool)
+            for low, high in h3_ranges:
+                inside |= (overlay_cells >= low) & (overlay_cells <= high)
+            cells_parts.append(overlay_cells[inside])
+            uids_parts.append(overlay_uids[inside])
+
+        if not cells_parts:
+            return []
+
+        cells: np.ndarray = parent_cells(
+            np.concatenate(cells_parts), resolution
+        )
+        uids: np.ndarray = np.concatenate(uids_parts)
+
+        keep = uids != np.bytes_(uid_bytes(exclude_user))
+        if exclude_cell is not None:
+            keep &= cells != exclude_cell
+        if after is not None:
+            after_cell, after_uid = after
+            after_bytes = np.bytes_(uid_bytes(after_uid))
+            keep &= (cells > after_cell) | (
+                (cells == after_cell) & (uids > after_bytes)
+            )
+        cells, uids = cells[keep], uids[keep]
+
+        order = np.lexsort((uids, cells))
+        if limit is not None:
+            order = order[:limit]
+
+        # `S16` items drop trailing zero bytes, pad them back.
+        size = CellIndexConf.UID_SIZE
+        return [
+            (int(cells[i]), uuid.UUID(bytes=uids[i].ljust(size, b"\0")))
+            for i in order
+        ]
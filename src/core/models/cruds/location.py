@@ -1,13 +1,38 @@
 """Location CRUD methods."""
 
-from collections.abc import Iterable
+from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import ClassVar
 
 from geoalchemy2.types import Geometry
-from sqlalchemy import func, select
+from sqlalchemy import (
+    UUID,
+    BigInteger,
+    ColumnElement,
+    Float,
+    Row,
+    ScalarSelect,
+    Select,
+    column,
+    func,
+    literal,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from src.core.models.models.auth import AuthORM
 from src.core.models.models.location import LocationORM
-from src.core.settings.constants import LocationH3
+from src.core.models.models.user import UserORM
+from src.core.settings.constants import (
+    LocationH3,
+    NearbyEngine,
+    Pagination,
+    RedisGeo,
+)
+from src.core.validators.dto import NearbyArea
 
 
 class Locations:
@@ -18,7 +43,7 @@ class Locations:
         location: dict,
         session: AsyncSession,
         location_table: type[LocationORM] = LocationORM,
-    ) -> None:
+    ) -> LocationORM:
         """Create a new location by user id."""
         latitude = location[LocationH3.FIELD_LOCATION][
             LocationH3.FIELD_LATITUDE_INDEX
@@ -35,6 +60,8 @@ class Locations:
 
         session.add(new_location)
 
+        return new_location
+
     @staticmethod
     async def get_location_auths_user(
         user_id: str,
@@ -60,6 +87,60 @@ class Locations:
 
         return longitude, latitude
 
+    @staticmethod
+    def points_query(
+        location_table: type[LocationORM] = LocationORM,
+    ) -> Select:
+        """Select (user id, latitude, longitude) of every location."""
+        point = location_table.location.cast(
+            Geometry(
+                geometry_type=LocationH3.GEOMETRY_TYPE,
+                srid=LocationH3.SRID,
+            )
+        )
+        return select(
+            location_table.user_id,
+            func.ST_Y(point).label(LocationH3.FIELD_LATITUDE),
+            func.ST_X(point).label(LocationH3.FIELD_LONGITUDE),
+        )
+
+    @staticmethod
+    def cell_counts_query(
+        resolution: int,
+        location_table: type[LocationORM] = LocationORM,
+    ) -> Select:
+        """Select (cell, users) of every cell at `resolution`."""
+        cell = getattr(
+            location_table, LocationH3.FIELD_H3_INDEX.format(resolution)
+        )
+        return select(cell, func.count()).group_by(cell)
+
+    @staticmethod
+    async def get_h3_indexes(
+        auth_id: str,
+        session: AsyncSession,
+        location_table: type["LocationORM"] = LocationORM,
+    ) -> dict[int, int] | None:
+        """Get h3 indexes of every resolution by user id."""
+        resolutions = range(
+            LocationH3.H3_RESOLUTION_MIN, LocationH3.H3_RESOLUTION_MAX + 1
+        )
+        row = (
+            await session.execute(
+                select(
+                    *(
+                        getattr(
+                            location_table,
+                            LocationH3.FIELD_H3_INDEX.format(res),
+                        )
+                        for res in resolutions
+                    )
+                ).where(location_table.user_id == auth_id)
+            )
+        ).first()
+
+        return dict(zip(resolutions, row)) if row else None
+
     @staticmethod
     async def get_h3_index_by_resolution(
         auth_id: str,
@@ -77,22 +158,331 @@ class Locations:
         return user_location
 
     @staticmethod
-    async def near_location(
+    def location_of(
         user_id: str,
-        field_h3_index: str,
-        session: AsyncSession,
-        h3_indexes: list,
         location_table: type["LocationORM"] = LocationORM,
-    ) -> Iterable["LocationORM"]:
-        """Return nearest h3 index by user id."""
-        nearby_locations = await session.execute(
+    ) -> ScalarSelect:
+        """Return scalar subquery of the user's point."""
+        user_location = aliased(location_table)
+        return (
+            select(user_location.location)
+            .where(user_location.user_id == user_id)
+            .scalar_subquery()
+        )
+
+    @staticmethod
+    def near_users_query(
+        area: NearbyArea,
+        filters: dict | None = None,
+        sort_by_created: bool | None = None,
+        exclude_h3_index: int | None = None,
+        limit: int | None = None,
+        after: tuple | None = None,
+        engine: "NearbySearchEngine | None" = None,
+        exact: bool = False,
+        location_table: type["LocationORM"] = LocationORM,
+        user_table: type["UserORM"] = UserORM,
+        auth_table: type["AuthORM"] = AuthORM,
+    ) -> Select:
+        """Build the statement of `near_users`.
+
+        `engine` restricts `locations` to the area and gives the default
+        keyset, the profile columns, filters and paging are common.
+        `exact` adds the stored point and its geodesic distance to the
+        user (`ST_Distance` on the spheroid, meters).
+        """
+        engine = engine or get_nearby_engine(NearbyEngine.H3)
+        h3_field = getattr(location_table, area.field_name)
+
+        query, keyset = engine.restrict(
             select(
-                location_table.user_id,
-                getattr(location_table, field_h3_index),
-            ).where(
-                getattr(location_table, field_h3_index).in_(h3_indexes),
-                location_table.user_id != user_id,
+                user_table.id,
+                user_table.first_name,
+                user_table.last_name,
+                user_table.sex,
+                user_table.avatar_path,
+                h3_field.label(LocationH3.FIELD_H3_CELL),
+            ),
+            area=area,
+            location_table=location_table,
+        )
+        query = query.join(
+            user_table, user_table.id == location_table.user_id
+        ).where(location_table.user_id != area.user_id)
+
+        if exact:
+            point = location_table.location.cast(
+                Geometry(
+                    geometry_type=LocationH3.GEOMETRY_TYPE,
+                    srid=LocationH3.SRID,
+                )
+            )
+            query = query.add_columns(
+                func.ST_Y(point).label(LocationH3.FIELD_LATITUDE),
+                func.ST_X(point).label(LocationH3.FIELD_LONGITUDE),
+                func.ST_Distance(
+                    location_table.location,
+                    Locations.location_of(area.user_id, location_table),
+                ).label(LocationH3.FIELD_GEODESIC_DISTANCE),
+            )
+
+        if exclude_h3_index is not None:
+            query = query.where(h3_field != exclude_h3_index)
+
+        if filters:
+            for key, value in filters.items():
+                query = query.where(getattr(user_table, key) == value)  # noqa
+
+        descending = False
+        if sort_by_created is not None:
+            query = query.join(
+                auth_table, user_table.id == auth_table.user_id
+            ).add_columns(
+                auth_table.created_at.label(LocationH3.FIELD_CREATED_AT)
+            )
+            keyset = (auth_table.created_at, location_table.user_id)
+            descending = sort_by_created
+
+        if after is not None:
+            bound = tuple_(
+                *(
+                    literal(value, type_=column.type)
+                    for column, value in zip(keyset, after)
+                )
+            )
+            query = query.where(
+                tuple_(*keyset) < bound
+                if descending
+                else tuple_(*keyset) > bound
+            )
+
+        query = query.order_by(
+            *(
+                column.desc() if descending else column.asc()
+                for column in keyset
+            )
+        )
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    @staticmethod
+    async def near_users(
+        area: NearbyArea,
+        session: AsyncSession,
+        filters: dict | None = None,
+        sort_by_created: bool | None = None,
+        exclude_h3_index: int | None = None,
+        limit: int | None = None,
+        after: tuple | None = None,
+        engine: "NearbySearchEngine | None" = None,
+        exact: bool = False,
+    ) -> Sequence[Row]:
+        """Return users in the area with their profiles.
+
+        One statement: every row already pairs the profile with its cell
+        (`LocationH3.FIELD_H3_CELL`), so no `IN (user_ids)` list is sent.
+        `engine` decides which rows are in the area, H3 cells by default.
+        With `exact` rows also carry the stored point and the distance
+        computed by PostGIS.
+
+        Rows are ordered by a keyset that ends with the user id: the
+        engine's one by default, (created_at, id) when `sort_by_created`
+        is set. `after` is the keyset of the last row already returned,
+        `limit` caps the number of rows.
+        """
+        result = await session.execute(
+            Locations.near_users_query(
+                area=area,
+                filters=filters,
+                sort_by_created=sort_by_created,
+                exclude_h3_index=exclude_h3_index,
+                limit=limit,
+                after=after,
+                engine=engine,
+                exact=exact,
             )
         )
+        return result.all()
+
+
+class NearbySearchEngine(ABC):
+    """Strategy of `Locations.near_users`: which rows are in the area."""
+
+    name: ClassVar[str]
+    sort_mode: ClassVar[str]
+    uses_h3_cover: ClassVar[bool] = False
+
+    @abstractmethod
+    def restrict(
+        self,
+        query: Select,
+        area: NearbyArea,
+        location_table: type["LocationORM"] = LocationORM,
+    ) -> tuple[Select, tuple[ColumnElement, ...]]:
+        """Add `locations` to the query and limit it to the area.
+
+        Returns:
+            tuple: The query and its default keyset, ending with user id.
+        """
+
+
+class H3CoverEngine(NearbySearchEngine):
+    """Users whose cell is in the H3 disk around the user.
+
+    `area.h3_ranges` are `h3_index_9` bounds (see `geo.get_near_ranges`),
+    sent as two array parameters and joined through `unnest`, so the
+    statement size does not depend on the radius. Ordered by cell.
+    """
+
+    name = NearbyEngine.H3
+    sort_mode = Pagination.SORT_CELL
+    uses_h3_cover = True
+
+    def restrict(
+        self,
+        query: Select,
+        area: NearbyArea,
+        location_table: type["LocationORM"] = LocationORM,
+    ) -> tuple[Select, tuple[ColumnElement, ...]]:
+        """Join `locations` on the cell ranges of the area."""
+        cover = (
+            func.unnest(
+                literal([low for low, _ in area.h3_ranges], ARRAY(BigInteger)),
+                literal(
+                    [high for _, high in area.h3_ranges], ARRAY(BigInteger)
+                ),
+            )
+            .table_valued(
+                column(LocationH3.COVER_LOW, BigInteger),
+                column(LocationH3.COVER_HIGH, BigInteger),
+            )
+            .render_derived(name=LocationH3.COVER_ALIAS)
+        )
+        query = query.select_from(cover).join(
+            location_table,
+            location_table.h3_index_9.between(
+                cover.c[LocationH3.COVER_LOW],
+                cover.c[LocationH3.COVER_HIGH],
+            ),
+        )
+        # Same columns as idx_locations_h3_index_N: index-only scan.
+        return query, (
+            getattr(location_table, area.field_name),
+            location_table.user_id,
+        )
+
+
+class PostGISEngine(NearbySearchEngine):
+    """Users whose point is within the radius, nearest first.
+
+    `ST_DWithin` and the `<->` KNN ordering both run on the GiST index
+    `idx_location_gist_clients`, so the edge of the area is exact and
+    the first page is read without scanning the whole disk.
+    """
+
+    name = NearbyEngine.POSTGIS
+    sort_mode = Pagination.SORT_DISTANCE
+
+    def restrict(
+        self,
+        query: Select,
+        area: NearbyArea,
+        location_table: type["LocationORM"] = LocationORM,
+    ) -> tuple[Select, tuple[ColumnElement, ...]]:
+        """Select `locations` within the radius, add distance column."""
+        center = Locations.location_of(area.user_id, location_table)
+        distance = location_table.location.op("<->", return_type=Float)(center)
+        query = (
+            query.select_from(location_table)
+            .where(
+                func.ST_DWithin(location_table.location, center, area.radius)
+            )
+            .add_columns(distance.label(LocationH3.FIELD_DISTANCE))
+        )
+        return query, (distance, location_table.user_id)
+
+
+class RedisGeoEngine(NearbySearchEngine):
+    """Users found by `GEOSEARCH` in the Redis GEO mirror, nearest first.
+
+    Redis resolves the radius and the order, `area.user_ids` and
+    `area.distances` are its answer. Postgres only joins the profiles
+    of those ids (primary key) and pages over (distance, id).
+    """
+
+    name = NearbyEngine.REDIS_GEO
+    sort_mode = Pagination.SORT_GEO_DISTANCE
+
+    def restrict(
+        self,
+        query: Select,
+        area: NearbyArea,
+        location_table: type["LocationORM"] = LocationORM,
+    ) -> tuple[Select, tuple[ColumnElement, ...]]:
+        """Join `locations` on the candidates, add their distance."""
+        candidates = (
+            func.unnest(
+                literal(list(area.user_ids), ARRAY(UUID)),
+                literal(list(area.distances), ARRAY(Float)),
+            )
+            .table_valued(
+                column(RedisGeo.FIELD_USER_ID, UUID),
+                column(LocationH3.FIELD_DISTANCE, Float),
+            )
+            .render_derived(name=RedisGeo.CANDIDATES_ALIAS)
+        )
+        distance = candidates.c[LocationH3.FIELD_DISTANCE]
+        query = (
+            query.select_from(candidates)
+            .join(
+                location_table,
+                location_table.user_id == candidates.c[RedisGeo.FIELD_USER_ID],
+            )
+            .add_columns(distance.label(LocationH3.FIELD_DISTANCE))
+        )
+        return query, (distance, location_table.user_id)
+
+
+class CellIndexEngine(NearbySearchEngine):
+    """Users already picked from the shared cell index.
+
+    Area, order and page were resolved in memory (`models.cell_index`),
+    only the rows of `area.user_ids` are read, by primary key.
+    """
+
+    name = NearbyEngine.CELL_INDEX
+    sort_mode = Pagination.SORT_CELL
+
+    def restrict(
+        self,
+        query: Select,
+        area: NearbyArea,
+        location_table: type["LocationORM"] = LocationORM,
+    ) -> tuple[Select, tuple[ColumnElement, ...]]:
+        """Select `locations` of the picked users."""
+        query = query.select_from(location_table).where(
+            location_table.user_id.in_(area.user_ids)
+        )
+        return query, (
+            getattr(location_table, area.field_name),
+            location_table.user_id,
+        )
+
+
+NEARBY_ENGINES: dict[str, NearbySearchEngine] = {
+    engine.name: engine
+    for engine in (
+        H3CoverEngine(),
+        PostGISEngine(),
+        RedisGeoEngine(),
+        CellIndexEngine(),
+    )
+}
+
 
-        return nearby_locations.all()
+def get_nearby_engine(name: str) -> NearbySearchEngine:
+    """Return nearby-search engine by name (`NearbyEngine.*`)."""
+    return NEARBY_ENGINES[name]
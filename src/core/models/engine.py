@@ -54,11 +54,16 @@ class HelperDB:
             class_=AsyncSession,
         )
 
+    @property
+    def session_factory(self) -> "async_sessionmaker[AsyncSession]":
+        """Return sessionmaker built once with the engine."""
+        return self._session
+
     @property
     def get_scoped_session(self) -> async_scoped_session[AsyncSession | Any]:
         """Return current scope."""
         return async_scoped_session(
-            session_factory=self.create_session(self.async_engine),
+            session_factory=self._session,
             scopefunc=current_task,
         )
 
@@ -73,6 +78,11 @@ class HelperDB:
             max_overflow=settings.db.MAX_OVERFLOW,
         )
 
+    @property
+    def is_initialized(self) -> bool:
+        """Return True once tables are created."""
+        return getattr(self, "_initialize_tables", False) is True
+
     async def initialize(self):
         """Initialize the database by creating tables."""
         if self._initialize_tables is False:
@@ -90,8 +100,28 @@ lock = asyncio.Lock()
 
 
 async def get_engine(url: str, echo: bool) -> "HelperDB":
-    """Create ORM session/engine manager."""
+    """Create ORM session/engine manager.
+
+    The lock only guards the first initialization, once the manager is
+    ready it is returned without awaiting anything.
+    """
+    manager = HelperDB._instance
+    if manager is not None and manager.is_initialized:
+        return manager
+
     async with lock:
         manager = HelperDB(url=url, echo=echo)
         await manager.initialize()
     return manager
+
+
+def get_session_factory() -> "async_sessionmaker[AsyncSession]":
+    """Return sessionmaker of the initialized engine.
+
+    Raises:
+        RuntimeError: If `get_engine` was not awaited yet (lifespan).
+    """
+    manager = HelperDB._instance
+    if manager is None or not manager.is_initialized:
+        raise RuntimeError("DB engine is not initialized.")
+    return manager.session_factory
@@ -39,6 +39,17 @@ class LocationORM(BaseModel):
             location,
             postgresql_using=LocationH3.POSTGRESQL_INDEX_TYPE,
         ),
+        Index(LocationH3.INDEX_USER_ID, "user_id"),
+        *(
+            Index(
+                LocationH3.INDEX_H3.format(res),
+                LocationH3.FIELD_H3_INDEX.format(res),
+                "user_id",
+            )
+            for res in range(
+                LocationH3.H3_RESOLUTION_MIN, LocationH3.H3_RESOLUTION_MAX + 1
+            )
+        ),
     )
 
     def update_h3_indexes(self, latitude, longitude):
@@ -54,6 +54,10 @@ class ResponseError:
             "description": "Not Found",
             "content": DetailError.CONTENT,
         },
+        status.HTTP_503_SERVICE_UNAVAILABLE: {
+            "description": "Service Unavailable",
+            "content": DetailError.CONTENT,
+        },
     }
 
 
@@ -71,6 +75,9 @@ class HTTPResponseClients:
     responses[status.HTTP_400_BAD_REQUEST] = ResponseError.RESPONSES.get(
         status.HTTP_400_BAD_REQUEST
     )
+    responses[status.HTTP_503_SERVICE_UNAVAILABLE] = (
+        ResponseError.RESPONSES.get(status.HTTP_503_SERVICE_UNAVAILABLE)
+    )
 
 
 class HTTPResponseAuthClients:
@@ -115,6 +122,18 @@ class Response500:
     )
 
 
+class ResponsesDistanceMatrix:
+    """Swagger Docs."""
+
+    responses = dict()
+    responses[status.HTTP_422_UNPROCESSABLE_ENTITY] = (
+        ResponseError.RESPONSES.get(status.HTTP_422_UNPROCESSABLE_ENTITY)
+    )
+    responses[status.HTTP_500_INTERNAL_SERVER_ERROR] = (
+        ResponseError.RESPONSES.get(status.HTTP_500_INTERNAL_SERVER_ERROR)
+    )
+
+
 class ResponsesAuthUser:
     """Swagger Docs."""
 
@@ -125,6 +144,9 @@ class ResponsesAuthUser:
     responses[status.HTTP_500_INTERNAL_SERVER_ERROR] = (
         ResponseError.RESPONSES.get(status.HTTP_500_INTERNAL_SERVER_ERROR)
     )
+    responses[status.HTTP_503_SERVICE_UNAVAILABLE] = (
+        ResponseError.RESPONSES.get(status.HTTP_503_SERVICE_UNAVAILABLE)
+    )
 
 
 class ResponsesLocationUser:
@@ -182,9 +204,13 @@ class MessageError:
     TYPE_ERROR_500 = "HTTP_500_INTERNAL_SERVER_ERROR"
     TYPE_ERROR_429 = "429 Too Many Requests"
     MESSAGE_429_LIMIT = "Message 429 Limit request."
+    TYPE_ERROR_503 = "503 Service Unavailable"
+    MESSAGE_503_BUSY = "Server is busy. Please retry later."
     MESSAGE_SERVER_ERROR = "An error occurred."
     MESSAGE_ENV_FILE_INCORRECT_OR_NOT_EXIST = "~/.env  incorrect or not exist"
     MESSAGE_USER_NOT_FOUND = "User not found"
+    TYPE_ERROR_INVALID_CURSOR = "Invalid cursor."
+    MESSAGE_INVALID_CURSOR = "Cursor is malformed or belongs to another sort."
     MESSAGE_IF_EMAIL_ALREADY_EXIST = (
         "Registration failed. Please check your information."
     )
@@ -226,6 +252,120 @@ class LocationH3:
     H3_MAX_DIAMETER_3 = 15000
 
     FIELD_H3_INDEX = "h3_index_{}"
+    RING_CACHE_SIZE = 8192
+    MAX_COVER_RING = 32
+    MAX_EXACT_RADIUS = 500_000
+    H3_DIGIT_BITS = 3
+    H3_MAX_DIGITS = 15
+    H3_LAST_CHILD_DIGIT = 6
+    COVER_ALIAS = "h3_cover"
+    COVER_LOW = "lo"
+    COVER_HIGH = "hi"
+    INDEX_H3 = "idx_locations_h3_index_{}"
+    INDEX_USER_ID = "idx_locations_user_id"
+    FIELD_DISTANCE = "distance_m"
+    FIELD_GEODESIC_DISTANCE = "geodesic_m"
+    EARTH_RADIUS_KM = 6371.007180918475
+    WGS84_A = 6378137.0
+    WGS84_F = 1 / 298.257223563
+    VINCENTY_MAX_ITER = 200
+    VINCENTY_TOLERANCE = 1e-12
+    FIELD_H3_CELL = "h3_cell"
+    FIELD_CREATED_AT = "created_at"
+
+
+class DistanceMatrix:
+    """Batch distances of api/distance/matrix."""
+
+    PRECISION_HAVERSINE = "haversine"
+    PRECISION_GEODESIC = "geodesic"
+    PRECISION_PATTERN = r"^(haversine|geodesic)$"
+    PRECISION_DESCRIPTION = (
+        "'geodesic': WGS-84 ellipsoid, as /distance. "
+        "'haversine': sphere, faster, up to ~0.5% off."
+    )
+    MAX_CELLS = 250_000
+    STREAM_THRESHOLD = 10_000
+    STREAM_CHUNK_CELLS = 20_000
+    FIELD_KILOMETERS = "kilometers"
+    MESSAGE_ONE_MODE = (
+        "Send either non-empty origins and destinations, or pairs."
+    )
+    MESSAGE_TOO_LARGE = f"At most {MAX_CELLS} distances per request."
+
+
+class CellIndexConf:
+    """Shared memory-mapped H3 cell index."""
+
+    ENABLED = False
+    PATH = "/tmp/meetup_cell_index.bin"
+    MAX_AGE_SECONDS = 3600
+    REFRESH_SECONDS = 30
+    LOCK_SUFFIX = ".lock"
+    MAGIC = b"MUCIDX01"
+    BUILD_BATCH = 50_000
+    UID_SIZE = 16
+    H3_UNUSED_DIGIT = 7
+    H3_RESOLUTION_OFFSET = 52
+    H3_RESOLUTION_MASK = 0xF << 52
+    CHANNEL = "cell_index:delta"
+    DELTA_USER = "u"
+    DELTA_CELL = "c"
+    DELTA_TIME = "t"
+
+
+class RedisGeo:
+    """Redis GEO mirror of locations."""
+
+    KEY = "api/geo_locations"
+    UNIT = "m"
+    MAX_CANDIDATES = 2000
+    CANDIDATES_ALIAS = "geo_candidates"
+    FIELD_USER_ID = "user_id"
+    MIRROR = False
+    RECONCILE_BATCH = 5000
+    RECONCILE_SECONDS = 3600
+    RECONCILE_TASK = "reconcile_geo_locations"
+
+
+class CellDensity:
+    """Per-cell user counters of the density-adaptive /list planner."""
+
+    KEY = "api/cell_density"
+    RESOLUTION = 7
+    MAX_RING = 20
+    ENABLED = False
+    TARGET = 2000
+    MIN_RADIUS = 100
+    REBUILD_SECONDS = 86400
+    REBUILD_TASK = "rebuild_cell_density"
+    REBUILD_BATCH = 5000
+    PLAN_CACHE_SIZE = 4096
+    PLAN_CACHE_SECONDS = 60
+
+
+class NearbyEngine:
+    """Nearby-search backends of api/list."""
+
+    H3 = "h3"
+    POSTGIS = "postgis"
+    REDIS_GEO = "redis_geo"
+    CELL_INDEX = "cell_index"
+    PATTERN = r"^(h3|postgis|redis_geo)$"
+
+
+class Pagination:
+    """Keyset pagination for api/list."""
+
+    DEFAULT_LIMIT = 100
+    MAX_LIMIT = 500
+    SORT_CELL = "cell"
+    SORT_CREATED_ASC = "created_asc"
+    SORT_CREATED_DESC = "created_desc"
+    SORT_DISTANCE = "distance"
+    SORT_GEO_DISTANCE = "geo_distance"
+    CURSOR_SORT_KEY = "s"
+    CURSOR_VALUES_KEY = "k"
 
 
 class JWT:
@@ -262,6 +402,15 @@ class LocationRoutes:
     TAG = "Location"
     GET_USERS_PATH_BY_AUTH_USER = "/list"
     GET_CALCULATED_DISTANCE_PATH = "/distance"
+    GET_DISTANCE_MATRIX_PATH = "/distance/matrix"
+
+
+class MetricsRoutes:
+    """Per-worker metrics routes."""
+
+    TAG = "Metrics"
+    METRICS_PATH = "/metrics"
+    ENABLED = False
 
 
 class Headers:
@@ -276,10 +425,22 @@ class Headers:
     CACHE_CONTROL = "Cache-Control"
     CACHE_MAX_AGE = "max-age="
     ETAG = "ETag"
+    ETAG_WEAK = "W/"
+    ETAG_ANY = "*"
+    ETAG_DIGEST_SIZE = 16
     X_CACHE = "X-Cache"
     X_CACHE_MISS = "MISS"
     X_CACHE_HIT = "HIT"
     IF_NONE_MATCH = "if-none-match"
+    ACCEPT_ENCODING = "accept-encoding"
+    CONTENT_ENCODING = "Content-Encoding"
+    VARY = "Vary"
+    VARY_ACCEPT_ENCODING = "Accept-Encoding"
+    RETRY_AFTER = "Retry-After"
+    RATE_LIMIT_LIMIT = "RateLimit-Limit"
+    RATE_LIMIT_REMAINING = "RateLimit-Remaining"
+    RATE_LIMIT_RESET = "RateLimit-Reset"
+    RATE_LIMIT_POLICY = "RateLimit-Policy"
 
 
 class CommonConfSettings:
@@ -301,6 +462,17 @@ class JWTconf:
     REFERRAL_EXPIRE_DAYS = 100
     PRIVATE_KEY = "private_key"
     PUBLIC_KEY = "public_key"
+    VERIFIED_CACHE_SIZE = 4096
+
+
+class PasswordPool:
+    """Conf worker pool for bcrypt."""
+
+    KIND_THREAD = "thread"
+    KIND_PROCESS = "process"
+    WORKERS = 4
+    MAX_QUEUE = 64
+    RETRY_AFTER_SECONDS = 1
 
 
 class IntKeys:
@@ -309,7 +481,6 @@ class IntKeys:
     AUTH_USER_FOR_EMAIL = 0
     TARGET_USER_FOR_EMAIL = 1
     MATCH = 2
-    FIRST_MATCH = 1
 
 
 class LiterKeys:
@@ -322,9 +493,89 @@ class LiterKeys:
     # DELETE = "DELETE"
     AUTH_HEADER = "authorization"
     AUTH_HEADER_PREF_BEARER = 7
+    TOKEN_PAYLOAD_STATE = "token_payload"
     LOCATION_PREF = "api/location_list"
 
 
+class NearbyCache:
+    """Cache keys of api/list."""
+
+    CELL_SCOPE = "cell"
+    USER_SCOPE = "user"
+    USER_CELLS_PREF = "api/user_cells"
+    USER_CELLS_EXP = 86400
+    USER_CELLS_LOCAL_SIZE = 10_000
+    PLAN_STATE = "nearby_plan"
+    TAG_PREF = "api/location_tags"
+
+
+class LocalCacheConf:
+    """Per-worker L1 cache of api/list responses."""
+
+    SIZE = 1024
+    TTL = 30
+    CHANNEL = "api/cache_invalidate"
+    RECONNECT_SECONDS = 1
+
+
+class CacheStampede:
+    """Single-flight recompute of cached api/list entries."""
+
+    FIELD_BODY = "body"
+    FIELD_DELTA = "delta"
+    FIELD_ETAG = "etag"
+    FIELD_ENCODING = "encoding"
+    FIELD_LENGTH = "length"
+    LOCK_SUFFIX = ":lock"
+    LEASE_MS = 5000
+    WAIT_STEP_SECONDS = 0.05
+    STALE_SECONDS = 60
+    XFETCH_BETA = 1.0
+
+
+class CacheBackendConf:
+    """Stores of the response cache and the rate limiter."""
+
+    REDIS = "redis"
+    MEMORY = "memory"
+    PATTERN = r"^(redis|memory)$"
+    MEMORY_SIZE = 100_000
+
+
+class CacheCompression:
+    """Encodings of cached response bodies."""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+    IDENTITY = "identity"
+    PATTERN = r"^(gzip|zstd|identity)$"
+    GZIP_LEVEL = 6
+    ZSTD_LEVEL = 3
+    MIN_LENGTH = 512
+
+
+class RateLimit:
+    """Redis rate limiter of API routes."""
+
+    PREF = "api/rate_limit"
+    TOKEN_BUCKET = "token_bucket"
+    SLIDING_WINDOW = "sliding_window"
+    PATTERN = r"^(token_bucket|sliding_window)$"
+    STATE = "rate_limit"
+    ANONYMOUS = "anonymous"
+    LEASE = 16
+    LEASE_SHARE = 4
+    LEASE_KEYS = 4096
+    LEASE_SECONDS = 1
+
+
+class FailureLogConf:
+    """Throttled warnings of failures on request paths."""
+
+    LOGGER = "meetup"
+    INTERVAL_SECONDS = 60
+
+
 class TypeEncoding:
     """STATIC ENCODING DATA."""
 
@@ -341,6 +592,20 @@ class DescriptionForms:
         " visualizations with varying zoom levels."
     )
 
+    LIMIT = "Maximum number of users in one page."
+
+    ENGINE = (
+        "Nearby-search backend: 'h3' matches H3 cells around the user, "
+        "'postgis' matches the exact radius and returns the nearest first, "
+        "'redis_geo' does the same from the Redis GEO mirror, limited to "
+        "the nearest users. Defaults to the server configuration."
+    )
+
+    CURSOR = (
+        "Opaque cursor from `next_cursor` of the previous page. "
+        "Must be used with the same filters and sort."
+    )
+
     RADIUS = (
         "Sets the radius with H3 resolution level 9 as the highest precision,"
         " with a maximum effective diameter "
@@ -352,6 +617,6 @@ class DescriptionForms:
         "These thresholds can be adjusted for production as needed. "
         "When 'EXACT' is applied, the default resolution "
         "is set to the highest available (level 9), with a maximum "
-        "range constraint of 300 km (or 150 km when interpreted as radius). "
+        "radius of 500 km. "
         "The unit of measurement is currently set to meters."
     )
@@ -5,7 +5,22 @@ from datetime import timedelta
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from src.core.settings.constants import CommonConfSettings, JWTconf
+from src.core.settings.constants import (
+    CacheBackendConf,
+    CacheCompression,
+    CacheStampede,
+    CellDensity,
+    CellIndexConf,
+    CommonConfSettings,
+    JWTconf,
+    LocalCacheConf,
+    MetricsRoutes,
+    NearbyCache,
+    NearbyEngine,
+    PasswordPool,
+    RateLimit,
+    RedisGeo,
+)
 
 
 class EnvironmentSetting(BaseSettings):
@@ -68,6 +83,14 @@ class RedisEnv(EnvironmentSetting):
     REDIS_LIMIT_REQUESTS: int
     REDIS_EXP_REQUESTS_DAYS: int
     REDIS_EXP_LOCATION: int
+    REDIS_EXP_USER_CELLS: int = Field(default=NearbyCache.USER_CELLS_EXP)
+    REDIS_STALE_LOCATION: int = Field(
+        default=CacheStampede.STALE_SECONDS, ge=0
+    )
+    REDIS_LOCK_LEASE_MS: int = Field(default=CacheStampede.LEASE_MS, ge=1)
+    REDIS_CACHE_ENCODING: str = Field(
+        default=CacheCompression.GZIP, pattern=CacheCompression.PATTERN
+    )
 
     @property
     def exp_in_days(self) -> int:
@@ -137,6 +160,73 @@ class GunicornENV(EnvironmentSetting):
     ERRORLOG: str
 
 
+class PasswordPoolEnv(EnvironmentSetting):
+    """Conf worker pool for password hashing."""
+
+    PWD_POOL_KIND: str = Field(default=PasswordPool.KIND_THREAD)
+    PWD_POOL_WORKERS: int = Field(default=PasswordPool.WORKERS)
+    PWD_POOL_MAX_QUEUE: int = Field(default=PasswordPool.MAX_QUEUE)
+
+
+class NearbySearchEnv(EnvironmentSetting):
+    """Conf default nearby-search backends of api/list."""
+
+    NEARBY_ENGINE: str = Field(
+        default=NearbyEngine.H3, pattern=NearbyEngine.PATTERN
+    )
+    NEARBY_EXACT_ENGINE: str = Field(
+        default=NearbyEngine.H3, pattern=NearbyEngine.PATTERN
+    )
+    NEARBY_GEO_MIRROR: bool = Field(default=RedisGeo.MIRROR)
+    NEARBY_GEO_RECONCILE: int = Field(default=RedisGeo.RECONCILE_SECONDS)
+    NEARBY_DENSITY_ENABLED: bool = Field(default=CellDensity.ENABLED)
+    NEARBY_DENSITY_TARGET: int = Field(default=CellDensity.TARGET, ge=1)
+    NEARBY_DENSITY_REBUILD: int = Field(default=CellDensity.REBUILD_SECONDS)
+
+
+class CellIndexEnv(EnvironmentSetting):
+    """Conf shared H3 cell index of api/list."""
+
+    CELL_INDEX_ENABLED: bool = Field(default=CellIndexConf.ENABLED)
+    CELL_INDEX_PATH: str = Field(default=CellIndexConf.PATH)
+    CELL_INDEX_MAX_AGE: int = Field(default=CellIndexConf.MAX_AGE_SECONDS)
+    CELL_INDEX_REFRESH: int = Field(default=CellIndexConf.REFRESH_SECONDS)
+
+
+class LocalCacheEnv(EnvironmentSetting):
+    """Conf per-worker L1 cache in front of Redis, size 0 disables it."""
+
+    LOCAL_CACHE_SIZE: int = Field(default=LocalCacheConf.SIZE, ge=0)
+    LOCAL_CACHE_TTL: int = Field(default=LocalCacheConf.TTL, ge=1)
+
+
+class CacheEnv(EnvironmentSetting):
+    """Conf store of the response cache and the rate limiter.
+
+    `memory` is per process: for benchmarks and single-worker runs.
+    """
+
+    CACHE_BACKEND: str = Field(
+        default=CacheBackendConf.REDIS, pattern=CacheBackendConf.PATTERN
+    )
+    CACHE_MEMORY_SIZE: int = Field(default=CacheBackendConf.MEMORY_SIZE, ge=1)
+
+
+class RateLimitEnv(EnvironmentSetting):
+    """Conf rate limiter, a lease of 0 sends every request to Redis."""
+
+    RATE_LIMIT_MODE: str = Field(
+        default=RateLimit.SLIDING_WINDOW, pattern=RateLimit.PATTERN
+    )
+    RATE_LIMIT_LEASE: int = Field(default=RateLimit.LEASE, ge=0)
+
+
+class MetricsEnv(EnvironmentSetting):
+    """Conf GET /metrics, off by default: counters are internal."""
+
+    METRICS_ENABLED: bool = Field(default=MetricsRoutes.ENABLED)
+
+
 class WebConfig(EnvironmentSetting):
     """Conf CORS from environment."""
 
@@ -161,6 +251,13 @@ class Settings:
         self.email = EmailEnv()
         self.gunicorn = GunicornENV()
         self.webconf = WebConfig()
+        self.pwd_pool = PasswordPoolEnv()
+        self.nearby = NearbySearchEnv()
+        self.cell_index = CellIndexEnv()
+        self.local_cache = LocalCacheEnv()
+        self.rate_limit = RateLimitEnv()
+        self.cache = CacheEnv()
+        self.metrics = MetricsEnv()
 
 
 settings = Settings()
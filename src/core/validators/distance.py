@@ -1,7 +1,15 @@
 """User model validator."""
 
+from typing import Annotated
+
 import pydantic
 
+from src.core.settings.constants import DistanceMatrix
+
+Latitude = Annotated[float, pydantic.Field(ge=-90, le=90)]
+Longitude = Annotated[float, pydantic.Field(ge=-180, le=180)]
+Coordinates = tuple[Latitude, Longitude]
+
 
 class DistanceRequest(pydantic.BaseModel):
     """Model for getting distance between two locations."""
@@ -26,3 +34,65 @@ class DistanceResponse(pydantic.BaseModel):
     kilometers: float
 
     model_config = pydantic.ConfigDict(title="Distance model")
+
+
+class DistanceMatrixRequest(pydantic.BaseModel):
+    """Model for getting distances between many locations.
+
+    Either `origins` x `destinations` (a matrix) or `pairs` (a list).
+    """
+
+    origins: list[Coordinates] | None = None
+    destinations: list[Coordinates] | None = None
+    pairs: list[tuple[Coordinates, Coordinates]] | None = None
+    precision: str = pydantic.Field(
+        default=DistanceMatrix.PRECISION_GEODESIC,
+        pattern=DistanceMatrix.PRECISION_PATTERN,
+        description=DistanceMatrix.PRECISION_DESCRIPTION,
+    )
+
+    model_config = pydantic.ConfigDict(
+        title="Get distances between many locations",
+        json_schema_extra={
+            "example": {
+                "origins": [[55.7558, 37.6173]],
+                "destinations": [[59.9343, 30.3351], [56.8389, 60.6057]],
+                "precision": DistanceMatrix.PRECISION_GEODESIC,
+            }
+        },
+    )
+
+    @pydantic.model_validator(mode="after")
+    def check_shape(self) -> "DistanceMatrixRequest":
+        """Check that exactly one mode is given and fits the size cap."""
+        matrix = self.origins is not None or self.destinations is not None
+
+        if matrix == (self.pairs is not None):
+            raise ValueError(DistanceMatrix.MESSAGE_ONE_MODE)
+
+        if matrix and (not self.origins or not self.destinations):
+            raise ValueError(DistanceMatrix.MESSAGE_ONE_MODE)
+
+        if self.size > DistanceMatrix.MAX_CELLS:
+            raise ValueError(DistanceMatrix.MESSAGE_TOO_LARGE)
+        return self
+
+    @property
+    def size(self) -> int:
+        """Return number of distances to compute."""
+        if self.pairs is not None:
+            return len(self.pairs)
+        if self.origins is None or self.destinations is None:
+            return 0
+        return len(self.origins) * len(self.destinations)
+
+
+class DistanceMatrixResponse(pydantic.BaseModel):
+    """Model representing distances in kilometers.
+
+    A row per origin for a matrix request, a flat list for pairs.
+    """
+
+    kilometers: list[list[float]] | list[float]
+
+    model_config = pydantic.ConfigDict(title="Distance matrix model")
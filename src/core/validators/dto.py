@@ -2,7 +2,7 @@
 
 from typing import Any, Callable, Iterable, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Cache(BaseModel):
@@ -24,16 +24,55 @@ class H3Parameters(BaseModel):
     diameter: float
     field_name: str
 
+    model_config = ConfigDict(frozen=True)
+
+
+class NearbyArea(BaseModel):
+    """Search area of `Locations.near_users`."""
+
+    user_id: str
+    field_name: str
+    radius: float
+    h3_ranges: tuple[tuple[int, int], ...] = ()
+    user_ids: tuple[str, ...] = ()
+    distances: tuple[float, ...] = ()
+
+    model_config = ConfigDict(frozen=True)
+
+
+class DensityPlan(BaseModel):
+    """Search radius picked by the density planner of api/list."""
+
+    radius: float
+    estimate: int
+    trimmed: bool = False
+
+    model_config = ConfigDict(frozen=True)
+
+
+class NearbyPlan(BaseModel):
+    """Search of api/list resolved before the cache lookup."""
+
+    engine: str
+    radius: float
+    h3_params: H3Parameters
+    auth_location: int
+    trimmed: bool = False
+    density_cell: int | None = None
+
+    model_config = ConfigDict(frozen=True)
+
 
 class UsersDataGeo(BaseModel):
     """Geographic model."""
 
     auth_location: int | None = None
 
-    loc_data: Iterable | None = None
-    users_data: Iterable | None = None
+    rows: Iterable | None = None
     field_name: str | None = None
     exact: bool | None = None
+    distance_field: str | None = None
+    """Row column of distances (m) measured by the engine, if any."""
 
 
 class LocationData(BaseModel):
@@ -53,3 +92,16 @@ class LocationTemp(BaseModel):
     lon_user: float | None = None
     h3_str_auth: str | None = None
     h3_str_user: str | None = None
+
+
+class RateLimitState(BaseModel):
+    """Decision of the rate limiter for one request."""
+
+    limit: int
+    window: int
+    remaining: int
+    reset: int
+    retry_after: int = 0
+    allowed: bool = True
+
+    model_config = ConfigDict(frozen=True)
@@ -43,8 +43,16 @@ class UsersCollection(pydantic.BaseModel):
     allows the model to adapt to different filtering scenarios,
     balancing between accuracy and efficient
     map rendering at various resolutions.
+
+    `next_cursor` is set when more users are available; pass it back
+    as `cursor` to get the next page.
+
+    `trimmed_radius` is set when the area was too dense for the requested
+    radius: the users are searched within this radius (meters) instead.
     """
 
     users: list[User | None]
+    next_cursor: str | None = None
+    trimmed_radius: float | None = None
 
     model_config = pydantic.ConfigDict(title="User's nearby users_data")
@@ -9,24 +9,48 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.core.apps.app_celery import check_redis_connection
 from src.core.controllers.auth import auth
 from src.core.controllers.clients import clients
-from src.core.controllers.depends.utils.connect_db import disconnect_db
+from src.core.controllers.depends.utils.cell_index_sync import (
+    start_cell_index,
+    stop_cell_index,
+)
+from src.core.controllers.depends.utils.connect_db import (
+    disconnect_db,
+    init_engine,
+)
+from src.core.controllers.depends.utils.local_cache import (
+    start_local_cache,
+    stop_local_cache,
+)
+from src.core.controllers.depends.utils.pwd_pool import pwd_executor
+from src.core.controllers.depends.utils.rate_limit import (
+    RateLimitHeadersMiddleware,
+)
 from src.core.controllers.depends.utils.redis_chash import (
     close_redis,
     init_redis,
+    setup_redis_bytes,
 )
 from src.core.controllers.locations import location
+from src.core.controllers.metrics import metrics
 from src.core.settings.env import settings
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     """Connect and close DB."""
+    await init_engine()
     print("DB connected")
     redis = await init_redis()
     check_redis_connection()
+    cell_index_tasks = await start_cell_index(redis)
+    local_cache_tasks = start_local_cache(redis)
     yield
+    await stop_local_cache(local_cache_tasks)
+    await stop_cell_index(cell_index_tasks)
     await disconnect_db()
     await close_redis(client=redis)
+    await close_redis(client=await setup_redis_bytes())
+    pwd_executor.shutdown()
     print("DB disconnected")
 
 
@@ -45,9 +69,13 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    app_.add_middleware(RateLimitHeadersMiddleware)
+
     app_.include_router(clients)
     app_.include_router(auth)
     app_.include_router(location)
+    if settings.metrics.METRICS_ENABLED:
+        app_.include_router(metrics)
 
     return app_
 
@@ -0,0 +1,52 @@
+"""Test settings.
+
+The application reads its settings from the environment at import, so
+the variables of `.env.template` are set first (real variables win),
+with a fresh RSA key pair for the JWT settings.
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+ENV_TEMPLATE = Path(__file__).parent.parent / ".env.template"
+
+
+def load_env_template() -> None:
+    """Set the variables of `.env.template` missing in the environment."""
+    for line in ENV_TEMPLATE.read_text().splitlines():
+        name, sep, value = line.partition("=")
+        if not sep or line.lstrip().startswith("#"):
+            continue
+        os.environ.setdefault(name.strip(), value.strip().strip('"'))
+
+
+def set_jwt_keys() -> None:
+    """Set a fresh RSA key pair as the JWT keys."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    os.environ["JWT_PRIVATE"] = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    os.environ["JWT_PUBLIC"] = (
+        key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+load_env_template()
+set_jwt_keys()
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Run async tests on asyncio only."""
+    return "asyncio"
@@ -0,0 +1,133 @@
+"""Tests of the shared H3 cell index."""
+
+import time
+import uuid
+from types import SimpleNamespace
+
+import h3
+import pytest
+
+from src.core.controllers.depends.utils import cell_index_sync
+from src.core.controllers.depends.utils.geo import child_range
+from src.core.models.cell_index import CellIndex, build_cell_index
+from src.core.settings.env import settings
+from src.core.validators.dto import H3Parameters, NearbyArea
+
+pytestmark = pytest.mark.anyio
+
+CENTER = h3.latlng_to_cell(55.7558, 37.6173, 8)
+# Three res-9 cells of one res-8 cell and one of its neighbour.
+CELLS = sorted(h3.str_to_int(cell) for cell in h3.cell_to_children(CENTER))[:3]
+OTHER = h3.str_to_int(h3.cell_to_center_child(h3.grid_ring(CENTER, 1)[0], 9))
+USERS = sorted(uuid.UUID(int=number, version=4) for number in range(1, 9))
+ROWS = sorted(
+    [(CELLS[i % 3], user_id) for i, user_id in enumerate(USERS[:6])]
+    + [(OTHER, user_id) for user_id in USERS[6:]]
+)
+
+
+def stream_session(rows: list[tuple[int, uuid.UUID]]) -> SimpleNamespace:
+    """Return a session double streaming `rows` in two partitions."""
+
+    async def partitions():
+        yield rows[:4]
+        yield rows[4:]
+
+    async def stream(*args, **kwargs) -> SimpleNamespace:
+        return SimpleNamespace(partitions=partitions)
+
+    return SimpleNamespace(stream=stream)
+
+
+@pytest.fixture
+async def index(tmp_path) -> CellIndex:
+    """Return an index loaded from a file built of `ROWS`."""
+    path = str(tmp_path / "cell_index.bin")
+    assert await build_cell_index(stream_session(ROWS), path) == len(ROWS)
+    built = CellIndex(path)
+    assert built.load()
+    return built
+
+
+def area_ranges(*cells: int) -> tuple[tuple[int, int], ...]:
+    """Return res-9 ranges of res-8 cells."""
+    return tuple(child_range(cell, 8) for cell in sorted(cells))
+
+
+async def test_lookup_pages_like_h3_engine(index: CellIndex) -> None:
+    """Entries are (res-8 parent, id), ordered and paged by keyset."""
+    center = h3.str_to_int(CENTER)
+    inside = sorted(
+        (center, user_id) for cell, user_id in ROWS if cell != OTHER
+    )
+    exclude = inside[0][1]
+
+    first = index.lookup(
+        h3_ranges=area_ranges(center),
+        resolution=8,
+        exclude_user=exclude,
+        limit=3,
+    )
+    rest = index.lookup(
+        h3_ranges=area_ranges(center),
+        resolution=8,
+        exclude_user=exclude,
+        after=first[-1],
+    )
+    assert first + rest == inside[1:]
+
+
+async def test_lookup_excludes_cell_and_reads_overlay(
+    index: CellIndex,
+) -> None:
+    """The searcher's cell is skipped, recent inserts are found."""
+    center = h3.str_to_int(CENTER)
+    other = h3.cell_to_parent(h3.int_to_str(OTHER), 8)
+    moved, added = USERS[0], uuid.UUID(int=99, version=4)
+    index.apply_delta(moved, OTHER, published_at=time.time())
+    index.apply_delta(added, OTHER, published_at=time.time())
+
+    page = index.lookup(
+        h3_ranges=area_ranges(center, h3.str_to_int(other)),
+        resolution=8,
+        exclude_user=USERS[-1],
+        exclude_cell=center,
+    )
+    assert page == sorted(
+        (h3.str_to_int(other), user_id)
+        for user_id in (*USERS[6:-1], moved, added)
+    )
+
+
+@pytest.mark.parametrize("limit, more", ((3, True), (6, False)))
+async def test_index_area_next_key(
+    index: CellIndex,
+    monkeypatch: pytest.MonkeyPatch,
+    limit: int,
+    more: bool,
+) -> None:
+    """The next page exists when the index holds more than `limit`."""
+    monkeypatch.setattr(cell_index_sync, "cell_index", index)
+    monkeypatch.setattr(settings.cell_index, "CELL_INDEX_ENABLED", True)
+    center = h3.str_to_int(CENTER)
+    area = NearbyArea(
+        user_id=str(USERS[-1]),
+        field_name="h3_index_8",
+        radius=1000,
+        h3_ranges=area_ranges(center),
+    )
+
+    picked, next_key = cell_index_sync.index_area(
+        area=area,
+        h3_params=H3Parameters(
+            resolution=8, diameter=2000, field_name="h3_index_8"
+        ),
+        exclude_cell=None,
+        after=None,
+        limit=limit,
+    )
+
+    assert len(picked.user_ids) == min(limit, 6)
+    assert next_key == (
+        (center, uuid.UUID(picked.user_ids[-1])) if more else None
+    )
@@ -0,0 +1,72 @@
+"""Tests of the compressed bodies of cached responses."""
+
+import pytest
+from fastapi import Request
+
+from src.core.controllers.depends.utils.compression import (
+    accepts_encoding,
+    compress,
+    decompress,
+)
+from src.core.controllers.depends.utils.redis_chash import encoded_response
+from src.core.settings.constants import CacheCompression, Headers
+
+BODY = b'{"users":[' + b'{"id":1},' * 200 + b"]}"
+
+
+def make_request(accept_encoding: str) -> Request:
+    """Return a request with `Accept-Encoding`."""
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (Headers.ACCEPT_ENCODING.encode(), accept_encoding.encode())
+            ],
+        }
+    )
+
+
+def test_gzip_round_trip() -> None:
+    """A large body is stored gzipped, a small one as it is."""
+    body, encoding = compress(BODY, CacheCompression.GZIP)
+
+    assert encoding == CacheCompression.GZIP
+    assert len(body) < len(BODY)
+    assert decompress(body, encoding) == BODY
+    assert compress(b"{}", CacheCompression.GZIP) == (
+        b"{}",
+        CacheCompression.IDENTITY,
+    )
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "accepted"),
+    (
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, gzip;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0, *", False),
+        ("br", False),
+        ("", False),
+    ),
+)
+def test_accepts_encoding(accept_encoding: str, accepted: bool) -> None:
+    """A named coding wins over `*`, `q=0` refuses it."""
+    request = make_request(accept_encoding)
+    assert accepts_encoding(request, CacheCompression.GZIP) is accepted
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "content_encoding"),
+    (("gzip", CacheCompression.GZIP), ("br", None)),
+)
+def test_encoded_response(
+    accept_encoding: str, content_encoding: str | None
+) -> None:
+    """Stored bytes are sent as they are, or decompressed."""
+    body, encoding = compress(BODY, CacheCompression.GZIP)
+
+    response = encoded_response(make_request(accept_encoding), body, encoding)
+
+    assert response.headers.get(Headers.CONTENT_ENCODING) == content_encoding
+    assert response.body == (body if content_encoding else BODY)
@@ -0,0 +1,54 @@
+"""Tests of the response ETags."""
+
+import pytest
+from fastapi import Request
+
+from src.core.controllers.depends.utils.conf_headers import (
+    check_etag,
+    gen_etag,
+)
+from src.core.settings.constants import Headers
+
+BODY = '{"users":[]}'
+
+
+def make_request(if_none_match: str) -> Request:
+    """Return a request with `If-None-Match`."""
+    return Request(
+        {
+            "type": "http",
+            "headers": [
+                (Headers.IF_NONE_MATCH.encode(), if_none_match.encode())
+            ],
+        }
+    )
+
+
+def test_etag_is_stable() -> None:
+    """The tag depends on the body only, as text or as bytes."""
+    etag = gen_etag(BODY)
+
+    assert etag == gen_etag(BODY.encode())
+    assert etag.startswith(Headers.ETAG_WEAK)
+    assert etag != gen_etag(BODY + " ")
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    (
+        ("{etag}", True),
+        ("{strong}", True),
+        ('W/"other", {etag}', True),
+        ("*", True),
+        ('W/"other"', False),
+    ),
+    ids=("same", "strong", "listed", "any", "other"),
+)
+def test_check_etag(if_none_match: str, matches: bool) -> None:
+    """`If-None-Match` is compared weakly, against every listed tag."""
+    etag = gen_etag(BODY)
+    header = if_none_match.format(
+        etag=etag, strong=etag.removeprefix(Headers.ETAG_WEAK)
+    )
+
+    assert check_etag(make_request(header), etag) is matches
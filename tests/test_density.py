@@ -0,0 +1,113 @@
+"""Tests of the density-adaptive radius of api/list."""
+
+import math
+from types import SimpleNamespace
+
+import h3
+import pytest
+from redis.exceptions import RedisError
+
+from src.core.controllers.depends.utils import density
+from src.core.controllers.depends.utils.density import (
+    CELL_AREA_M2,
+    plan_radius,
+    trim_radius,
+)
+from src.core.settings.constants import CellDensity
+from src.core.settings.env import settings
+
+pytestmark = pytest.mark.anyio
+
+CENTER = h3.str_to_int(
+    h3.latlng_to_cell(55.7558, 37.6173, CellDensity.RESOLUTION)
+)
+
+
+def counters_redis(per_cell: int | None) -> SimpleNamespace:
+    """Return a Redis double with `per_cell` users in every cell."""
+    asked: list[list[str]] = []
+
+    async def hmget(key: str, cells: list[str]) -> list[str | None]:
+        assert key == CellDensity.KEY
+        asked.append(cells)
+        count = None if per_cell is None else str(per_cell)
+        return [count] * len(cells)
+
+    return SimpleNamespace(hmget=hmget, asked=asked)
+
+
+@pytest.fixture
+def enabled(monkeypatch: pytest.MonkeyPatch) -> int:
+    """Enable the planner, return its target."""
+    monkeypatch.setattr(settings.nearby, "NEARBY_DENSITY_ENABLED", True)
+    monkeypatch.setattr(settings.nearby, "NEARBY_DENSITY_TARGET", 1000)
+    return 1000
+
+
+@pytest.mark.parametrize(
+    "radius, estimate, expected",
+    (
+        (5000, 1000, 5000),
+        (5000, 4000, 2500),
+        (5000, 10**9, CellDensity.MIN_RADIUS),
+        (50, 10**9, 50),
+    ),
+    ids=("sparse", "dense", "floor", "below floor"),
+)
+def test_trim_radius(radius: float, estimate: int, expected: float) -> None:
+    """The trimmed disk holds about `target` users, within the bounds."""
+    assert trim_radius(radius, estimate, target=1000) == expected
+
+
+async def test_dense_area_is_trimmed(enabled: int) -> None:
+    """The radius shrinks to about `target` users of the counted cells."""
+    per_cell = 500
+    redis = counters_redis(per_cell)
+
+    plan = await plan_radius(CENTER, radius=5000, redis=redis)
+
+    density_m2 = per_cell / CELL_AREA_M2
+    assert plan.trimmed
+    assert plan.estimate == round(density_m2 * math.pi * 5000**2)
+    assert plan.radius == pytest.approx(
+        math.sqrt(enabled / (density_m2 * math.pi)), rel=1e-3
+    )
+    assert str(CENTER) in redis.asked[0]
+
+
+async def test_sparse_area_keeps_radius(enabled: int) -> None:
+    """Cells without counters keep the requested radius."""
+    plan = await plan_radius(CENTER, radius=5000, redis=counters_redis(None))
+    assert (plan.radius, plan.estimate, plan.trimmed) == (5000, 0, False)
+
+
+async def test_ring_is_capped(enabled: int) -> None:
+    """Huge radii read at most `CellDensity.MAX_RING` rings."""
+    redis = counters_redis(0)
+    await plan_radius(CENTER, radius=10**6, redis=redis)
+    ring = CellDensity.MAX_RING
+    assert len(redis.asked[0]) == 3 * ring * (ring + 1) + 1
+
+
+async def test_unavailable_counters_keep_radius(enabled: int) -> None:
+    """Redis errors fall back to the requested radius and are counted."""
+
+    async def hmget(*args) -> None:
+        raise RedisError("down")
+
+    failures = density.plan_failed.count
+    plan = await plan_radius(
+        CENTER, radius=5000, redis=SimpleNamespace(hmget=hmget)
+    )
+    assert not plan.trimmed and plan.radius == 5000
+    assert density.plan_failed.count == failures + 1
+
+
+async def test_disabled_planner_skips_redis(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Without `NEARBY_DENSITY_ENABLED` no counter is read."""
+    monkeypatch.setattr(settings.nearby, "NEARBY_DENSITY_ENABLED", False)
+    redis = counters_redis(500)
+    plan = await plan_radius(CENTER, radius=5000, redis=redis)
+    assert plan.radius == 5000 and not redis.asked
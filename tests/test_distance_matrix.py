@@ -0,0 +1,97 @@
+"""Tests of POST /distance/matrix."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from geopy.distance import distance
+
+from src.core.controllers.depends import distance_matrix
+from src.core.controllers.locations import location
+from src.core.settings.constants import DistanceMatrix, LocationRoutes
+
+MOSCOW = (55.7558, 37.6173)
+SAINT_PETERSBURG = (59.9343, 30.3351)
+YEKATERINBURG = (56.8389, 60.6057)
+
+
+@pytest.fixture(scope="module")
+def client() -> TestClient:
+    """Return a client of the location routes."""
+    app = FastAPI()
+    app.include_router(location)
+    return TestClient(app)
+
+
+def post(client: TestClient, body: dict) -> dict:
+    """Return the JSON answer of a valid request."""
+    response = client.post(LocationRoutes.GET_DISTANCE_MATRIX_PATH, json=body)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_matrix_matches_distance(client: TestClient) -> None:
+    """Every origin gets a row of geodesic distances, as /distance."""
+    origins = [MOSCOW, SAINT_PETERSBURG]
+    destinations = [SAINT_PETERSBURG, YEKATERINBURG, MOSCOW]
+
+    rows = post(client, {"origins": origins, "destinations": destinations})
+
+    assert rows[DistanceMatrix.FIELD_KILOMETERS] == [
+        [pytest.approx(distance(a, b).km, abs=1e-6) for b in destinations]
+        for a in origins
+    ]
+
+
+def test_pairs_in_haversine(client: TestClient) -> None:
+    """Pairs give one distance each, the sphere is within 0.5%."""
+    pairs = [[MOSCOW, SAINT_PETERSBURG], [MOSCOW, YEKATERINBURG]]
+
+    body = post(
+        client,
+        {"pairs": pairs, "precision": DistanceMatrix.PRECISION_HAVERSINE},
+    )
+
+    assert body[DistanceMatrix.FIELD_KILOMETERS] == [
+        pytest.approx(distance(a, b).km, rel=5e-3) for a, b in pairs
+    ]
+
+
+def test_streamed_matrix_is_one_document(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A streamed matrix is split in chunks but parses as one body."""
+    monkeypatch.setattr(DistanceMatrix, "STREAM_THRESHOLD", 2)
+    monkeypatch.setattr(DistanceMatrix, "STREAM_CHUNK_CELLS", 3)
+    origins = [MOSCOW, SAINT_PETERSBURG, YEKATERINBURG]
+    chunks = list(
+        distance_matrix.matrix_chunks(
+            distance_matrix.DistanceMatrixRequest(
+                origins=origins, destinations=origins
+            )
+        )
+    )
+
+    rows = post(client, {"origins": origins, "destinations": origins})
+
+    assert len(chunks) == 5
+    assert [round(row[i], 9) for i, row in enumerate(rows["kilometers"])] == [
+        0,
+        0,
+        0,
+    ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    (
+        {"origins": [MOSCOW]},
+        {"origins": [MOSCOW], "destinations": [MOSCOW], "pairs": []},
+        {"pairs": [[MOSCOW, (91, 0)]]},
+        {"pairs": [[MOSCOW, MOSCOW]], "precision": "flat"},
+    ),
+    ids=("no destinations", "both modes", "bad latitude", "bad precision"),
+)
+def test_invalid_request_is_422(client: TestClient, body: dict) -> None:
+    """Requests outside the two modes or the coordinate bounds fail."""
+    response = client.post(LocationRoutes.GET_DISTANCE_MATRIX_PATH, json=body)
+    assert response.status_code == 422
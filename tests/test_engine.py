@@ -0,0 +1,44 @@
+"""Tests of the engine and session factory on the request path."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.models import engine
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def ready_engine(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Install an initialized manager as the engine singleton."""
+    manager = SimpleNamespace(is_initialized=True, session_factory=object())
+    monkeypatch.setattr(engine.HelperDB, "_instance", manager)
+    return manager
+
+
+async def test_ready_engine_skips_the_lock(
+    ready_engine: SimpleNamespace,
+) -> None:
+    """Once initialized, `get_engine` returns without the lock."""
+    async with engine.lock:
+        manager = await asyncio.wait_for(
+            engine.get_engine(url="", echo=False), timeout=1
+        )
+
+    assert manager is ready_engine
+
+
+def test_session_factory_is_built_once(ready_engine: SimpleNamespace) -> None:
+    """Requests reuse the sessionmaker of the engine."""
+    assert engine.get_session_factory() is ready_engine.session_factory
+
+
+def test_session_factory_before_startup(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Without the lifespan, opening a session fails loudly."""
+    monkeypatch.setattr(engine.HelperDB, "_instance", None)
+    with pytest.raises(RuntimeError):
+        engine.get_session_factory()
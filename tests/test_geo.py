@@ -0,0 +1,126 @@
+"""Tests of the H3 disks and covers of a search radius."""
+
+import bisect
+
+import h3
+import pytest
+from geopy.distance import distance
+
+from src.core.controllers.depends.utils.geo import (
+    H3_RESOLUTION_TABLE,
+    get_location_params_batch,
+    get_near_ranges,
+    near_cover,
+    ring_cache_stats,
+    ring_cells,
+    select_h3_resolution_params,
+)
+from src.core.settings.constants import LocationH3
+
+LOCATIONS = (
+    (55.7558, 37.6173),
+    (0.0, 0.0),
+    (70.0, 20.0),
+    (-33.9249, 18.4241),
+    (40.7128, -74.006),
+)
+RADII = (3_300, 10_000, 50_000, 200_000, LocationH3.MAX_EXACT_RADIUS)
+
+
+def in_ranges(ranges: tuple[tuple[int, int], ...], cell: int) -> bool:
+    """Return True if `cell` is in one of the sorted `ranges`."""
+    index = bisect.bisect_right(ranges, (cell, float("inf"))) - 1
+    return index >= 0 and ranges[index][0] <= cell <= ranges[index][1]
+
+
+@pytest.mark.parametrize("latitude, longitude", LOCATIONS)
+@pytest.mark.parametrize("radius", RADII)
+def test_cover_holds_points_just_inside_radius(
+    latitude: float, longitude: float, radius: int
+) -> None:
+    """Points at 99.9% of the radius fall in the exact cover."""
+    h3_params = H3_RESOLUTION_TABLE[0]
+    user_cell = h3.str_to_int(
+        h3.latlng_to_cell(latitude, longitude, h3_params.resolution)
+    )
+    ranges = get_near_ranges(user_cell, radius, h3_params)
+
+    _, cover_resolution, _ = near_cover(user_cell, radius, h3_params)
+    assert cover_resolution < h3_params.resolution
+
+    for bearing in range(0, 360, 5):
+        point = distance(meters=radius * 0.999).destination(
+            (latitude, longitude), bearing
+        )
+        cell = h3.str_to_int(
+            h3.latlng_to_cell(
+                point.latitude, point.longitude, h3_params.resolution
+            )
+        )
+        assert in_ranges(ranges, cell), bearing
+
+
+@pytest.mark.parametrize(
+    "radius, exact, resolution",
+    (
+        (50, False, 9),
+        (LocationH3.H3_MAX_DIAMETER_8, False, 8),
+        (LocationH3.H3_MAX_DIAMETER_8 + 1, False, 7),
+        (10**7, False, 3),
+        (10**7, True, 9),
+    ),
+)
+def test_resolution_table(radius: float, exact: bool, resolution: int) -> None:
+    """The finest resolution covering the radius, the finest if exact."""
+    h3_params = select_h3_resolution_params(radius, exact)
+    assert h3_params.resolution == resolution
+    assert h3_params.field_name == LocationH3.FIELD_H3_INDEX.format(resolution)
+
+
+def test_ring_cells_are_memoized() -> None:
+    """A disk is expanded once, then shared."""
+    center = h3.latlng_to_cell(*LOCATIONS[0], 9)
+    hits = ring_cache_stats()["ring"]["hits"]
+
+    first = ring_cells(h3.str_to_int(center), 9, 3)
+    second = ring_cells(h3.str_to_int(center), 9, 3)
+
+    assert second is first
+    assert ring_cache_stats()["ring"]["hits"] == hits + 1
+    assert set(first) == {
+        h3.str_to_int(cell) for cell in h3.grid_disk(center, 3)
+    }
+
+
+@pytest.mark.parametrize("exact", (False, True))
+def test_batch_matches_per_cell_distances(exact: bool) -> None:
+    """Batch centers and distances equal the per-cell h3 and geopy ones."""
+    auth = h3.latlng_to_cell(*LOCATIONS[0], 9)
+    cells = [*h3.grid_ring(auth, 40), *h3.grid_ring(auth, 3)]
+
+    lats, lons, distances = get_location_params_batch(
+        auth_location=h3.str_to_int(auth),
+        user_locations=[h3.str_to_int(cell) for cell in cells],
+        exact=exact,
+    )
+
+    auth_center = h3.cell_to_latlng(auth)
+    for cell, lat, lon, km in zip(cells, lats, lons, distances):
+        center = h3.cell_to_latlng(cell)
+        assert (lat, lon) == pytest.approx(center, abs=1e-12)
+        expected = (
+            distance(auth_center, center).km
+            if exact
+            else h3.great_circle_distance(auth_center, center, unit="km")
+        )
+        assert km == pytest.approx(expected, abs=1e-6)
+
+
+def test_batch_rejects_missing_cells() -> None:
+    """A row without a cell is an error, as in the per-row path."""
+    with pytest.raises(ValueError):
+        get_location_params_batch(
+            auth_location=h3.str_to_int(h3.latlng_to_cell(0, 0, 9)),
+            user_locations=[0],
+            exact=False,
+        )
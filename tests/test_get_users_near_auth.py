@@ -0,0 +1,36 @@
+"""Tests of the POST /list dependency."""
+
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import get_dependant
+
+from src.core.controllers.depends.get_users_near_auth import (
+    location_near_auth_user,
+)
+from src.core.controllers.depends.token import token_is_alive
+from src.core.controllers.depends.utils.connect_db import (
+    get_crud,
+    get_session,
+)
+from src.core.settings.constants import LocationRoutes
+
+
+def dependency_calls(dependant: Dependant) -> set:
+    """Return every callable FastAPI resolves for `dependant`."""
+    calls = set()
+    for sub_dependant in dependant.dependencies:
+        calls.add(sub_dependant.call)
+        calls |= dependency_calls(sub_dependant)
+    return calls
+
+
+def test_cache_hit_resolves_no_db_dependency() -> None:
+    """The session is opened in the body, after the cache lookup."""
+    dependant = get_dependant(
+        path=LocationRoutes.GET_USERS_PATH_BY_AUTH_USER,
+        call=location_near_auth_user,
+    )
+
+    calls = dependency_calls(dependant)
+
+    assert token_is_alive in calls
+    assert not calls & {get_session, get_crud}
@@ -0,0 +1,99 @@
+"""Tests of the verified-token cache."""
+
+import time
+
+import jwt
+import pytest
+from fastapi import Request
+
+from src.core.controllers.depends.token import token_is_alive
+from src.core.controllers.depends.utils import jwt_token
+from src.core.controllers.depends.utils.jwt_token import (
+    VerifiedTokenCache,
+    create_auth_token,
+    decode_jwt,
+)
+from src.core.controllers.depends.utils.token_from import (
+    get_user_id_from_token,
+)
+from src.core.settings.constants import JWT
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = "0b7f1b8e-3c4d-4e5f-8a9b-0c1d2e3f4a5b"
+
+
+@pytest.fixture
+def decodes(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Record every signature check."""
+    checked: list[str] = []
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs) -> dict:
+        checked.append(kwargs["jwt"])
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt_token.jwt, "decode", counting_decode)
+    return checked
+
+
+def access_token() -> str:
+    """Return a fresh access token of `USER_ID`."""
+    return create_auth_token(
+        payload={JWT.PAYLOAD_SUB_KEY: USER_ID},
+        type_token=JWT.TOKEN_TYPE_ACCESS,
+    )
+
+
+def test_token_is_verified_once(decodes: list[str]) -> None:
+    """A cached token is not verified again, payloads are copies."""
+    cache = VerifiedTokenCache()
+    token = access_token()
+
+    first = decode_jwt(token, cache=cache)
+    first.pop(JWT.TOKEN_TYPE_FIELD)
+    second = decode_jwt(token, cache=cache)
+
+    assert decodes == [token]
+    assert second[JWT.TOKEN_TYPE_FIELD] == JWT.TOKEN_TYPE_ACCESS
+
+
+def test_tampered_token_is_verified(decodes: list[str]) -> None:
+    """Another token is never served from the cache."""
+    cache = VerifiedTokenCache()
+    token = access_token()
+    decode_jwt(token, cache=cache)
+
+    with pytest.raises(jwt.InvalidTokenError):
+        decode_jwt(token[:-2] + "AA", cache=cache)
+    assert len(decodes) == 2
+
+
+def test_expired_and_evicted_tokens_are_dropped() -> None:
+    """Entries live until `exp` and at most `max_size` are kept."""
+    cache = VerifiedTokenCache(max_size=2)
+    cache.put("expired", {JWT.PAYLOAD_EXPIRE_KEY: time.time() - 1})
+    assert cache.get("expired") is None
+
+    for token in ("a", "b", "c"):
+        cache.put(token, {JWT.PAYLOAD_EXPIRE_KEY: time.time() + 60})
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
+
+
+async def test_request_decodes_token_once(decodes: list[str]) -> None:
+    """The cache key reads the payload `token_is_alive` kept."""
+    jwt_token.verified_tokens.clear()
+    token = access_token()
+    request = Request(
+        {
+            "type": "http",
+            "headers": [(b"authorization", f"Bearer {token}".encode())],
+        }
+    )
+
+    payload = await token_is_alive(token=token, request=request)
+
+    assert get_user_id_from_token(request) == USER_ID
+    assert payload[JWT.TOKEN_TYPE_FIELD] == JWT.TOKEN_TYPE_ACCESS
+    assert decodes == [token]
@@ -0,0 +1,92 @@
+"""Tests of the per-worker L1 cache."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.controllers.depends.utils import local_cache as module
+from src.core.controllers.depends.utils.local_cache import (
+    LocalCache,
+    publish_invalidation,
+)
+from src.core.settings.constants import LocalCacheConf
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Replace the monotonic clock of the cache with a settable one."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(module.time, "monotonic", lambda: now.value)
+    return now
+
+
+def test_get_returns_seconds_left_in_redis(clock: SimpleNamespace) -> None:
+    """An entry lives `max_ttl` here but reports its Redis expiry."""
+    cache = LocalCache(max_size=2, max_ttl=5)
+    cache.set("a", b"page", ttl=60)
+
+    clock.value += 4
+    assert cache.get("a") == (b"page", 56)
+
+    clock.value += 1
+    assert cache.get("a") is None
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 1
+
+
+def test_lru_eviction(clock: SimpleNamespace) -> None:
+    """The least recently used entry leaves first."""
+    cache = LocalCache(max_size=2, max_ttl=30)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == (1, 60)
+    assert cache.get("c") == (3, 60)
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_expired_entries_are_evicted_first(clock: SimpleNamespace) -> None:
+    """An expired entry makes room without evicting a live one."""
+    cache = LocalCache(max_size=2, max_ttl=30)
+    cache.set("short", 1, ttl=1)
+    cache.set("long", 2, ttl=60)
+    clock.value += 2
+
+    cache.set("new", 3, ttl=60)
+
+    assert cache.get("long") == (2, 58)
+    assert cache.metrics()["evictions"] == 0
+
+
+@pytest.mark.parametrize(("max_size", "ttl"), ((0, 60), (2, 0)))
+def test_disabled_cache_stores_nothing(max_size: int, ttl: int) -> None:
+    """A zero size or an expired Redis entry is not cached."""
+    cache = LocalCache(max_size=max_size, max_ttl=30)
+    cache.set("a", 1, ttl=ttl)
+    assert cache.get("a") is None
+
+
+async def test_publish_invalidation() -> None:
+    """Keys leave the cache and are broadcast to the other workers."""
+    published: list[tuple[str, str]] = []
+
+    async def publish(channel: str, message: str) -> None:
+        published.append((channel, message))
+
+    cache = LocalCache(max_size=4, max_ttl=30)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+
+    await publish_invalidation(SimpleNamespace(publish=publish), ["a"], cache)
+    await publish_invalidation(SimpleNamespace(publish=publish), [], cache)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert published == [(LocalCacheConf.CHANNEL, json.dumps(["a"]))]
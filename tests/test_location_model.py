@@ -0,0 +1,28 @@
+"""Tests of the indexes of the locations table."""
+
+import pytest
+
+from src.core.models.models.location import LocationORM
+from src.core.settings.constants import LocationH3
+
+INDEXES = {
+    index.name: [column.name for column in index.columns]
+    for index in LocationORM.__table__.indexes
+}
+
+
+@pytest.mark.parametrize(
+    "resolution",
+    range(LocationH3.H3_RESOLUTION_MIN, LocationH3.H3_RESOLUTION_MAX + 1),
+)
+def test_h3_index_covers_the_ring_lookup(resolution: int) -> None:
+    """(h3_index_N, user_id) answers a ring lookup from the index only."""
+    assert INDEXES[LocationH3.INDEX_H3.format(resolution)] == [
+        LocationH3.FIELD_H3_INDEX.format(resolution),
+        "user_id",
+    ]
+
+
+def test_user_id_is_indexed() -> None:
+    """Lookups of a user's own location use an index."""
+    assert INDEXES[LocationH3.INDEX_USER_ID] == ["user_id"]
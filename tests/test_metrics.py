@@ -0,0 +1,26 @@
+"""Tests of GET /metrics."""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.controllers.depends.utils import redis_geo
+from src.core.controllers.metrics import metrics
+from src.core.settings.constants import MetricsRoutes
+
+
+def test_metrics_sections() -> None:
+    """Every component reports its counters in one response."""
+    app = FastAPI()
+    app.include_router(metrics)
+
+    response = TestClient(app).get(MetricsRoutes.METRICS_PATH)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["password_pool"]["rejected"] == 0
+    assert set(body["h3_rings"]) == {"ring", "compact", "cover"}
+    assert "l1" in body["response_cache"]
+    assert (
+        body["failures"][redis_geo.search_failed.name]
+        == redis_geo.search_failed.count
+    )
@@ -0,0 +1,109 @@
+"""Tests of the statement of `Locations.near_users`."""
+
+import pytest
+from sqlalchemy import Select
+from sqlalchemy.dialects import postgresql
+
+from src.core.models.cruds.location import Locations, get_nearby_engine
+from src.core.settings.constants import NearbyEngine
+from src.core.validators.dto import NearbyArea
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+AREA = NearbyArea(
+    user_id=USER_ID,
+    field_name="h3_index_8",
+    radius=1000,
+    h3_ranges=((1, 2), (5, 9)),
+)
+
+
+def compile_query(query: Select) -> tuple[str, dict]:
+    """Return the Postgres SQL of `query` and its parameters."""
+    compiled = query.compile(dialect=postgresql.dialect())
+    return " ".join(str(compiled).split()), compiled.params
+
+
+def test_profiles_are_joined_in_one_statement() -> None:
+    """Profiles come with their cells, without an `IN (ids)` list."""
+    sql, params = compile_query(
+        Locations.near_users_query(AREA, filters={"sex": "female"}, limit=5)
+    )
+
+    assert sql.count("SELECT") == 1
+    assert "JOIN users ON users.id = locations.user_id" in sql
+    assert "locations.h3_index_8 AS h3_cell" in sql
+    assert " IN " not in sql
+    assert "users.sex = %(sex_1)s" in sql
+    assert "locations.user_id != %(user_id_1)s" in sql
+    assert params["param_1"] == [1, 5]
+    assert params["param_2"] == [2, 9]
+
+
+@pytest.mark.parametrize(
+    ("sort_by_created", "order", "operator"),
+    ((None, "ASC", ">"), (False, "ASC", ">"), (True, "DESC", "<")),
+)
+def test_keyset_paging(
+    sort_by_created: bool | None, order: str, operator: str
+) -> None:
+    """`after` continues the order of the keyset, cell or created_at."""
+    sql, _ = compile_query(
+        Locations.near_users_query(
+            AREA,
+            sort_by_created=sort_by_created,
+            after=(7, USER_ID),
+            limit=5,
+        )
+    )
+    first = (
+        "locations.h3_index_8"
+        if sort_by_created is None
+        else "auth.created_at"
+    )
+
+    assert f"({first}, locations.user_id) {operator} (" in sql
+    assert f"ORDER BY {first} {order}, locations.user_id {order}" in sql
+    assert sql.endswith("LIMIT %(param_5)s::INTEGER")
+
+
+def test_default_engine_is_h3_cover() -> None:
+    """Without an engine, the area is the H3 cover."""
+    assert compile_query(Locations.near_users_query(AREA)) == (
+        compile_query(
+            Locations.near_users_query(
+                AREA, engine=get_nearby_engine(NearbyEngine.H3)
+            )
+        )
+    )
+
+
+def test_postgis_engine_is_within_and_nearest_first() -> None:
+    """The PostGIS area is `ST_DWithin`, ordered by `<->` from the user."""
+    sql, params = compile_query(
+        Locations.near_users_query(
+            AREA, engine=get_nearby_engine(NearbyEngine.POSTGIS), limit=5
+        )
+    )
+    center = (
+        "(SELECT locations_1.location FROM locations AS locations_1 "
+        "WHERE locations_1.user_id = %(user_id_1)s::UUID)"
+    )
+
+    assert f"ST_DWithin(locations.location, {center}, " in sql
+    assert f"locations.location <-> {center} AS distance_m" in sql
+    assert f"ORDER BY (locations.location <-> {center}) ASC" in sql
+    assert "unnest" not in sql
+    assert params["ST_DWithin_1"] == AREA.radius
+
+
+@pytest.mark.parametrize("exact", (False, True))
+def test_exact_adds_stored_point_and_distance(exact: bool) -> None:
+    """Exact mode reads the stored point, not the cell centroid."""
+    sql, _ = compile_query(Locations.near_users_query(AREA, exact=exact))
+    columns = (
+        "ST_Y(CAST(locations.location AS geometry(POINT,4326))) AS latitude",
+        "ST_X(CAST(locations.location AS geometry(POINT,4326))) AS longitude",
+        "ST_Distance(locations.location, (SELECT",
+    )
+
+    assert [column in sql for column in columns] == [exact] * len(columns)
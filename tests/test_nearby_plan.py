@@ -0,0 +1,157 @@
+"""Tests of the api/list cache keys, tags and invalidation."""
+
+import uuid
+
+import h3
+import pytest
+from fastapi import Request
+
+from src.core.controllers.depends.utils import nearby_plan
+from src.core.controllers.depends.utils.cache_backend import (
+    MemoryCacheBackend,
+)
+from src.core.controllers.depends.utils.geo import (
+    select_h3_resolution_params,
+)
+from src.core.controllers.depends.utils.redis_chash import (
+    invalidate_tags,
+    set_cache_entry,
+)
+from src.core.settings.constants import (
+    JWT,
+    CellDensity,
+    LiterKeys,
+    NearbyCache,
+)
+from src.core.settings.env import settings
+from src.core.validators.dto import DensityPlan, NearbyPlan
+
+pytestmark = pytest.mark.anyio
+
+DENSITY_CELL = h3.latlng_to_cell(55.7558, 37.6173, CellDensity.RESOLUTION)
+
+
+def user_cells(cell_9: str) -> dict[int, int]:
+    """Return the cells of a user at every resolution."""
+    return {
+        resolution: h3.str_to_int(h3.cell_to_parent(cell_9, resolution))
+        for resolution in range(h3.get_resolution(cell_9) + 1)
+    }
+
+
+# Two users of one density cell, in different cells of resolution 8.
+USERS = {
+    str(uuid.uuid4()): user_cells(h3.cell_to_center_child(child, 9))
+    for child in sorted(h3.cell_to_children(DENSITY_CELL, 8))[:2]
+}
+
+
+def make_request(user_id: str) -> Request:
+    """Return a request of `user_id` with a checked access token."""
+    request = Request({"type": "http", "headers": []})
+    setattr(
+        request.state,
+        LiterKeys.TOKEN_PAYLOAD_STATE,
+        {
+            JWT.PAYLOAD_SUB_KEY: user_id,
+            JWT.TOKEN_TYPE_FIELD: JWT.TOKEN_TYPE_ACCESS,
+        },
+    )
+    return request
+
+
+@pytest.fixture
+def dense_area(monkeypatch: pytest.MonkeyPatch) -> dict[str, list]:
+    """Trim every radius to `area["trimmed"][0]`, record planned radii."""
+    trimmed: list[float] = []
+    planned: list[float] = []
+
+    async def get_user_cells(user_id: str) -> dict[int, int]:
+        return USERS[user_id]
+
+    async def plan_radius(center_cell: int, radius: float) -> DensityPlan:
+        assert center_cell == h3.str_to_int(DENSITY_CELL)
+        planned.append(radius)
+        return DensityPlan(radius=trimmed[0], estimate=10**6, trimmed=True)
+
+    monkeypatch.setattr(nearby_plan, "get_user_cells", get_user_cells)
+    monkeypatch.setattr(nearby_plan, "plan_radius", plan_radius)
+    monkeypatch.setattr(settings.nearby, "NEARBY_DENSITY_ENABLED", True)
+    monkeypatch.setattr(settings.nearby, "NEARBY_ENGINE", "h3")
+    nearby_plan.density_plans.clear()
+    trimmed.append(0.0)
+    yield {"trimmed": trimmed, "planned": planned}
+    nearby_plan.density_plans.clear()
+
+
+@pytest.mark.parametrize("trimmed_radius, resolution", ((100, 9), (1500, 8)))
+async def test_trimmed_keys_are_per_cell(
+    dense_area: dict[str, list], trimmed_radius: float, resolution: int
+) -> None:
+    """Users of one density cell do not share a finer trimmed page."""
+    dense_area["trimmed"][0] = trimmed_radius
+    keys, plans = [], []
+    for user_id in USERS:
+        request = make_request(user_id)
+        keys.append(
+            await nearby_plan.list_cache_key(
+                "api/location_list", request, {"radius": 5000}
+            )
+        )
+        plans.append(getattr(request.state, NearbyCache.PLAN_STATE))
+
+    assert keys[0] != keys[1]
+    for key, plan, cells in zip(keys, plans, USERS.values()):
+        assert plan.trimmed and plan.radius == trimmed_radius
+        assert plan.h3_params.resolution == resolution
+        assert plan.auth_location == cells[resolution]
+        assert f":{resolution}:{cells[resolution]}:" in key
+
+
+async def test_density_plan_is_cached(dense_area: dict[str, list]) -> None:
+    """The counters are read once per density cell and radius."""
+    dense_area["trimmed"][0] = 100
+    user_id = next(iter(USERS))
+    for _ in range(3):
+        await nearby_plan.list_cache_key(
+            "api/location_list", make_request(user_id), {"radius": 5000}
+        )
+    assert dense_area["planned"] == [5000]
+
+
+@pytest.mark.parametrize(("ring", "dropped"), ((0, True), (50, False)))
+async def test_saved_location_drops_covering_entries(
+    monkeypatch: pytest.MonkeyPatch, ring: int, dropped: bool
+) -> None:
+    """An entry is dropped when the saved cell is in its area only."""
+    backend = MemoryCacheBackend()
+    monkeypatch.setattr(
+        nearby_plan,
+        "invalidate_tags",
+        lambda tags: invalidate_tags(tags, backend),
+    )
+    cells = next(iter(USERS.values()))
+    h3_params = select_h3_resolution_params(1000, exact=False)
+    request = make_request(next(iter(USERS)))
+    setattr(
+        request.state,
+        NearbyCache.PLAN_STATE,
+        NearbyPlan(
+            engine="h3",
+            radius=1000,
+            h3_params=h3_params,
+            auth_location=cells[h3_params.resolution],
+        ),
+    )
+    await set_cache_entry(
+        "list",
+        {"body": b"[]"},
+        ex=60,
+        tags=nearby_plan.list_cache_tags(request),
+        backend=backend,
+    )
+    saved = h3.grid_ring(h3.int_to_str(cells[9]), ring)[0]
+
+    await nearby_plan.invalidate_location(h3.str_to_int(saved))
+
+    assert (await backend.get_with_ttl("list") is None) is dropped
@@ -0,0 +1,71 @@
+"""Tests of the api/list keyset cursors."""
+
+import base64
+import datetime
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, status
+
+from src.core.controllers.depends.utils.pagination import (
+    decode_cursor,
+    encode_cursor,
+    get_sort_mode,
+    page_keyset,
+)
+from src.core.settings.constants import LocationH3, Pagination
+
+USER_ID = uuid.uuid4()
+CREATED_AT = datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.UTC)
+
+
+@pytest.mark.parametrize(
+    "sort_mode, sort_value",
+    (
+        (Pagination.SORT_CELL, 617303931370078207),
+        (Pagination.SORT_DISTANCE, 1234.5),
+        (Pagination.SORT_GEO_DISTANCE, 0.25),
+        (Pagination.SORT_CREATED_ASC, CREATED_AT),
+        (Pagination.SORT_CREATED_DESC, CREATED_AT),
+    ),
+)
+def test_cursor_round_trip(sort_mode: str, sort_value: object) -> None:
+    """A cursor decodes to the keyset of the row it was made of."""
+    field = {
+        Pagination.SORT_CELL: LocationH3.FIELD_H3_CELL,
+        Pagination.SORT_DISTANCE: LocationH3.FIELD_DISTANCE,
+        Pagination.SORT_GEO_DISTANCE: LocationH3.FIELD_DISTANCE,
+    }.get(sort_mode, LocationH3.FIELD_CREATED_AT)
+    row = SimpleNamespace(id=USER_ID, **{field: sort_value})
+
+    cursor = encode_cursor(sort_mode, page_keyset(row, sort_mode))
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, sort_mode) == (sort_value, USER_ID)
+
+
+def test_sort_mode() -> None:
+    """Creation order overrides the order of the engine."""
+    assert get_sort_mode(None, Pagination.SORT_DISTANCE) == (
+        Pagination.SORT_DISTANCE
+    )
+    assert get_sort_mode(True) == Pagination.SORT_CREATED_DESC
+    assert get_sort_mode(False) == Pagination.SORT_CREATED_ASC
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    (
+        "not a cursor",
+        base64.urlsafe_b64encode(b'{"s":"cell"}').decode(),
+        base64.urlsafe_b64encode(b'{"s":"cell","k":["x","y"]}').decode(),
+        encode_cursor(Pagination.SORT_DISTANCE, (1.0, USER_ID)),
+    ),
+    ids=("garbage", "no keyset", "bad keyset", "other sort"),
+)
+def test_bad_cursor_is_400(cursor: str) -> None:
+    """Malformed cursors and cursors of another sort are rejected."""
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, Pagination.SORT_CELL)
+    assert error.value.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,49 @@
+"""Tests of the password hashing pool."""
+
+import threading
+
+import anyio
+import pytest
+from fastapi import HTTPException, status
+
+from src.core.controllers.depends.utils.pwd_pool import PasswordExecutor
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_run_returns_result() -> None:
+    """Calls run off the loop and are counted."""
+    pool = PasswordExecutor(workers=1, max_queue=0)
+    try:
+        assert await pool.run(pow, 2, 10) == 1024
+    finally:
+        pool.shutdown()
+    assert pool.metrics()["completed"] == 1
+
+
+async def test_full_queue_is_503() -> None:
+    """Calls beyond workers + queue are rejected at once."""
+    pool = PasswordExecutor(workers=1, max_queue=1)
+    release = threading.Event()
+    results: list[bool] = []
+
+    async def blocked() -> None:
+        results.append(await pool.run(release.wait, 5))
+
+    try:
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(blocked)
+            tasks.start_soon(blocked)
+            while pool.in_flight < 2:
+                await anyio.sleep(0.01)
+
+            assert pool.queue_depth == 1
+            with pytest.raises(HTTPException) as error:
+                await pool.run(pow, 2, 10)
+            release.set()
+    finally:
+        pool.shutdown()
+
+    assert error.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert results == [True, True]
+    assert pool.metrics()["rejected"] == 1
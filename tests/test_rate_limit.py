@@ -0,0 +1,161 @@
+"""Tests of the rate limiter and of the match quota."""
+
+import contextlib
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Request, status
+
+from src.core.controllers.depends import match
+from src.core.controllers.depends.utils.cache_backend import (
+    MemoryCacheBackend,
+)
+from src.core.controllers.depends.utils.rate_limit import RateLimiter
+from src.core.settings.constants import JWT, LiterKeys, RateLimit
+
+pytestmark = pytest.mark.anyio
+
+USER_ID = str(uuid.uuid4())
+TARGET_ID = str(uuid.uuid4())
+
+
+def make_request(token_type: str = JWT.TOKEN_TYPE_ACCESS) -> Request:
+    """Return a request whose token was checked by `token_is_alive`."""
+    request = Request({"type": "http", "headers": [], "client": ("1", 1)})
+    setattr(
+        request.state,
+        LiterKeys.TOKEN_PAYLOAD_STATE,
+        {JWT.PAYLOAD_SUB_KEY: USER_ID, JWT.TOKEN_TYPE_FIELD: token_type},
+    )
+    return request
+
+
+def make_limiter(mode: str, limit: int = 2) -> RateLimiter:
+    """Return a limiter on a fresh in-memory backend, without leases."""
+    return RateLimiter(
+        name="test",
+        limit=limit,
+        window=60,
+        mode=mode,
+        lease=0,
+        backend=MemoryCacheBackend(),
+    )
+
+
+async def remaining(limiter: RateLimiter) -> int:
+    """Take tokens until denied, return how many were admitted."""
+    admitted = 0
+    while True:
+        try:
+            await limiter(make_request())
+        except HTTPException as e:
+            assert e.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            return admitted
+        admitted += 1
+
+
+@pytest.mark.parametrize(
+    "mode", (RateLimit.TOKEN_BUCKET, RateLimit.SLIDING_WINDOW)
+)
+async def test_limit_admits_limit_requests(mode: str) -> None:
+    """`limit` requests pass, the next one gets 429 with Retry-After."""
+    limiter = make_limiter(mode)
+    first = await limiter(make_request())
+    assert first.allowed and first.remaining == 1
+
+    await limiter(make_request())
+    with pytest.raises(HTTPException) as denied:
+        await limiter(make_request())
+    assert denied.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert "Retry-After" in denied.value.headers
+
+
+@pytest.mark.parametrize(
+    "mode", (RateLimit.TOKEN_BUCKET, RateLimit.SLIDING_WINDOW)
+)
+async def test_refund_gives_the_token_back(mode: str) -> None:
+    """A refunded request does not count toward the limit."""
+    limiter = make_limiter(mode)
+    await limiter(make_request())
+    await limiter.refund(make_request())
+    assert await remaining(limiter) == 2
+
+
+@pytest.fixture
+def match_limiter(monkeypatch: pytest.MonkeyPatch) -> RateLimiter:
+    """Replace the match limiter with an in-memory one."""
+    limiter = make_limiter(RateLimit.SLIDING_WINDOW)
+    monkeypatch.setattr(match, "match_limiter", limiter)
+    return limiter
+
+
+def make_crud() -> SimpleNamespace:
+    """Return the CRUD calls of a match that is not mutual."""
+
+    async def insert_new_match(**_) -> None:
+        return None
+
+    async def select_match(**_) -> bool:
+        return False
+
+    return SimpleNamespace(
+        likes=SimpleNamespace(
+            insert_new_match=insert_new_match, select_match=select_match
+        )
+    )
+
+
+def make_session() -> SimpleNamespace:
+    """Return a session whose transaction does nothing."""
+
+    @contextlib.asynccontextmanager
+    async def begin():
+        yield
+
+    return SimpleNamespace(begin=begin)
+
+
+async def post_match(target: str, token_type: str) -> bool:
+    """Call the match dependency like the route does."""
+    request = make_request(token_type)
+    return await match.match_post(
+        request=request,
+        response=None,
+        token=getattr(request.state, LiterKeys.TOKEN_PAYLOAD_STATE),
+        crud=make_crud(),
+        session=make_session(),
+        target_user_id=target,
+    )
+
+
+@pytest.mark.parametrize(
+    "target, token_type, code",
+    (
+        ("not-a-uuid", JWT.TOKEN_TYPE_ACCESS, 422),
+        (TARGET_ID, JWT.TOKEN_TYPE_REFRESH, 401),
+    ),
+)
+async def test_rejected_match_keeps_quota(
+    match_limiter: RateLimiter, target: str, token_type: str, code: int
+) -> None:
+    """A bad id or a refresh token is rejected before the limiter."""
+    with pytest.raises(HTTPException) as rejected:
+        await post_match(target, token_type)
+    assert rejected.value.status_code == code
+    assert await remaining(match_limiter) == 2
+
+
+async def test_self_match_keeps_quota(match_limiter: RateLimiter) -> None:
+    """A match with oneself is negative and does not count."""
+    assert await post_match(USER_ID, JWT.TOKEN_TYPE_ACCESS) is False
+    assert await remaining(match_limiter) == 2
+
+
+async def test_match_takes_quota(match_limiter: RateLimiter) -> None:
+    """A positive match counts, the third one gets 429."""
+    assert await post_match(TARGET_ID, JWT.TOKEN_TYPE_ACCESS) is True
+    assert await post_match(TARGET_ID, JWT.TOKEN_TYPE_ACCESS) is True
+    with pytest.raises(HTTPException) as denied:
+        await post_match(TARGET_ID, JWT.TOKEN_TYPE_ACCESS)
+    assert denied.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
@@ -0,0 +1,186 @@
+"""Tests of the api/list response cache on the memory backend."""
+
+import asyncio
+
+import pytest
+from fastapi import Request, Response
+
+from src.core.controllers.depends.utils import redis_chash
+from src.core.controllers.depends.utils.cache_backend import (
+    MemoryCacheBackend,
+)
+from src.core.controllers.depends.utils.local_cache import local_cache
+from src.core.controllers.depends.utils.redis_chash import (
+    FLIGHT_METRICS,
+    cache_list_location,
+    invalidate_tags,
+)
+from src.core.settings.constants import CacheStampede, Headers
+from src.core.validators.user import UsersCollection
+
+pytestmark = pytest.mark.anyio
+
+PREFIX = "test/list"
+TAG = "cell"
+
+
+def make_request(etag: str | None = None) -> Request:
+    """Return a POST api/list request, conditional with `etag`."""
+    headers = [(Headers.IF_NONE_MATCH.encode(), etag.encode())] if etag else []
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/list",
+            "headers": headers,
+            "query_string": b"",
+        }
+    )
+
+
+async def key_builder(prefix_key: str, request: Request, _: dict) -> str:
+    """Return one key for every request."""
+    return f"{prefix_key}:shared"
+
+
+@pytest.fixture
+def cached() -> tuple:
+    """Return a cached handler, its backend and its call counter."""
+    backend = MemoryCacheBackend()
+    calls: list[int] = []
+
+    async def handler(request: Request, response: Response):
+        calls.append(1)
+        return UsersCollection(users=[])
+
+    wrapped = cache_list_location(
+        expire=60,
+        prefix_key=PREFIX,
+        key_builder=key_builder,
+        tags_builder=lambda request: (TAG,),
+        backend=backend,
+    )(handler)
+    return wrapped, backend, calls
+
+
+async def test_hit_304_and_invalidation(cached: tuple) -> None:
+    """A stored page is served until its tag is invalidated."""
+    wrapped, backend, calls = cached
+
+    miss = await wrapped(request=make_request(), response=Response())
+    hit = await wrapped(request=make_request(), response=Response())
+    etag = miss.headers[Headers.ETAG]
+    not_modified = await wrapped(
+        request=make_request(etag), response=Response()
+    )
+    assert miss.headers[Headers.X_CACHE] == Headers.X_CACHE_MISS
+    assert hit.headers[Headers.X_CACHE] == Headers.X_CACHE_HIT
+    assert hit.body == miss.body
+    assert not_modified.status_code == 304
+    assert len(calls) == 1
+
+    assert await invalidate_tags((TAG,), backend) == 1
+    again = await wrapped(request=make_request(etag), response=Response())
+    assert again.headers[Headers.X_CACHE] == Headers.X_CACHE_MISS
+    assert len(calls) == 2
+
+
+async def test_hit_sends_stored_bytes(
+    cached: tuple, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A hit neither validates nor serializes the stored page."""
+    wrapped, _, _ = cached
+    miss = await wrapped(request=make_request(), response=Response())
+
+    def serialize_data(data):
+        raise AssertionError("a hit must not serialize")
+
+    monkeypatch.setattr(redis_chash, "serialize_data", serialize_data)
+    hit = await wrapped(request=make_request(), response=Response())
+
+    assert hit.body == miss.body
+    assert hit.headers["content-type"] == miss.headers["content-type"]
+
+
+async def test_backend_hit_without_l1(cached: tuple) -> None:
+    """The backend answers when its L1 is disabled."""
+    wrapped, backend, calls = cached
+    backend.local.max_size = 0
+
+    await wrapped(request=make_request(), response=Response())
+    hit = await wrapped(request=make_request(), response=Response())
+
+    assert hit.headers[Headers.X_CACHE] == Headers.X_CACHE_HIT
+    assert backend.local.metrics()["size"] == 0
+    assert len(calls) == 1
+
+
+async def test_l1_is_per_backend(cached: tuple) -> None:
+    """An injected backend does not fill the worker's `local_cache`."""
+    wrapped, backend, _ = cached
+    worker_size = local_cache.metrics()["size"]
+
+    await wrapped(request=make_request(), response=Response())
+
+    assert backend.local.get(f"{PREFIX}:shared") is not None
+    assert local_cache.metrics()["size"] == worker_size
+
+
+async def test_concurrent_misses_are_coalesced() -> None:
+    """One request recomputes a missing entry, the others wait for it."""
+    backend = MemoryCacheBackend()
+    calls: list[int] = []
+
+    async def handler(request: Request, response: Response):
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return UsersCollection(users=[])
+
+    wrapped = cache_list_location(
+        expire=60, prefix_key=PREFIX, key_builder=key_builder, backend=backend
+    )(handler)
+    coalesced = FLIGHT_METRICS["coalesced"]
+
+    responses = await asyncio.gather(
+        *(
+            wrapped(request=make_request(), response=Response())
+            for _ in range(5)
+        )
+    )
+
+    assert len(calls) == 1
+    assert FLIGHT_METRICS["coalesced"] - coalesced == 4
+    assert len({response.body for response in responses}) == 1
+
+
+async def test_stale_entry_is_served_during_recompute() -> None:
+    """An expired entry within `stale` is sent while it is recomputed."""
+    backend = MemoryCacheBackend()
+    cache_key = f"{PREFIX}:shared"
+
+    async def handler(request: Request, response: Response):
+        return UsersCollection(users=[])
+
+    wrapped = cache_list_location(
+        expire=60,
+        prefix_key=PREFIX,
+        key_builder=key_builder,
+        stale=30,
+        backend=backend,
+    )(handler)
+    await wrapped(request=make_request(), response=Response())
+    # Age the entry past `expire` and let another request hold the lease.
+    fields, _ = await backend.get_with_ttl(cache_key)
+    backend.local.clear()
+    async with backend.pipeline() as pipe:
+        pipe.set(cache_key, fields, 10)
+    token = await backend.acquire_lock(
+        cache_key + CacheStampede.LOCK_SUFFIX, 5000
+    )
+    stale_served = FLIGHT_METRICS["stale_served"]
+
+    response = await wrapped(request=make_request(), response=Response())
+
+    assert token is not None
+    assert response.headers[Headers.X_CACHE] == Headers.X_CACHE_HIT
+    assert FLIGHT_METRICS["stale_served"] - stale_served == 1
@@ -0,0 +1,78 @@
+"""Tests of the Redis GEO engine of api/list."""
+
+import uuid
+from types import SimpleNamespace
+
+import h3
+import pytest
+
+from src.core.controllers.depends.utils.redis_geo import (
+    TooManyCandidates,
+    search_nearby,
+)
+from src.core.controllers.depends.utils.serialize_and_deserilize import (
+    deserialize_data_to_user_obj,
+)
+from src.core.settings.constants import LocationH3
+from src.core.validators.dto import UsersDataGeo
+
+pytestmark = pytest.mark.anyio
+
+
+def geo_redis(found: int) -> SimpleNamespace:
+    """Return a Redis double whose area holds `found` users."""
+
+    async def geosearch(*args, count: int, **kwargs) -> list:
+        return [
+            (str(uuid.uuid4()), float(i)) for i in range(min(found, count))
+        ]
+
+    return SimpleNamespace(geosearch=geosearch)
+
+
+async def test_full_area_is_returned() -> None:
+    """An area of exactly `count` users is not cut."""
+    found = await search_nearby(
+        str(uuid.uuid4()), radius=1000, count=3, redis=geo_redis(3)
+    )
+    assert [distance for _, distance in found] == [0, 1, 2]
+
+
+async def test_cut_area_is_refused() -> None:
+    """More users than `count` would drop the last pages."""
+    with pytest.raises(TooManyCandidates):
+        await search_nearby(
+            str(uuid.uuid4()), radius=1000, count=3, redis=geo_redis(4)
+        )
+
+
+def test_engine_distances_replace_cell_distances() -> None:
+    """Users of the searcher's cell are not all at distance 0."""
+    cell = h3.str_to_int(h3.latlng_to_cell(55.7558, 37.6173, 9))
+    rows = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            first_name="first",
+            last_name="last",
+            sex="M",
+            avatar_path="avatar.png",
+            **{LocationH3.FIELD_H3_CELL: cell, LocationH3.FIELD_DISTANCE: d},
+        )
+        for d in (120.0, 480.0)
+    ]
+    users_data = UsersDataGeo(
+        auth_location=cell, rows=rows, field_name="h3_index_9", exact=False
+    )
+    cell_users = deserialize_data_to_user_obj(users_data).users
+    assert [user.distance for user in cell_users] == [0, 0]
+
+    users_data = UsersDataGeo(
+        auth_location=cell,
+        rows=rows,
+        field_name="h3_index_9",
+        exact=False,
+        distance_field=LocationH3.FIELD_DISTANCE,
+    )
+    geo_users = deserialize_data_to_user_obj(users_data).users
+    assert [user.distance for user in geo_users] == [0.12, 0.48]
+    assert geo_users[0].lat == cell_users[0].lat